@@ -0,0 +1,160 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from core import loads, storage
+
+# Excelの1シートに入る最大行数（ヘッダー行を除く）
+XLSX_MAX_ROWS = 1_048_575
+
+# 1シーズンの日数
+SEASON_DAYS = 300
+
+# (エクササイズ名, 負荷の種類) 負荷の種類は "%"=1RM比, "kg", "体重", "-"=負荷なし
+EXERCISES = [
+    ("Back Squat", "%"), ("Front Squat", "%"), ("Bench Press", "%"), ("Deadlift", "%"),
+    ("Power Clean", "%"), ("Hang Clean", "%"), ("Push Press", "%"), ("Romanian Deadlift", "kg"),
+    ("Bulgarian Split Squat", "kg"), ("Dumbbell Row", "kg"), ("Hip Thrust", "kg"), ("Lat Pulldown", "kg"),
+    ("Pull Up", "体重"), ("Push Up", "体重"), ("Nordic Hamstring", "体重"), ("Single Leg Squat", "体重"),
+    ("Vertical Jump", "-"), ("Broad Jump", "-"), ("Sprint 20m", "-"), ("Lateral Bound", "-"),
+]
+
+WARMUPS = [("WU", "Dynamic Stretch"), ("WU", "Light Jog"), ("ST", "Plank"), ("ST", "Side Plank"), ("PL", "Pogo Jump")]
+
+# 種目ごとの1RMの目安（kg）
+BASE_ONE_RM = {"%": 100.0, "kg": 40.0}
+
+
+def _program_names(count):
+    circled = "①②③④⑤⑥⑦⑧⑨⑩⑪⑫⑬⑭⑮⑯⑰⑱⑲⑳"
+    return [circled[i] if i < len(circled) else f"P{i + 1}" for i in range(count)]
+
+
+# training_program.xlsx と同じ形式のプログラム表を作る
+def generate_program(programs=6, exercises_per_program=6, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for name in _program_names(programs):
+        for i in rng.choice(len(WARMUPS), size=2, replace=False):
+            no, exercise = WARMUPS[i]
+            rows.append({'Program': name, 'No': no, 'Exercise': exercise, 'set': 1, 'load': '-', 'rep': 10, 'Point': 'フォームを確認'})
+        for no, i in enumerate(rng.choice(len(EXERCISES), size=min(exercises_per_program, len(EXERCISES)), replace=False), start=1):
+            exercise, kind = EXERCISES[i]
+            # 同じエクササイズを複数行（セットごとに負荷を変える）にすることもある
+            for _ in range(int(rng.integers(1, 3))):
+                load = round(float(rng.choice([0.6, 0.7, 0.75, 0.8, 0.85])), 2) if kind == "%" else '-'
+                rows.append({
+                    'Program': name, 'No': no, 'Exercise': exercise,
+                    'set': int(rng.integers(2, 5)), 'load': load, 'rep': int(rng.choice([3, 5, 6, 8, 10])),
+                    'Point': f"{exercise}のポイント",
+                })
+    return pd.DataFrame(rows)
+
+
+# プログラムの1回分の実施内容（メイン種目を1セット1行に展開）
+def _session_templates(program_df):
+    kinds = dict(EXERCISES)
+    warmup_nos = {no for no, _ in WARMUPS}
+    templates = {}
+    for name, group in program_df.groupby('Program', sort=False):
+        rows = []
+        set_numbers = {}
+        for row in group.to_dict('records'):
+            if row['No'] in warmup_nos:
+                continue
+            for _ in range(int(row['set'])):
+                set_numbers[row['Exercise']] = set_numbers.get(row['Exercise'], 0) + 1
+                rows.append({
+                    'エクササイズ名': row['Exercise'], 'set': set_numbers[row['Exercise']],
+                    'load': row['load'], 'rep': row['rep'], 'kind': kinds.get(row['Exercise'], "-"),
+                })
+        templates[name] = pd.DataFrame(rows)
+    return templates
+
+
+# training_log.xlsx と同じ列のログを作る（日付順、行数はちょうど rows）
+def generate_log(rows, program_df, players=15, seasons=1, seed=0):
+    rng = np.random.default_rng(seed)
+    templates = {name: t for name, t in _session_templates(program_df).items() if len(t) > 0}
+    if not templates or rows <= 0:
+        return storage.empty_log()
+    names = list(templates)
+    lengths = np.array([len(templates[name]) for name in names])
+
+    # 1回のセッション = 1人の選手が1日に1つのプログラムを実施
+    session_count = int(np.ceil(rows / lengths.min())) + 1
+    session_program = rng.integers(0, len(names), size=session_count)
+    keep = np.searchsorted(np.cumsum(lengths[session_program]), rows) + 1
+    session_program = session_program[:keep]
+    session_day = np.sort(rng.integers(0, SEASON_DAYS * seasons, size=keep))
+    session_player = rng.integers(0, players, size=keep)
+
+    # セッションごとの行を展開して1つの表にする
+    row_session = np.repeat(np.arange(keep), lengths[session_program])[:rows]
+    session_start = np.cumsum(lengths[session_program]) - lengths[session_program]
+    offsets = np.arange(len(row_session)) - session_start[row_session]
+    table = pd.concat([templates[name] for name in names], ignore_index=True)
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    picked = table.iloc[starts[session_program[row_session]] + offsets].reset_index(drop=True)
+
+    player_names = np.array([f"選手{i + 1:02d}" for i in range(players)], dtype=object)
+    player_weight = rng.normal(80, 8, size=players).round(1)
+    player_strength = rng.uniform(0.7, 1.4, size=players)
+    player = session_player[row_session]
+
+    # 負荷は実際に入力される形（"72.5kg"、"体重"、空欄）にする
+    kind = picked['kind'].to_numpy()
+    ratio = pd.to_numeric(picked['load'], errors='coerce').fillna(0.5).to_numpy()
+    base = np.where(kind == "%", BASE_ONE_RM["%"] * ratio, BASE_ONE_RM["kg"]) * player_strength[player]
+    kg = (np.round(base * rng.uniform(0.9, 1.1, size=rows) / 2.5) * 2.5).round(1)
+    load = np.where(kind == "体重", "体重", np.where(kind == "-", "", pd.Series(kg).astype(str).to_numpy() + "kg"))
+    reps = np.maximum(1, picked['rep'].astype(int).to_numpy() + rng.integers(-1, 2, size=rows))
+    body_weight = (player_weight[player] + rng.normal(0, 0.5, size=rows)).round(1)
+
+    start = pd.Timestamp("2024-04-01")
+    df = pd.DataFrame({
+        '日付': start + pd.to_timedelta(session_day[row_session], unit="D"),
+        'プログラム名': np.array(names, dtype=object)[session_program[row_session]],
+        '名前': player_names[player],
+        'エクササイズ名': picked['エクササイズ名'].to_numpy(),
+        'set': picked['set'].to_numpy(),
+        '負荷': load,
+        '回数': reps,
+        '総負荷量': 0.0,
+        '体重': body_weight,
+    })
+    df['総負荷量'] = loads.compute_volumes(df['負荷'], df['回数'], body_weight=df['体重'])
+    return df
+
+
+# プログラム表とログを作って保存する（保存先の形式は storage の設定に従う）
+def write_dataset(directory, rows, players=15, exercises=6, programs=6, seasons=1, seed=0):
+    if not storage.use_sqlite() and rows > XLSX_MAX_ROWS:
+        raise ValueError(f"Excelのシートには{XLSX_MAX_ROWS}行までしか入りません（TRAINING_LOG_BACKEND=sqlite を使用してください）")
+    os.makedirs(directory, exist_ok=True)
+    log_file = os.path.join(directory, os.path.basename(storage.LOG_FILE))
+    program_file = os.path.join(directory, os.path.basename(storage.PROGRAM_FILE))
+    program_df = generate_program(programs, exercises, seed)
+    storage.replace_program(program_df, program_file)
+    storage.replace_log(generate_log(rows, program_df, players, seasons, seed), log_file)
+    return log_file, program_file
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ベンチマーク用の架空のトレーニングログとプログラム表を作る")
+    parser.add_argument("--out", default="bench_data")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--players", type=int, default=15)
+    parser.add_argument("--exercises", type=int, default=6, help="1プログラムあたりのメイン種目数")
+    parser.add_argument("--programs", type=int, default=6)
+    parser.add_argument("--seasons", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    log_file, program_file = write_dataset(args.out, args.rows, args.players, args.exercises, args.programs, args.seasons, args.seed)
+    print(f"{args.rows}件のログを {log_file}、プログラム表を {program_file} に作成しました")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from bench import generate
+from core import cache, export, loads, program_index, storage, writer
+from core.pagination import page_slice
+
+# 保存の計測回数（1回 = 1エクササイズ4セット）
+SAVE_REPEATS = 20
+
+
+def _timed(func, repeats=1, setup=None):
+    times = []
+    result = None
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return times, result
+
+
+def _summary(times):
+    ordered = sorted(times)
+    return {
+        "runs": len(times),
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        "max": ordered[-1],
+    }
+
+
+# アプリの「Training Log 入力」の保存と同じ手順（総負荷量の計算 → 書き込みスレッド経由で追記）
+def _save_exercise(log_file, player, program, exercise, body_weight):
+    entries = [{
+        '日付': datetime.today().date(), 'プログラム名': program, '名前': player, 'エクササイズ名': exercise,
+        'set': i + 1, '負荷': "60kg", '回数': 8, '体重': body_weight,
+    } for i in range(4)]
+    rows = loads.log_rows(entries)
+    return writer.save_rows(rows, log_file)
+
+
+# アプリの「過去ログ検索」と同じ手順（絞り込み → 統計情報 → 1ページ目の表示）
+def _search(log_file, name, program):
+    today = datetime.today().date()
+    filters = {"name": name, "program": program, "start": today - timedelta(days=3650), "end": today}
+    df = storage.query_log(log_file=log_file, **filters)
+    storage.search_summary(log_file=log_file, **filters)
+    page_slice(df, 1, 50, sort_by='日付', ascending=False)
+    return len(df)
+
+
+# 1つのデータセットでアプリの主な処理の時間を計る
+def run_case(backend, rows, players=15, seasons=1, seed=0, work_dir=None):
+    storage.BACKEND = backend
+    directory = tempfile.mkdtemp(prefix="training_log_bench_", dir=work_dir)
+    try:
+        start = time.perf_counter()
+        log_file, program_file = generate.write_dataset(directory, rows, players=players, seasons=seasons, seed=seed)
+        generate_seconds = time.perf_counter() - start
+
+        # 再起動した状態（ファイルのキャッシュも、前回読み込んだ型付きログもない）
+        def restart():
+            cache.invalidate()
+            storage._reset_tail(log_file)
+
+        restart()
+
+        timings = {}
+        # 初回（型付きミラーなし）、再起動後（ミラーあり・キャッシュなし）、2回目以降（キャッシュ済み）
+        if backend == "xlsx":
+            storage._remove_derived_files(log_file)
+        times, log_df = _timed(lambda: storage.read_typed_log(log_file))
+        timings["load_training_log.first"] = _summary(times)
+        times, _ = _timed(lambda: storage.read_typed_log(log_file), repeats=3, setup=restart)
+        timings["load_training_log.cold"] = _summary(times)
+        times, _ = _timed(lambda: storage.read_typed_log(log_file), repeats=5)
+        timings["load_training_log.warm"] = _summary(times)
+
+        times, program_df = _timed(lambda: storage.read_program(program_file), repeats=3, setup=cache.invalidate)
+        timings["load_program_file"] = _summary(times)
+        times, index = _timed(lambda: program_index.build(program_df), repeats=5)
+        timings["program_grouping"] = _summary(times)
+        times, _ = _timed(lambda: program_index.search(index, "squat"), repeats=5)
+        timings["program_search"] = _summary(times)
+
+        player = log_df['名前'].iloc[0] if len(log_df) else "選手01"
+        program = log_df['プログラム名'].iloc[0] if len(log_df) else "①"
+        times, matched = _timed(lambda: _search(log_file, player, program), repeats=5)
+        timings["search_filter"] = dict(_summary(times), matched_rows=matched)
+        times, _ = _timed(lambda: _search(log_file, None, None), repeats=3)
+        timings["search_all"] = _summary(times)
+        # 今月だけの検索（再起動直後。期間に重なる月のパーティションだけを読む）
+        times, _ = _timed(lambda: storage.query_log(start=log_df['日付'].max().replace(day=1), end=log_df['日付'].max(), log_file=log_file), repeats=3, setup=restart)
+        timings["search_month.cold"] = _summary(times)
+
+        times, _ = _timed(lambda: export.export_to_tempfile(storage.read_typed_log(log_file), "CSV").close(), repeats=3)
+        timings["csv_export"] = _summary(times)
+
+        times, _ = _timed(lambda: _save_exercise(log_file, player, program, "Back Squat", 80.0), repeats=SAVE_REPEATS)
+        timings["save_append"] = _summary(times)
+        times, _ = _timed(lambda: storage.read_typed_log(log_file), repeats=3)
+        timings["load_training_log.after_save"] = _summary(times)
+
+        return {
+            "backend": backend,
+            "rows": rows,
+            "players": players,
+            "seasons": seasons,
+            "generate_seconds": generate_seconds,
+            "log_bytes": sum(size for _, _, size in cache.file_signature(*storage._log_paths(log_file)) if size is not None),
+            "timings": timings,
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="架空のログでアプリの主な処理の時間を計り、JSONで出力する")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--backend", nargs="+", choices=["xlsx", "sqlite"], default=["xlsx", "sqlite"])
+    parser.add_argument("--players", type=int, default=15)
+    parser.add_argument("--seasons", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="結果のJSONファイル（省略時は標準出力）")
+    args = parser.parse_args(argv)
+
+    results = []
+    for backend in args.backend:
+        for rows in args.rows:
+            print(f"{backend} {rows}件 ...", file=sys.stderr)
+            try:
+                results.append(run_case(backend, rows, args.players, args.seasons, args.seed))
+            except ValueError as e:
+                results.append({"backend": backend, "rows": rows, "skipped": str(e)})
+
+    report = json.dumps({"environment": environment(), "results": results}, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import partial
+
+import pandas as pd
+
+from core import cache, columnar, export, importer, ingest, sqlite_store, storage, xlsx_reader
+from core.locking import file_lock
+
+# 集計の期間（期間の最初の日を求める）
+PERIODS = {
+    "day": lambda dates: dates,
+    "week": lambda dates: dates - pd.to_timedelta(dates.dt.weekday, unit="D"),
+    "month": lambda dates: dates.dt.to_period("M").dt.start_time,
+}
+
+
+# func を items の各要素に複数のプロセスで適用する（結果は items の順）
+# 同時に渡すのは jobs の2倍までなので、items は大きなファイルをチャンクごとに読むジェネレータでもよい
+def parallel_map(func, items, jobs):
+    if jobs <= 1:
+        yield from map(func, items)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(func, item))
+            if len(pending) >= jobs * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _write(df, path):
+    with open(path, "wb") as f:
+        if path.lower().endswith(".xlsx"):
+            export.write_xlsx(df, f)
+        else:
+            export.write_csv(df, f)
+
+
+# ログの元データ（Excel本体とジャーナル、またはSQLite）をチャンクごとに読む
+def iter_log_batches(log_file, batch_rows=xlsx_reader.BATCH_ROWS):
+    if storage.use_sqlite():
+        db_file = storage.db_path(log_file)
+        last_id = 0
+        upto_id = sqlite_store.max_id(db_file)
+        while last_id < upto_id:
+            yield sqlite_store.read_since(db_file, last_id, min(last_id + batch_rows, upto_id))
+            last_id += batch_rows
+        return
+    if os.path.exists(log_file):
+        yield from xlsx_reader.iter_batches(log_file, columns=storage.LOG_COLUMNS, batch_rows=batch_rows, typed=False)
+    journal_df = storage.read_journal(log_file)
+    if len(journal_df) > 0:
+        yield journal_df
+
+
+# 1つのファイルをバッチごとに読んで整える（別のプロセスで実行）
+# 整えたバッチは1つずつ work_dir の一時ファイルに書き、そのパスのリストを返す
+def _prepare_file(task):
+    path, work_dir = task
+    paths = []
+    for batch in importer.prepare_batches(path, os.path.basename(path)):
+        fd, batch_path = tempfile.mkstemp(dir=work_dir, suffix=".pkl")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+        paths.append(batch_path)
+    return paths
+
+
+# 一時ファイルのバッチを1つずつ読み込む（読んだファイルは消す）
+def _load_batches(batch_paths):
+    for batch_path in batch_paths:
+        with open(batch_path, "rb") as f:
+            batch = pickle.load(f)
+        os.remove(batch_path)
+        yield batch
+
+
+def cmd_import(args):
+    for path in args.files:
+        if not os.path.exists(path):
+            raise SystemExit(f"ファイルがありません: {path}")
+        columns = importer.header(path, path)
+        missing = [c for c in importer.REQUIRED_COLUMNS if c not in columns]
+        if missing:
+            raise SystemExit(f"必要な列がありません（{', '.join(missing)}）: {path}")
+    # ファイルの読み込みと整形はファイルごとに別のプロセスで、既存のログとの重複の確認と追加は順に行う
+    with tempfile.TemporaryDirectory() as work_dir:
+        tasks = [(path, work_dir) for path in args.files]
+        prepared = (batch for batch_paths in parallel_map(_prepare_file, tasks, args.jobs) for batch in _load_batches(batch_paths))
+        counts = importer.merge_batches(prepared, args.log)
+    # 追加した行はジャーナルに入るので、Excel本体に反映してから終了する
+    storage.compact_journal(args.log)
+    print(f"{counts['rows']}行を読み込み、{counts['inserted']}行を追加しました"
+          f"（重複 {counts['duplicates']}行、不正な行 {counts['rejected']}行）")
+
+
+def cmd_export(args):
+    df = storage.query_log(name=args.name, program=args.program, start=args.start, end=args.end, log_file=args.log)
+    _write(df, args.output)
+    print(f"{len(df)}件を {args.output} に書き出しました")
+
+
+# Excelのログ（未反映のジャーナルを含む）をSQLiteに取り込む
+def cmd_to_sqlite(args):
+    if not (os.path.exists(args.log) or os.path.exists(storage.journal_path(args.log))):
+        raise SystemExit(f"ファイルがありません: {args.log}")
+    db_file = storage.db_path(args.log)
+    count = sqlite_store.import_from_xlsx(args.log, db_file, replace=not args.append)
+    cache.invalidate()
+    print(f"{count}件を {db_file} に取り込みました")
+
+
+def cmd_compact(args):
+    count = storage.compact_journal(args.log)
+    print(f"{count}件をExcelに反映しました")
+
+
+# 1か月分のパーティションを型付きにして書く（別のプロセスで実行）
+def _write_month(directory, task):
+    month, frame = task
+    return month, columnar.write_partition(columnar.to_typed(frame), directory, month)
+
+
+# Excel本体を1回読み、月ごとのパーティションを複数のプロセスで書き直す
+def _rebuild_partitions(log_file, jobs):
+    directory = storage.partition_dir(log_file)
+    with file_lock(log_file):
+        signature = storage.source_signature(log_file)
+        months = {}
+        for batch in xlsx_reader.iter_batches(log_file, columns=storage.LOG_COLUMNS):
+            keys = pd.to_datetime(batch["日付"], errors="coerce").dt.strftime(columnar.PARTITION_FORMAT).fillna(columnar.UNDATED)
+            for month, frame in batch.groupby(keys.to_numpy(), sort=False):
+                months.setdefault(month, []).append(frame)
+        os.makedirs(directory, exist_ok=True)
+        tasks = ((month, pd.concat(frames, ignore_index=True)) for month, frames in sorted(months.items()))
+        partitions = dict(parallel_map(partial(_write_month, directory), tasks, jobs))
+        columnar.commit_partitions(directory, signature, partitions)
+    return len(partitions)
+
+
+def cmd_rebuild(args):
+    if not storage.use_sqlite():
+        storage.compact_journal(args.log)
+        if os.path.exists(args.log) and columnar.has_parquet():
+            count = _rebuild_partitions(args.log, args.jobs)
+            print(f"{count}か月分のパーティションを {storage.partition_dir(args.log)} に作成しました")
+    cache.invalidate()
+    count = storage.rebuild_rollups(args.log)
+    print(f"{count}件の集計行を {storage.rollup_path(args.log)} に作成しました")
+
+
+# 1チャンク分の行を確かめる（別のプロセスで実行）
+def _check_batch(df):
+    problems = importer.row_problems(df)
+    normalized, _ = importer.normalize_batch(df)
+    return len(df), {reason: int(mask.sum()) for reason, mask in problems.items()}, importer.content_hashes(normalized)
+
+
+def cmd_validate(args):
+    rows = 0
+    problems = {}
+    duplicates = 0
+    seen = set()
+    for count, batch_problems, hashes in parallel_map(_check_batch, iter_log_batches(args.log), args.jobs):
+        rows += count
+        for reason, n in batch_problems.items():
+            problems[reason] = problems.get(reason, 0) + n
+        for h in hashes.tolist():
+            if h in seen:
+                duplicates += 1
+            else:
+                seen.add(h)
+
+    print(f"{rows}行を確認しました")
+    for reason, n in problems.items():
+        if n:
+            print(f"  {reason}: {n}行")
+    if duplicates:
+        print(f"  内容が同じ行: {duplicates}行")
+    if not storage.use_sqlite():
+        print(f"  Excelに未反映の行: {storage.pending_journal_rows(args.log)}行")
+        if columnar.has_parquet() and os.path.exists(args.log):
+            fresh = storage.partitions_fresh(args.log)
+            print(f"  パーティション: {'最新' if fresh else '作り直しが必要（rebuild）'}")
+    fresh = storage.rollups_fresh(args.log)
+    print(f"  集計テーブル: {'最新' if fresh else '作り直しが必要（rebuild）'}")
+    return 1 if duplicates or any(problems.values()) else 0
+
+
+# 選手 × 日 の合計（別のプロセスで実行。source はパーティションか、読み込み済みの行）
+def _daily_totals(source):
+    kind, value = source
+    df = columnar.read_partition(*value) if kind == "partition" else value
+    frame = pd.DataFrame({
+        "日付": pd.to_datetime(df["日付"], errors="coerce").dt.normalize(),
+        "名前": df["名前"].astype("string").str.strip(),
+        "セット数": 1,
+        "回数": pd.to_numeric(df["回数"], errors="coerce").fillna(0).to_numpy(),
+        "総負荷量": pd.to_numeric(df["総負荷量"], errors="coerce").fillna(0).to_numpy(),
+    })
+    frame = frame[frame["日付"].notna() & frame["名前"].fillna("").ne("")]
+    return frame.groupby(["日付", "名前"], as_index=False)[["セット数", "回数", "総負荷量"]].sum()
+
+
+# 集計に使う元データ（Excelのログは期間に重なる月のパーティションと未反映のジャーナル、それ以外はチャンク）
+def _aggregate_sources(log_file, start, end):
+    manifest = None if storage.use_sqlite() else storage.partition_manifest(log_file)
+    if manifest is None:
+        yield from (("frame", batch) for batch in iter_log_batches(log_file))
+        return
+    directory = storage.partition_dir(log_file)
+    for _, entry in columnar.partitions_between(manifest, start, end):
+        yield "partition", (directory, entry)
+    journal_df = storage.read_journal(log_file)
+    if len(journal_df) > 0:
+        yield "frame", journal_df
+
+
+def cmd_aggregate(args):
+    totals = list(parallel_map(_daily_totals, _aggregate_sources(args.log, args.start, args.end), args.jobs))
+    daily = pd.concat(totals, ignore_index=True) if totals else _daily_totals(("frame", storage.empty_log()))
+    # 同じ日の行が別のチャンクにまたがる場合があるので、日ごとにまとめ直してから期間ごとに集計する
+    daily = daily.groupby(["日付", "名前"], as_index=False)[["セット数", "回数", "総負荷量"]].sum()
+    if args.start is not None:
+        daily = daily[daily["日付"] >= pd.Timestamp(args.start)]
+    if args.end is not None:
+        daily = daily[daily["日付"] <= pd.Timestamp(args.end)]
+    if args.name is not None:
+        daily = daily[daily["名前"] == args.name]
+    daily = daily.assign(期間=PERIODS[args.period](daily["日付"]))
+    report = daily.groupby(["期間", "名前"], as_index=False).agg(
+        日数=("日付", "size"), セット数=("セット数", "sum"), 回数=("回数", "sum"), 総負荷量=("総負荷量", "sum"),
+    )
+    report["期間"] = report["期間"].dt.strftime("%Y-%m-%d")
+    if args.out:
+        if args.out.lower().endswith(".xlsx"):
+            report.to_excel(args.out, index=False)
+        else:
+            report.to_csv(args.out, index=False, encoding="utf-8-sig")
+        print(f"{len(report)}行の集計を {args.out} に書き出しました")
+    else:
+        report.to_csv(sys.stdout, index=False)
+
+
+def cmd_serve(args):
+    server = ingest.make_server(args.host, args.port, args.log, token=args.token, flush_interval=args.flush_interval, verbose=args.verbose)
+    print(f"http://{args.host}:{args.port}/records で記録を受け付けます（Ctrl+C で終了）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        # 受け付けた記録はジャーナルに書き込み済み。Excel本体への反映を済ませてから終了する
+        storage.compact_journal(args.log)
+
+
+def main(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--log", default=storage.LOG_FILE, help="ログのファイル（SQLiteの場合も .xlsx の名前で指定）")
+    common.add_argument("--backend", choices=["xlsx", "sqlite"], default=storage.BACKEND,
+                        help="ログの保存形式（省略時は環境変数 TRAINING_LOG_BACKEND、なければ xlsx）")
+    common.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="並列に実行するプロセス数")
+
+    parser = argparse.ArgumentParser(description="トレーニングログの取り込み・書き出し・集計（Streamlitを使わずに実行）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", parents=[common], help="xlsx / CSV のログを追加（内容が同じ行は追加しない）")
+    p_import.add_argument("files", nargs="+")
+    p_import.set_defaults(func=cmd_import)
+
+    p_export = sub.add_parser("export", parents=[common], help="ログを CSV / xlsx に書き出し（拡張子で形式を選ぶ）")
+    p_export.add_argument("output")
+    p_export.set_defaults(func=cmd_export)
+
+    p_compact = sub.add_parser("compact", parents=[common], help="ジャーナルの行をExcel本体に反映")
+    p_compact.set_defaults(func=cmd_compact)
+
+    p_to_sqlite = sub.add_parser("to-sqlite", parents=[common], help="Excelのログ（未反映のジャーナルを含む）をSQLiteに取り込む（既存の行は置き換え）")
+    p_to_sqlite.add_argument("--append", action="store_true", help="既存の行を残して追加する")
+    p_to_sqlite.set_defaults(func=cmd_to_sqlite)
+
+    p_rebuild = sub.add_parser("rebuild", parents=[common], help="パーティションと集計テーブルを作り直す")
+    p_rebuild.set_defaults(func=cmd_rebuild)
+
+    p_validate = sub.add_parser("validate", parents=[common], help="不正な行・重複した行を数える（あれば終了コード1）")
+    p_validate.set_defaults(func=cmd_validate)
+
+    p_aggregate = sub.add_parser("aggregate", parents=[common], help="選手ごとの期間別の総負荷量")
+    p_aggregate.add_argument("--period", choices=list(PERIODS), default="week")
+    p_aggregate.add_argument("--out", help="CSV / xlsx の出力先（省略時は標準出力にCSV）")
+    p_aggregate.set_defaults(func=cmd_aggregate)
+
+    p_serve = sub.add_parser("serve", parents=[common], help="計測機器などからの記録を JSON で受け付ける HTTP サーバー")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8765)
+    p_serve.add_argument("--token", default=os.environ.get("TRAINING_LOG_INGEST_TOKEN"),
+                         help="指定した場合は Authorization: Bearer <token> のリクエストだけを受け付ける")
+    p_serve.add_argument("--flush-interval", type=float, default=ingest.FLUSH_INTERVAL, help="記録をまとめて書き込む間隔（秒）")
+    p_serve.add_argument("--verbose", action="store_true", help="リクエストごとにログを出す")
+    p_serve.set_defaults(func=cmd_serve)
+
+    for p in (p_export, p_aggregate):
+        p.add_argument("--name")
+        p.add_argument("--start", type=date.fromisoformat, help="YYYY-MM-DD")
+        p.add_argument("--end", type=date.fromisoformat, help="YYYY-MM-DD")
+    p_export.add_argument("--program")
+
+    args = parser.parse_args(argv)
+    storage.BACKEND = args.backend
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import os
+import threading
+
+# プロセス全体（全セッション共通）のファイル読み込みキャッシュ
+# キー: 任意の名前、値: (ファイルの署名, 読み込み結果)
+_entries = {}
+_entries_lock = threading.Lock()
+_key_locks = {}
+
+
+# ファイルパス + 更新時刻 + サイズ の組を署名とする
+def file_signature(*paths):
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+def _key_lock(key):
+    with _entries_lock:
+        lock = _key_locks.get(key)
+        if lock is None:
+            lock = _key_locks[key] = threading.Lock()
+        return lock
+
+
+# ファイルが変わっていなければ前回の結果を返し、変わっていれば loader で読み直す
+# 返り値は全セッションで共有されるため、呼び出し側で変更しないこと
+def cached(key, paths, loader):
+    signature = file_signature(*paths)
+    with _entries_lock:
+        entry = _entries.get(key)
+    if entry is not None and entry[0] == signature:
+        return entry[1]
+
+    # 同時に来た読み込み要求は1回の読み込みにまとめる
+    with _key_lock(key):
+        with _entries_lock:
+            entry = _entries.get(key)
+        signature = file_signature(*paths)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+        value = loader()
+        with _entries_lock:
+            _entries[key] = (signature, value)
+        return value
+
+
+# 指定ファイルを含むキャッシュを破棄（保存・アップロード・削除の後に呼ぶ）
+def invalidate(path=None):
+    with _entries_lock:
+        if path is None:
+            _entries.clear()
+            return
+        for key in [k for k, (signature, _) in _entries.items() if any(p == path for p, _, _ in signature)]:
+            del _entries[key]
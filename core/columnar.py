@@ -0,0 +1,227 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from core.loads import parse_loads
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrowがなければパーティションは作らず、毎回Excelから型変換する
+    pa = None
+    pq = None
+
+LOG_COLUMNS = ["日付", "プログラム名", "名前", "エクササイズ名", "set", "負荷", "回数", "総負荷量", "体重"]
+CATEGORY_COLUMNS = ["プログラム名", "名前", "エクササイズ名"]
+
+def has_parquet():
+    return pq is not None
+
+
+def _category(values):
+    return values.where(values.isna(), values.astype(str)).astype("category")
+
+
+# 画面表示・集計用に型を揃えたログ（日付はdatetime64、名前などはカテゴリ型）
+def to_typed(df):
+    df = df.reindex(columns=LOG_COLUMNS)
+    typed = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    typed["日付"] = pd.to_datetime(df["日付"].to_numpy(), errors="coerce")
+    for column in ["プログラム名", "名前", "エクササイズ名"]:
+        typed[column] = _category(df[column].reset_index(drop=True))
+    typed["set"] = pd.to_numeric(df["set"].to_numpy(), errors="coerce")
+    raw_load = df["負荷"].reset_index(drop=True)
+    typed["負荷"] = raw_load.where(raw_load.isna(), raw_load.astype(str)).astype("string")
+    typed["回数"] = pd.to_numeric(df["回数"].to_numpy(), errors="coerce")
+    typed["総負荷量"] = pd.to_numeric(df["総負荷量"].to_numpy(), errors="coerce").astype("float64")
+    typed["体重"] = pd.to_numeric(df["体重"].to_numpy(), errors="coerce").astype("float64")
+    typed["負荷値"], unit = parse_loads(typed["負荷"])
+    # 単位のカテゴリは結合後（concat_typed）と同じ文字列の型にする
+    typed["単位"] = _str_categories(unit)
+    return typed
+
+
+# カテゴリの型を文字列に揃える（Parquetから読んだ列と新しく変換した列でカテゴリの型が違う場合がある）
+def _str_categories(values):
+    values = values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype("category")
+    return pd.Categorical.from_codes(values.cat.codes, values.cat.categories.astype(str))
+
+
+# 型付きのログを結合（カテゴリ型はカテゴリの和集合で揃える。文字列の比較はカテゴリの数だけで済む）
+def concat_typed(frames):
+    frames = [f for f in frames if len(f) > 0]
+    if not frames:
+        return to_typed(pd.DataFrame(columns=LOG_COLUMNS))
+    if len(frames) == 1:
+        return frames[0]
+    category_columns = CATEGORY_COLUMNS + ["単位"]
+    columns = list(frames[0].columns)
+    # カテゴリ型の列は pd.concat に渡すと文字列に戻されるので、別に結合する
+    combined = pd.concat([f[[c for c in columns if c not in category_columns]] for f in frames], ignore_index=True)
+    for column in category_columns:
+        combined[column] = pd.Categorical(union_categoricals([_str_categories(f[column]) for f in frames], sort_categories=True))
+    return combined[columns]
+
+
+# 日付のない行の日（日付順の索引で最後に来るように大きな値にする）
+_UNDATED_DAY = 2 ** 31
+
+
+# 日付（日単位）と名前のコードを1つの整数にしたキー（キーの順 = 日付順、同じ日は名前順）
+def _date_name_key(typed):
+    days = typed["日付"].to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+    days = np.where(np.isnat(days), _UNDATED_DAY, days.astype("int64"))
+    names = typed["名前"]
+    width = len(names.cat.categories) + 1
+    return days * width + names.cat.codes.to_numpy().astype("int64") + 1, width
+
+
+# 日付・名前順の索引（並べた行の位置と、その順のキー）。日付の範囲は二分探索で連続した区間になる
+def date_index(typed):
+    key, width = _date_name_key(typed)
+    order = np.argsort(key, kind="stable")
+    return {"order": order, "key": key[order], "width": width, "rows": len(typed)}
+
+
+# 末尾に行が追加された型付きログの索引（既存の行の順はそのまま、新しい行だけを並べて差し込む）
+def extend_date_index(index, typed):
+    key, width = _date_name_key(typed)
+    # 名前のカテゴリが増えるとコードが変わるので、既存の行のキーは新しいコードで求め直す（順は変わらない）
+    old_key = key[index["order"]]
+    added = index["rows"] + np.argsort(key[index["rows"]:], kind="stable")
+    at = np.searchsorted(old_key, key[added], side="right")
+    order = np.insert(index["order"], at, added)
+    return {"order": order, "key": key[order], "width": width, "rows": len(typed)}
+
+
+# 期間 [start, end]（日単位、None は制限なし）の行の位置（日付・名前順）
+def date_range_positions(index, start=None, end=None):
+    lo = 0
+    hi = len(index["key"])
+    if start is not None:
+        day = int(np.datetime64(pd.Timestamp(start).normalize().to_datetime64(), "D").astype("int64"))
+        lo = int(np.searchsorted(index["key"], day * index["width"], side="left"))
+    if end is not None:
+        day = int(np.datetime64(pd.Timestamp(end).normalize().to_datetime64(), "D").astype("int64"))
+        hi = int(np.searchsorted(index["key"], (day + 1) * index["width"], side="left"))
+    elif start is not None:
+        # 日付のない行（キーが最後）は期間の指定があれば含めない
+        hi = int(np.searchsorted(index["key"], _UNDATED_DAY * index["width"], side="left"))
+    return index["order"][lo:max(lo, hi)]
+
+
+# 行の位置をカテゴリ型の列の値で絞り込む（その値がなければ空）
+def filter_positions(typed, positions, column, value):
+    values = typed[column]
+    code = values.cat.categories.get_indexer([value])[0]
+    if code < 0:
+        return positions[:0]
+    return positions[values.cat.codes.to_numpy()[positions] == code]
+
+
+# 月ごとのパーティションのファイル名（日付のない行は UNDATED にまとめる）
+PARTITION_FORMAT = "%Y-%m"
+UNDATED = "undated"
+MANIFEST_FILE = "manifest.json"
+
+
+# 型付きのログを月ごとに分ける（月の昇順、日付のない行は最後）。各月の中は元の行の順
+def split_partitions(typed):
+    if len(typed) == 0:
+        return []
+    months = typed["日付"].dt.strftime(PARTITION_FORMAT).fillna(UNDATED)
+    return [(month, frame.reset_index(drop=True)) for month, frame in typed.groupby(months.to_numpy(), sort=True)]
+
+
+# 1か月分のパーティションを書く（マニフェストは commit_partitions で書く）
+def write_partition(frame, directory, month):
+    file_name = f"{month}.parquet"
+    path = os.path.join(directory, file_name)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), tmp_path)
+    os.replace(tmp_path, path)
+    dates = frame["日付"].dropna()
+    return {
+        "file": file_name,
+        "start": dates.min().strftime("%Y-%m-%d") if len(dates) else None,
+        "end": dates.max().strftime("%Y-%m-%d") if len(dates) else None,
+        "rows": len(frame),
+    }
+
+
+# マニフェスト（元のExcelファイルの署名と、パーティションごとの期間・行数）は最後に書く
+def _write_manifest(directory, source_signature, partitions):
+    path = os.path.join(directory, MANIFEST_FILE)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"source": list(source_signature), "partitions": partitions}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+# 元ファイルと同じ版のマニフェスト（古い・ない・壊れている場合は None）
+def read_manifest(directory, source_signature):
+    if pq is None:
+        return None
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("source") != list(source_signature):
+        return None
+    if not all(os.path.exists(os.path.join(directory, entry["file"])) for entry in manifest["partitions"].values()):
+        return None
+    return manifest
+
+
+def read_partition(directory, entry):
+    return pq.read_table(os.path.join(directory, entry["file"])).to_pandas()
+
+
+# 期間 [start, end]（日付、None は制限なし）に重なるパーティション（月の昇順）
+# 期間を指定した場合、日付のない行のパーティションは含めない
+def partitions_between(manifest, start=None, end=None):
+    selected = []
+    for month in sorted(manifest["partitions"]):
+        entry = manifest["partitions"][month]
+        if entry["start"] is None:
+            if start is None and end is None:
+                selected.append((month, entry))
+            continue
+        if start is not None and pd.Timestamp(entry["end"]) < pd.Timestamp(start).normalize():
+            continue
+        if end is not None and pd.Timestamp(entry["start"]) > pd.Timestamp(end):
+            continue
+        selected.append((month, entry))
+    return selected
+
+
+# 全体を月ごとのパーティションに書き直す（使われなくなった月のファイルは消す）
+def write_partitions(parts, directory, source_signature):
+    if pq is None:
+        return False
+    os.makedirs(directory, exist_ok=True)
+    commit_partitions(directory, source_signature, {month: write_partition(frame, directory, month) for month, frame in parts})
+    return True
+
+
+# 書き終えたパーティションのマニフェストを書き、使われなくなった月のファイルを消す
+def commit_partitions(directory, source_signature, partitions):
+    _write_manifest(directory, source_signature, partitions)
+    for name in os.listdir(directory):
+        if name.endswith(".parquet") and name not in {entry["file"] for entry in partitions.values()}:
+            os.remove(os.path.join(directory, name))
+
+
+# 追加された行のある月のパーティションだけを書き直す（他の月のファイルはそのまま）
+def append_partitions(new_typed, directory, manifest, source_signature):
+    partitions = dict(manifest["partitions"])
+    for month, frame in split_partitions(new_typed):
+        if month in partitions:
+            frame = concat_typed([read_partition(directory, partitions[month]), frame])
+        partitions[month] = write_partition(frame, directory, month)
+    _write_manifest(directory, source_signature, partitions)
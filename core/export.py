@@ -0,0 +1,82 @@
+import tempfile
+
+import pandas as pd
+
+from core.storage import LOG_COLUMNS
+
+# 1回に書き出す行数（メモリ使用量はこの行数分で一定）
+CHUNK_ROWS = 50_000
+
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+# 書き出す列（型付きログの派生列は除く）
+def export_columns(df):
+    return [c for c in LOG_COLUMNS if c in df.columns]
+
+
+def _chunks(df, chunk_rows):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+# CSV（Excelで文字化けしないようBOM付きUTF-8）をチャンクごとのバイト列で返す
+def iter_csv_chunks(df, chunk_rows=CHUNK_ROWS):
+    columns = export_columns(df)
+    yield "\ufeff".encode("utf-8")
+    yield df.iloc[0:0][columns].to_csv(index=False).encode("utf-8")
+    for chunk in _chunks(df, chunk_rows):
+        yield chunk[columns].to_csv(index=False, header=False, date_format="%Y-%m-%d").encode("utf-8")
+
+
+def _cell(value):
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, float) and value != value:
+        return None
+    if value is pd.NA:
+        return None
+    return value
+
+
+def write_csv(df, f, progress=None, chunk_rows=CHUNK_ROWS):
+    total = max(len(df), 1)
+    for i, data in enumerate(iter_csv_chunks(df, chunk_rows)):
+        f.write(data)
+        # 先頭の2つはBOMとヘッダー
+        if progress is not None and i >= 2:
+            progress(min((i - 1) * chunk_rows / total, 1.0))
+
+
+# xlsx は書き込み専用ブックで行ごとに書き出す（シート全体をメモリに持たない）
+def write_xlsx(df, f, progress=None, chunk_rows=CHUNK_ROWS):
+    # openpyxl はExcel出力の時だけ読み込む
+    from openpyxl import Workbook
+
+    columns = export_columns(df)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("training_log")
+    sheet.append(columns)
+    total = max(len(df), 1)
+    written = 0
+    for chunk in _chunks(df, chunk_rows):
+        for row in chunk[columns].itertuples(index=False, name=None):
+            sheet.append([_cell(value) for value in row])
+        written += len(chunk)
+        if progress is not None:
+            progress(min(written / total, 1.0))
+    workbook.save(f)
+
+
+# 一時ファイルに書き出して先頭に戻したファイルオブジェクトを返す（閉じると削除される）
+def export_to_tempfile(df, export_format="CSV", progress=None):
+    f = tempfile.TemporaryFile()
+    if export_format == "Excel":
+        write_xlsx(df, f, progress)
+    else:
+        write_csv(df, f, progress)
+    f.seek(0)
+    return f
@@ -0,0 +1,149 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from core import loads, storage, xlsx_reader
+
+# 取り込みに必要な列
+REQUIRED_COLUMNS = ["日付", "名前", "エクササイズ名"]
+
+
+def is_csv(file_name):
+    return str(file_name).lower().endswith(".csv")
+
+
+# data はファイルの中身（bytes）かファイルのパス
+def _csv_source(data):
+    return io.BytesIO(data) if isinstance(data, (bytes, bytearray, memoryview)) else data
+
+
+# アップロードされたファイルの列名（先頭行）
+def header(data, file_name):
+    if is_csv(file_name):
+        return [str(c) for c in pd.read_csv(_csv_source(data), encoding="utf-8-sig", nrows=0).columns]
+    return xlsx_reader.header(data)
+
+
+# アップロードされたファイルを一定の行数ずつ読む（ファイル全体を DataFrame にはしない）
+def iter_upload_batches(data, file_name, batch_rows=xlsx_reader.BATCH_ROWS):
+    if is_csv(file_name):
+        for chunk in pd.read_csv(_csv_source(data), encoding="utf-8-sig", chunksize=batch_rows, dtype=object):
+            yield chunk.reindex(columns=storage.LOG_COLUMNS)
+    else:
+        yield from xlsx_reader.iter_batches(data, columns=storage.LOG_COLUMNS, batch_rows=batch_rows, typed=False)
+
+
+def _text(values):
+    return values.astype("string").str.strip().fillna("")
+
+
+# 重複の判定に使う行の内容（storage.row_keys）のハッシュ
+def content_hashes(df):
+    return pd.util.hash_pandas_object(storage.row_keys(df), index=False).to_numpy()
+
+
+def _problems(df, dates, numbers):
+    problems = {
+        "日付なし": dates.isna(),
+        "名前なし": _text(df["名前"]) == "",
+        "エクササイズ名なし": _text(df["エクササイズ名"]) == "",
+    }
+    for column in ["set", "回数"]:
+        problems[f"{column}が数値でない"] = numbers[column].isna() & df[column].notna()
+    return {reason: mask.to_numpy() for reason, mask in problems.items()}
+
+
+# 日付の列を読む（書式は先頭の値から推定されるので、読めなかった値だけ1つずつ書式を推定して読み直す）
+def _dates(values):
+    dates = pd.to_datetime(values, errors="coerce")
+    retry = dates.isna() & values.notna()
+    if retry.any():
+        dates[retry] = pd.to_datetime(values[retry], errors="coerce", format="mixed")
+    return dates
+
+
+def _parse(df):
+    df = df.reindex(columns=storage.LOG_COLUMNS).reset_index(drop=True)
+    dates = _dates(df["日付"])
+    numbers = {column: pd.to_numeric(df[column], errors="coerce") for column in ["set", "回数", "総負荷量", "体重"]}
+    return df, dates, numbers
+
+
+# 取り込めない行の理由ごとの判定（理由 → 該当する行が True の配列）
+def row_problems(df):
+    return _problems(*_parse(df))
+
+
+# 取り込めない行（日付・名前・エクササイズ名がない、set・回数が数値でない）を除き、値の形を揃える
+def normalize_batch(df):
+    df, dates, numbers = _parse(df)
+    valid = ~np.logical_or.reduce(list(_problems(df, dates, numbers).values()))
+
+    normalized = pd.DataFrame({
+        "日付": dates.dt.normalize(),
+        "プログラム名": df["プログラム名"].where(df["プログラム名"].isna(), _text(df["プログラム名"])),
+        "名前": _text(df["名前"]),
+        "エクササイズ名": _text(df["エクササイズ名"]),
+        "set": numbers["set"],
+        "負荷": df["負荷"].where(df["負荷"].isna(), _text(df["負荷"])),
+        "回数": numbers["回数"],
+        "総負荷量": numbers["総負荷量"],
+        "体重": numbers["体重"],
+    })[valid].reset_index(drop=True)
+    # 総負荷量が空の行はアプリの保存と同じ方法で計算する
+    missing = normalized["総負荷量"].isna().to_numpy()
+    if missing.any():
+        part = normalized[missing]
+        normalized.loc[missing, "総負荷量"] = loads.compute_volumes(
+            part["負荷"], part["回数"], body_weight=part["体重"],
+            players=part["名前"], exercises=part["エクササイズ名"], one_rm_table=loads.read_one_rm_table(),
+        )
+    return normalized, int((~valid).sum())
+
+
+def _records(df):
+    df = df.astype(object).where(df.notna(), None)
+    df["日付"] = [None if value is None else value.date() for value in df["日付"]]
+    # セット番号・回数は画面からの保存と同じく整数で保存する
+    for column in ["set", "回数"]:
+        df[column] = [int(value) if value is not None and float(value).is_integer() else value for value in df[column]]
+    return df.to_dict("records")
+
+
+# アップロードされたファイルをバッチごとに整える（既存のログは読まないので、別のプロセスでも実行できる）
+# 返り値: バッチごとの (読んだ行数, 整えた行, 不正な行数, 内容のハッシュ)
+def prepare_batches(data, file_name):
+    for batch in iter_upload_batches(data, file_name):
+        normalized, rejected = normalize_batch(batch)
+        yield len(batch), normalized, rejected, content_hashes(normalized)
+
+
+# アップロードされたログを既存のログに追加する（内容が同じ行は既存・ファイル内とも1行だけ）
+# progress: 1バッチごとに途中の件数（dict）を受け取る関数
+# 返り値: {"rows": 読んだ行数, "inserted": 追加, "duplicates": 重複, "rejected": 不正な行}
+def import_log(data, file_name, log_file=storage.LOG_FILE, progress=None):
+    return merge_batches(prepare_batches(data, file_name), log_file, progress)
+
+
+# prepare_batches で整えたバッチを順に既存のログに追加する（複数のファイルのバッチを続けて渡してもよい）
+def merge_batches(prepared, log_file=storage.LOG_FILE, progress=None):
+    counts = {"rows": 0, "inserted": 0, "duplicates": 0, "rejected": 0}
+    # 既存のログはハッシュ値だけを持つ（型付きのログはアプリのキャッシュを使う）
+    seen = set()
+    if storage.log_exists(log_file):
+        seen.update(content_hashes(storage.read_typed_log(log_file)).tolist())
+
+    for rows, normalized, rejected, hashes in prepared:
+        counts["rows"] += rows
+        counts["rejected"] += rejected
+        new = np.fromiter((h not in seen for h in hashes.tolist()), dtype=bool, count=len(hashes))
+        # ファイル内の重複も1行だけにする
+        new &= ~pd.Series(hashes).duplicated().to_numpy()
+        counts["duplicates"] += int(len(hashes) - new.sum())
+        if new.any():
+            counts["inserted"] += storage.append_rows(_records(normalized[new]), log_file)
+            seen.update(hashes[new].tolist())
+        if progress is not None:
+            progress(dict(counts))
+    return counts
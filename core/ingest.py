@@ -0,0 +1,206 @@
+import hmac
+import json
+import queue
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from core import storage
+from core.loads import log_rows
+from core.writer import LogWriter
+
+# 取り込んだ記録をまとめて書き込む間隔（秒）。この間に届いた記録は1回の追記になる
+FLUSH_INTERVAL = 1.0
+# 1リクエストの上限
+MAX_BODY_BYTES = 5 * 1024 * 1024
+MAX_RECORDS = 1000
+# 書き込み完了を待つ時間（秒）
+SAVE_TIMEOUT = 30
+
+
+def _text(value):
+    if value is None:
+        return None
+    if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+        raise ValueError("文字列ではありません")
+    return str(value).strip() or None
+
+
+def _required_text(value):
+    text = _text(value)
+    if text is None:
+        raise ValueError("ありません")
+    return text
+
+
+def _number(value, integer=False):
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError("数値ではありません")
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError("数値ではありません") from None
+    if number != number or number < 0:
+        raise ValueError("0以上の数値ではありません")
+    if integer:
+        if not number.is_integer():
+            raise ValueError("整数ではありません")
+        return int(number)
+    return int(number) if number.is_integer() else number
+
+
+# 負荷（文字列はそのまま、数値は入力ページの数値入力と同じく kg）
+def _load(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"{float(_number(value))}kg"
+    load = _text(value)
+    if load is None:
+        raise ValueError("負荷がありません")
+    return load
+
+
+def _date(value, today):
+    if value is None:
+        return today
+    if not isinstance(value, str):
+        raise ValueError("日付は YYYY-MM-DD の文字列で指定してください")
+    try:
+        return datetime.fromisoformat(value.strip()).date()
+    except ValueError:
+        raise ValueError("日付は YYYY-MM-DD の文字列で指定してください") from None
+
+
+# 1件の記録（save_training_log_formatted と同じ項目）を確かめ、ログの行の元にする
+# record: {"player_name", "program_name", "exercise_name", "sets_data": [{"set_number", "load", "reps"}], "date", "body_weight"}
+# 返り値: (entries, errors)。errors が空でなければ entries は使わない
+def normalize_record(record, today):
+    if not isinstance(record, dict):
+        return [], ["記録はオブジェクトで指定してください"]
+    errors = []
+
+    def field(name, parse, *args):
+        try:
+            return parse(record.get(name), *args)
+        except (TypeError, ValueError) as e:
+            errors.append(f"{name}: {e}")
+            return None
+
+    player_name = field("player_name", _required_text)
+    program_name = field("program_name", _text)
+    exercise_name = field("exercise_name", _required_text)
+    record_date = field("date", _date, today)
+    body_weight = None if record.get("body_weight") is None else field("body_weight", _number)
+
+    sets_data = record.get("sets_data")
+    if not isinstance(sets_data, list) or not sets_data:
+        errors.append("sets_data: セットの記録がありません")
+        sets_data = []
+    entries = []
+    for i, set_data in enumerate(sets_data):
+        if not isinstance(set_data, dict):
+            errors.append(f"sets_data[{i}]: オブジェクトで指定してください")
+            continue
+        entry = {'日付': record_date, 'プログラム名': program_name, '名前': player_name, 'エクササイズ名': exercise_name, '体重': body_weight}
+        for key, column, parse in (("set_number", 'set', lambda v: _number(v, integer=True)), ("load", '負荷', _load), ("reps", '回数', _number)):
+            try:
+                entry[column] = parse(set_data.get(key))
+            except (TypeError, ValueError) as e:
+                errors.append(f"sets_data[{i}].{key}: {e}")
+        entries.append(entry)
+    return entries, errors
+
+
+# 記録の一覧を確かめて書き込み、記録ごとの結果を返す
+# 正しい記録は1回の追記にまとめ、書き込み完了（fsync後）まで待つ。不正な記録は書き込まずに理由を返す
+# 返り値: (HTTPステータス, 記録ごとの結果のリスト)
+def ingest(records, log_writer, today=None, timeout=SAVE_TIMEOUT):
+    today = today if today is not None else date.today()
+    acks = []
+    valid_entries = []
+    for i, record in enumerate(records):
+        entries, errors = normalize_record(record, today)
+        ack = {"index": i}
+        if isinstance(record, dict) and "id" in record:
+            ack["id"] = record["id"]
+        if errors:
+            ack.update(status="rejected", errors=errors)
+        else:
+            ack.update(status="saved", rows=len(entries))
+            valid_entries.extend(entries)
+        acks.append(ack)
+
+    if not valid_entries:
+        return 200, acks
+    try:
+        log_writer.submit(log_rows(valid_entries), timeout=timeout).result(timeout=timeout)
+    except queue.Full:
+        status, error = 503, "書き込み待ちが多すぎます。時間をおいて再送してください"
+    except Exception as e:
+        status, error = 500, f"保存エラー: {e}"
+    else:
+        return 200, acks
+    for ack in acks:
+        if ack["status"] == "saved":
+            ack.update(status="error", rows=0, errors=[error])
+    return status, acks
+
+
+class IngestHandler(BaseHTTPRequestHandler):
+    server_version = "TrainingLogIngest/1.0"
+
+    def _send(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self):
+        token = self.server.token
+        if token is None:
+            return True
+        return hmac.compare_digest(self.headers.get("Authorization", ""), f"Bearer {token}")
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._send(404, {"error": "not found"})
+        self._send(200, {"status": "ok", "pending": self.server.log_writer.pending()})
+
+    # POST /records  {"records": [...]} または記録のリスト
+    def do_POST(self):
+        if self.path != "/records":
+            return self._send(404, {"error": "not found"})
+        if not self._authorized():
+            return self._send(401, {"error": "unauthorized"})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            return self._send(413, {"error": f"リクエストが大きすぎます（{MAX_BODY_BYTES}バイトまで）"})
+        try:
+            body = json.loads(self.rfile.read(length).decode("utf-8"))
+        except (UnicodeDecodeError, ValueError) as e:
+            return self._send(400, {"error": f"JSONを読めません: {e}"})
+        records = body.get("records") if isinstance(body, dict) else body
+        if not isinstance(records, list):
+            return self._send(400, {"error": "records は記録のリストで指定してください"})
+        if len(records) > MAX_RECORDS:
+            return self._send(413, {"error": f"1回に送れる記録は{MAX_RECORDS}件までです"})
+        status, acks = ingest(records, self.server.log_writer)
+        self._send(status, {
+            "saved": sum(ack["status"] == "saved" for ack in acks),
+            "rejected": sum(ack["status"] == "rejected" for ack in acks),
+            "results": acks,
+        })
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+# 取り込み用のHTTPサーバー（記録は flush_interval 秒ごとにまとめてログに追記する）
+def make_server(host="127.0.0.1", port=8765, log_file=storage.LOG_FILE, token=None, flush_interval=FLUSH_INTERVAL, verbose=False):
+    server = ThreadingHTTPServer((host, port), IngestHandler)
+    server.daemon_threads = True
+    server.log_writer = LogWriter(log_file, linger=flush_interval)
+    server.token = token
+    server.verbose = verbose
+    return server
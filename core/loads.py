@@ -0,0 +1,161 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from core import cache
+
+# 選手ごとの1RM表（列: 名前, エクササイズ名, 1RM）。%表記の負荷をkgに換算するのに使う
+ONE_RM_FILE = "one_rm.csv"
+
+BODYWEIGHT_WORDS = ["体重", "自重", "BW", "bw"]
+
+_LOAD_PATTERN = r"^([0-9]+(?:\.[0-9]+)?)\s*(kg|KG|Kg|%)?$"
+
+
+# 負荷の文字列を数値と単位に分ける（"60.0kg" → 60.0, "kg"、"80.0%" → 80.0, "%"、"体重" → NaN, "体重"）
+# 単位なしの数値は ""、解釈できないものは "その他"
+def parse_loads(loads):
+    loads = pd.Series(loads).reset_index(drop=True)
+    # 負荷の種類は少ないので、重複を除いた値だけを解析して全行に展開する
+    codes, uniques = pd.factorize(loads.astype("string").str.strip())
+    text = pd.Series(uniques, dtype="string")
+    parts = text.str.extract(_LOAD_PATTERN)
+    value = pd.to_numeric(parts[0], errors="coerce").astype("float64")
+    unit = parts[1].str.lower().fillna("")
+    is_bodyweight = text.isin(BODYWEIGHT_WORDS)
+    unit = unit.mask(is_bodyweight, "体重")
+    unit = unit.mask(value.isna() & ~is_bodyweight, "その他")
+
+    missing = codes < 0
+    safe_codes = np.where(missing, 0, codes)
+    if len(uniques) == 0:
+        return pd.Series(np.nan, index=loads.index), pd.Series(pd.NA, index=loads.index, dtype="category")
+    row_value = pd.Series(np.where(missing, np.nan, value.to_numpy()[safe_codes]), index=loads.index)
+    row_unit = pd.Categorical.from_codes(
+        np.where(missing, -1, pd.Categorical(unit).codes[safe_codes]),
+        categories=pd.Categorical(unit).categories,
+    )
+    return row_value, pd.Series(row_unit, index=loads.index)
+
+
+def _as_array(values, length):
+    if values is None:
+        return np.full(length, np.nan)
+    if np.isscalar(values):
+        return np.full(length, values, dtype="float64")
+    return pd.to_numeric(pd.Series(values).reset_index(drop=True), errors="coerce").to_numpy(dtype="float64")
+
+
+# 1RM表を読み込み（ファイルが変わるまでキャッシュ）
+def read_one_rm_table(path=ONE_RM_FILE):
+    def load():
+        df = pd.read_csv(path, encoding="utf-8-sig")
+        df = df.dropna(subset=["名前", "エクササイズ名", "1RM"])
+        df = df.drop_duplicates(["名前", "エクササイズ名"], keep="last")
+        return df.set_index(["名前", "エクササイズ名"])["1RM"].astype("float64")
+
+    if not os.path.exists(path):
+        return None
+    return cache.cached(("one_rm", path), [path], load)
+
+
+# (選手, エクササイズ) ごとの1RMを行に対応させる
+def lookup_one_rm(players, exercises, one_rm_table):
+    length = len(players)
+    if one_rm_table is None or len(one_rm_table) == 0:
+        return np.full(length, np.nan)
+    keys = pd.MultiIndex.from_arrays([
+        pd.Series(players).reset_index(drop=True).astype(str),
+        pd.Series(exercises).reset_index(drop=True).astype(str),
+    ])
+    table = one_rm_table.copy()
+    table.index = pd.MultiIndex.from_arrays([
+        table.index.get_level_values(0).astype(str),
+        table.index.get_level_values(1).astype(str),
+    ])
+    return table.reindex(keys).to_numpy(dtype="float64")
+
+
+# 負荷の列をまとめて正規化する
+# 返り値の列: 負荷kg（kg換算、不明はNaN）、単位、自重（体重負荷か）、1RM比（%表記の場合の割合）
+def normalize_loads(loads, body_weight=None, players=None, exercises=None, one_rm_table=None):
+    value, unit = parse_loads(loads)
+    length = len(value)
+    unit_values = unit.astype("string").fillna("-").to_numpy(dtype=object)
+
+    is_kg = (unit_values == "kg") | (unit_values == "")
+    is_pct = unit_values == "%"
+    is_bodyweight = unit_values == "体重"
+
+    pct_of_1rm = np.where(is_pct, value.to_numpy() / 100.0, np.nan)
+    if players is not None and exercises is not None and is_pct.any():
+        one_rm = lookup_one_rm(players, exercises, one_rm_table)
+    else:
+        one_rm = np.full(length, np.nan)
+
+    numeric_kg = np.full(length, np.nan)
+    numeric_kg = np.where(is_kg, value.to_numpy(), numeric_kg)
+    numeric_kg = np.where(is_pct, pct_of_1rm * one_rm, numeric_kg)
+    numeric_kg = np.where(is_bodyweight, _as_array(body_weight, length), numeric_kg)
+
+    return pd.DataFrame({
+        "負荷kg": numeric_kg,
+        "単位": unit,
+        "自重": is_bodyweight,
+        "1RM比": pct_of_1rm,
+    })
+
+
+# 総負荷量（kg換算の負荷 × 回数、換算できない負荷は0）
+def compute_volumes(loads, reps, body_weight=None, players=None, exercises=None, one_rm_table=None):
+    normalized = normalize_loads(loads, body_weight, players, exercises, one_rm_table)
+    reps = _as_array(reps, len(normalized))
+    volumes = normalized["負荷kg"].to_numpy() * reps
+    return np.nan_to_num(volumes, nan=0.0)
+
+
+# 入力された記録をログの行にする（entries: 日付・プログラム名・名前・エクササイズ名・set・負荷・回数・体重 の辞書）
+# 負荷はまとめてkg換算して総負荷量を計算（体重は入力された体重、%は1RM表から換算）
+def log_rows(entries):
+    total_loads = compute_volumes(
+        [entry['負荷'] for entry in entries],
+        [entry['回数'] for entry in entries],
+        body_weight=[entry.get('体重') for entry in entries],
+        players=[entry['名前'] for entry in entries],
+        exercises=[entry['エクササイズ名'] for entry in entries],
+        one_rm_table=read_one_rm_table(),
+    )
+    return [{
+        '日付': entry['日付'],
+        'プログラム名': entry['プログラム名'],
+        '名前': entry['名前'],
+        'エクササイズ名': entry['エクササイズ名'],
+        'set': entry['set'],
+        '負荷': entry['負荷'],
+        '回数': entry['回数'],
+        '総負荷量': float(total_load),
+        '体重': entry.get('体重'),
+    } for entry, total_load in zip(entries, total_loads)]
+
+
+# 既存のログ全体の総負荷量を再計算する（体重はその行、なければ同じ選手の直近の記録を使う）
+def recompute_log_volumes(df, one_rm_table=None):
+    df = df.reset_index(drop=True)
+    body_weight = None
+    if "体重" in df.columns:
+        body_weight = pd.to_numeric(df["体重"], errors="coerce")
+        if "名前" in df.columns:
+            order = np.argsort(pd.to_datetime(df["日付"], errors="coerce").to_numpy(), kind="stable")
+            ordered = body_weight.iloc[order].groupby(df["名前"].iloc[order].to_numpy()).ffill()
+            body_weight = ordered.reindex(body_weight.index).combine_first(
+                body_weight.groupby(df["名前"].to_numpy()).transform("last")
+            )
+    return compute_volumes(
+        df["負荷"],
+        df["回数"],
+        body_weight=body_weight,
+        players=df["名前"] if "名前" in df.columns else None,
+        exercises=df["エクササイズ名"] if "エクササイズ名" in df.columns else None,
+        one_rm_table=one_rm_table,
+    )
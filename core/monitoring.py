@@ -0,0 +1,126 @@
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from core import rollups
+
+# 急性負荷・慢性負荷の日数
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+
+# ACWR の目安（この範囲の外を注意として表示する）
+ACWR_LOW = 0.8
+ACWR_HIGH = 1.5
+
+# 指標の名前（日付 × 選手 の表を1つずつ持つ）
+METRICS = ["load", "acute", "chronic", "acwr", "ewma_acute", "ewma_chronic", "ewma_ratio", "weekly", "monotony", "strain"]
+
+# 集計テーブルごとの計算結果（全セッション共通。呼び出し側で変更しないこと）
+_states = {}
+_lock = threading.Lock()
+
+
+def _empty_state(generation):
+    return {"generation": generation, "seq": 0, "raw": pd.DataFrame(dtype=float), "metrics": None}
+
+
+# 集計テーブルで変わった日だけを取り込み、その日以降の指標を計算し直す
+def update(db_file, today=None):
+    today = pd.Timestamp(today if today is not None else date.today()).normalize()
+    with _lock:
+        state = _states.get(db_file)
+        generation, seq, changes = rollups.load_changes(db_file, state["seq"] if state is not None else None)
+        if state is None or state["generation"] != generation:
+            # 集計テーブルが作り直された場合は全件を読み直す
+            if state is not None:
+                generation, seq, changes = rollups.load_changes(db_file)
+            state = _empty_state(generation)
+
+        raw = state["raw"]
+        old_index = raw.index
+        if len(changes) == 0 and (len(old_index) == 0 or old_index[-1] >= today):
+            state = dict(state, seq=seq)
+            _states[db_file] = state
+            return state
+
+        # 日付（記録のない日も含む連続した日付）× 選手 の表に広げる
+        changed = changes.pivot(index="date", columns="player", values="volume")
+        bounds = [old_index[0], old_index[-1]] if len(old_index) > 0 else []
+        if len(changed) > 0:
+            bounds += [changed.index.min(), changed.index.max()]
+        index = pd.date_range(min(bounds), max(bounds + [today]), freq="D")
+        raw = raw.reindex(index=index, columns=raw.columns.union(changed.columns))
+        if len(changed) > 0:
+            raw.loc[changed.index, changed.columns] = raw.loc[changed.index, changed.columns].where(changed.isna(), changed)
+
+        # 計算し直すのは、変わった最初の日（または新しく増えた日）から後だけ
+        if len(old_index) == 0 or index[0] != old_index[0] or state["metrics"] is None:
+            start = 0
+        else:
+            start = len(old_index)
+            if len(changed) > 0:
+                start = min(start, index.get_loc(changed.index.min()))
+        state = {"generation": generation, "seq": seq, "raw": raw, "metrics": _compute(raw, state["metrics"], start)}
+        _states[db_file] = state
+        return state
+
+
+# 日ごとの負荷（記録のない日は0。ただし各選手の最初の記録日より前は NaN）から指標を求める
+# start 行目より前は前回の結果をそのまま使い、後ろだけを全選手まとめて計算する
+def _compute(raw, previous, start):
+    daily = raw.fillna(0).where(raw.notna().cummax())
+    # 移動平均は start の CHRONIC_DAYS - 1 日前からあれば足りる
+    lo = max(start - (CHRONIC_DAYS - 1), 0)
+    window = daily.iloc[lo:]
+    acute = window.rolling(ACUTE_DAYS).mean()
+    chronic = window.rolling(CHRONIC_DAYS).mean()
+    weekly = window.rolling(ACUTE_DAYS).sum()
+    monotony = acute / window.rolling(ACUTE_DAYS).std()
+    part = {
+        "load": window,
+        "acute": acute,
+        "chronic": chronic,
+        "acwr": acute / chronic,
+        "weekly": weekly,
+        "monotony": monotony,
+        "strain": weekly * monotony,
+    }
+    part = {name: values.iloc[start - lo:] for name, values in part.items()}
+
+    # EWMA（λ = 2 / (日数 + 1)）は前日の値から続けて計算する
+    for name, days in (("ewma_acute", ACUTE_DAYS), ("ewma_chronic", CHRONIC_DAYS)):
+        values = daily.iloc[start:]
+        if start > 0:
+            seed = previous[name].reindex(index=daily.index[start - 1:start], columns=daily.columns)
+            values = pd.concat([seed, values])
+        ewma = values.ewm(alpha=2 / (days + 1), adjust=False).mean()
+        part[name] = ewma.iloc[1:] if start > 0 else ewma
+    part["ewma_ratio"] = part["ewma_acute"] / part["ewma_chronic"]
+
+    metrics = {}
+    for name in METRICS:
+        values = part[name].replace([np.inf, -np.inf], np.nan)
+        if start > 0:
+            values = pd.concat([previous[name].reindex(index=daily.index[:start], columns=daily.columns), values])
+        metrics[name] = values
+    return metrics
+
+
+# 指定日の全選手の指標（行: 選手）
+def snapshot(state, day):
+    day = pd.Timestamp(day).normalize()
+    if state["metrics"] is None or day not in state["raw"].index:
+        return pd.DataFrame(columns=METRICS, dtype=float)
+    result = pd.DataFrame({name: state["metrics"][name].loc[day] for name in METRICS})
+    # 指定日までに記録のない選手は除く
+    return result[result["load"].notna()]
+
+
+# 選手1人の指標の推移（行: 日付）
+def player_history(state, player, start=None, end=None):
+    if state["metrics"] is None or player not in state["raw"].columns:
+        return pd.DataFrame(columns=METRICS, dtype=float)
+    result = pd.DataFrame({name: state["metrics"][name][player] for name in METRICS})
+    return result.loc[start:end].dropna(subset=["load"])
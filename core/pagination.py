@@ -0,0 +1,61 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = [25, 50, 100, 200, 500]
+
+
+def page_count(total_rows, page_size):
+    return max(1, math.ceil(total_rows / page_size))
+
+
+# 並べ替えのキーを数値の配列にする（欠損は最後）。数値化できない列は None
+def _sort_keys(values, ascending):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = values.cat.categories
+        if not categories.is_monotonic_increasing:
+            return None
+        keys = values.cat.codes.to_numpy().astype("float64")
+        keys[keys < 0] = np.nan
+    elif pd.api.types.is_datetime64_any_dtype(values):
+        keys = values.to_numpy().astype("datetime64[ns]").astype("int64").astype("float64")
+        keys[values.isna().to_numpy()] = np.nan
+    elif pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        # to_numpy は元の列の読み取り専用の配列を返す場合があるので、必ず複製する（共有のログを書き換えない）
+        keys = np.array(values.to_numpy(dtype="float64", na_value=np.nan), copy=True)
+    else:
+        return None
+    if not ascending:
+        keys = -keys
+    keys[np.isnan(keys)] = np.inf
+    return keys
+
+
+# 並べ替え後の先頭 stop 行の位置（同じ値は元の順序、上位だけを部分選択するので O(n + k log k)）
+def _top_positions(keys, stop):
+    if stop >= len(keys) // 2:
+        return np.lexsort((np.arange(len(keys)), keys))[:stop]
+    kth = np.partition(keys, stop - 1)[stop - 1]
+    less = np.flatnonzero(keys < kth)
+    equal = np.flatnonzero(keys == kth)[:stop - len(less)]
+    candidates = np.concatenate([less, equal])
+    return candidates[np.lexsort((candidates, keys[candidates]))]
+
+
+# 表示するページの行だけを取り出す（整形・送信はこの範囲だけ）
+def page_slice(df, page, page_size, sort_by=None, ascending=True):
+    total = len(df)
+    page = min(max(1, int(page)), page_count(total, page_size))
+    start = (page - 1) * page_size
+    stop = min(start + page_size, total)
+    if start >= stop:
+        return df.iloc[0:0]
+    if sort_by is None or sort_by not in df.columns:
+        return df.iloc[start:stop]
+
+    keys = _sort_keys(df[sort_by], ascending)
+    if keys is None:
+        ordered = df.sort_values(sort_by, ascending=ascending, kind="mergesort", na_position="last")
+        return ordered.iloc[start:stop]
+    return df.iloc[_top_positions(keys, stop)[start:stop]]
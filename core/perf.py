@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import pandas as pd
+
+from core.locking import file_lock
+
+# 環境変数 TRAINING_LOG_PERF=1 で全セッションの計測を有効にする（サイドバーでセッションごとにも切り替え可能）
+ENV_VAR = "TRAINING_LOG_PERF"
+
+# 計測結果の保存先（1行 = 1回の再実行）。MAX_BYTES を超えたら .1, .2, ... に回す
+PERF_FILE = "perf_log.jsonl"
+MAX_BYTES = 1024 * 1024
+BACKUP_COUNT = 3
+
+# データ管理ページの表示用に、直近の再実行をプロセス内に保持する件数
+RECENT_RUNS = 500
+
+_local = threading.local()
+_recent = deque(maxlen=RECENT_RUNS)
+_recent_lock = threading.Lock()
+_write_lock = threading.Lock()
+
+
+def env_enabled():
+    return os.environ.get(ENV_VAR, "").lower() in ("1", "true", "yes", "on")
+
+
+# 計測しない時の区間（何もしない）
+class _NullStage:
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    def __init__(self, run, name, rows):
+        self.run = run
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.run["stages"].append({
+            "stage": self.name,
+            "ms": (time.perf_counter() - self.start) * 1000,
+            "rows": self.rows,
+            "error": exc_type.__name__ if exc_type is not None else None,
+        })
+        return False
+
+
+# 1回の再実行の計測を始める（無効なら None を返し、以降の stage は何もしない）
+def start_run(page, enabled=None):
+    if enabled is None:
+        enabled = env_enabled()
+    if not enabled:
+        _local.run = None
+        return None
+    run = {
+        "time": datetime.now().isoformat(timespec="milliseconds"),
+        "page": page,
+        "pid": os.getpid(),
+        "stages": [],
+        "finished": False,
+        "_start": time.perf_counter(),
+    }
+    _local.run = run
+    return run
+
+
+# 区間の計測 with perf.stage("読み込み") as s: ...; s.rows = len(df)
+def stage(name, rows=None):
+    run = getattr(_local, "run", None)
+    if run is None:
+        return _NULL_STAGE
+    return _Stage(run, name, rows)
+
+
+# 再実行の計測を終えて保存する（st.stop / st.rerun で途中終了した回は次の再実行の最初に complete=False で保存）
+def finish_run(run, complete=True, path=PERF_FILE):
+    if run is None or run["finished"]:
+        return
+    run["finished"] = True
+    if getattr(_local, "run", None) is run:
+        _local.run = None
+    total_ms = None
+    if complete:
+        # 計測した区間以外の時間（ウィジェット・HTMLの描画など）
+        total_ms = (time.perf_counter() - run["_start"]) * 1000
+        run["stages"].append({
+            "stage": "描画・その他",
+            "ms": max(total_ms - sum(s["ms"] for s in run["stages"]), 0.0),
+            "rows": None,
+            "error": None,
+        })
+    record = {
+        "time": run["time"],
+        "page": run["page"],
+        "pid": run["pid"],
+        "total_ms": total_ms,
+        "complete": complete,
+        "stages": run["stages"],
+    }
+    with _recent_lock:
+        _recent.append(record)
+    try:
+        _append(record, path)
+    except OSError:
+        pass
+
+
+def _rotate(path):
+    for i in range(BACKUP_COUNT - 1, 0, -1):
+        if os.path.exists(f"{path}.{i}"):
+            os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+    os.replace(path, f"{path}.1")
+
+
+def _append(record, path):
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _write_lock, file_lock(path):
+        if os.path.exists(path) and os.path.getsize(path) + len(line) > MAX_BYTES:
+            _rotate(path)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def recent_runs():
+    with _recent_lock:
+        return list(_recent)
+
+
+# ページ × 区間ごとの集計（回数・平均・p95・最大・平均行数）
+def breakdown(runs):
+    stages = [
+        {"ページ": run["page"], "区間": s["stage"], "ms": s["ms"], "rows": s["rows"]}
+        for run in runs for s in run["stages"]
+    ]
+    stages += [
+        {"ページ": run["page"], "区間": "(再実行全体)", "ms": run["total_ms"], "rows": None}
+        for run in runs if run["total_ms"] is not None
+    ]
+    if not stages:
+        return pd.DataFrame(columns=["ページ", "区間", "回数", "平均(ms)", "p95(ms)", "最大(ms)", "平均行数"])
+    df = pd.DataFrame(stages)
+    df["rows"] = pd.to_numeric(df["rows"], errors="coerce")
+    grouped = df.groupby(["ページ", "区間"], sort=False)
+    result = grouped["ms"].agg(["count", "mean", lambda ms: ms.quantile(0.95), "max"])
+    result.columns = ["回数", "平均(ms)", "p95(ms)", "最大(ms)"]
+    result["平均行数"] = grouped["rows"].mean()
+    return result.round(1).reset_index().sort_values(["ページ", "平均(ms)"], ascending=[True, False], ignore_index=True)
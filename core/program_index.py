@@ -0,0 +1,235 @@
+import unicodedata
+from collections import namedtuple
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+from core import cache, storage
+
+# ウォーミングアップ・補助種目の番号
+WARMUP_TYPES = {"WU": "Warm Up", "ST": "Stability", "PL": "Plyometrics"}
+
+# ウォーミングアップ・補助種目（1行ずつ）
+Warmup = namedtuple("Warmup", [
+    "no", "exercise", "type_prefix", "type_name", "point",
+    "summary_ja",   # 入力ページ用 "2セット / 10レップ / 80%"
+    "summary_en",   # 一覧ページ用 "2set | 10rep | 80%"
+])
+
+# メイン種目（同じエクササイズの行をまとめたもの）
+Exercise = namedtuple("Exercise", [
+    "no", "exercise", "point",
+    "sets", "loads", "reps",     # 行ごとの値のタプル
+    "set", "load", "rep",        # "・" でつないだ表示用文字列
+    "load_display",              # %表記に変換した負荷
+    "total_sets",                # 予定セット数の合計
+])
+
+Program = namedtuple("Program", ["name", "warmups", "exercises", "main_table"])
+
+ProgramIndex = namedtuple("ProgramIndex", ["names", "programs", "search"])
+
+# エクササイズ名・ポイントの検索用の索引（1行 = 1文書。n-gram → 文書番号の昇順の配列）
+SearchIndex = namedtuple("SearchIndex", [
+    "programs", "kinds", "rows",   # 文書ごとのプログラム名・"warmup"/"main"・プログラム内の行番号
+    "texts",                       # 文書ごとの正規化した文字列
+    "postings",
+])
+
+# 索引に使う n-gram の長さ（1文字の検索は1文字の索引を使う）
+NGRAM = 2
+
+
+def _is_blank(value):
+    return value is None or (not isinstance(value, str) and pd.isna(value)) or value == '' or value == '-'
+
+
+# 負荷の%表記変換（1.0以下の数値は1RMに対する割合）
+def format_load(load):
+    if str(load).replace('.', '').isdigit() and float(load) <= 1.0:
+        return f"{float(load)*100:.0f}%"
+    return str(load)
+
+
+def _total_sets(sets):
+    total = 0
+    for value in sets:
+        try:
+            total += int(value)
+        except (TypeError, ValueError):
+            continue
+    return max(total, 1)
+
+
+def _build_warmup(row, has_point):
+    no = row.get('No')
+    point = row.get('Point') if has_point else None
+    items_ja = []
+    items_en = []
+    if not _is_blank(row.get('set')):
+        items_ja.append(f"{row['set']}セット")
+        items_en.append(f"{row['set']}set")
+    if not _is_blank(row.get('rep')):
+        items_ja.append(f"{row['rep']}レップ")
+        items_en.append(f"{row['rep']}rep")
+    if not _is_blank(row.get('load')):
+        items_ja.append(format_load(row['load']))
+        items_en.append(format_load(row['load']))
+    return Warmup(
+        no=no,
+        exercise=row.get('Exercise'),
+        type_prefix=f"{no} " if no in WARMUP_TYPES else "",
+        type_name=WARMUP_TYPES.get(no, ""),
+        point=None if _is_blank(point) else point,
+        summary_ja=" / ".join(items_ja),
+        summary_en=" | ".join(items_en),
+    )
+
+
+def _build_exercises(main_rows, has_point):
+    # 同じエクササイズをグループ化（最初に出てきた順序を保持）
+    groups = {}
+    for row in main_rows:
+        groups.setdefault(row.get('Exercise'), []).append(row)
+
+    exercises = []
+    for exercise_name, rows in groups.items():
+        sets = tuple(row.get('set') for row in rows)
+        loads = tuple(row.get('load') for row in rows)
+        reps = tuple(row.get('rep') for row in rows)
+        point = rows[0].get('Point') if has_point else None
+        exercises.append(Exercise(
+            no=rows[0].get('No', ''),
+            exercise=exercise_name,
+            point=None if point is None or pd.isna(point) or point == '' else point,
+            sets=sets,
+            loads=loads,
+            reps=reps,
+            set='・'.join(map(str, sets)),
+            load='・'.join(map(str, loads)),
+            rep='・'.join(map(str, reps)),
+            load_display='・'.join(format_load(load) for load in loads),
+            total_sets=_total_sets(sets),
+        ))
+    return tuple(exercises)
+
+
+# プログラム一覧ページの表（メイン種目を1行ずつ）
+def _build_main_table(main_rows, columns):
+    if not main_rows:
+        return None
+    source_columns = [c for c in ['No', 'Exercise', 'set', 'load', 'rep', 'Point'] if c in columns]
+    labels = {'No': 'No.', 'Exercise': 'エクササイズ', 'set': 'セット数', 'load': '負荷', 'rep': 'レップ数', 'Point': 'ポイント'}
+    display_df = pd.DataFrame([[row.get(c) for c in source_columns] for row in main_rows], columns=[labels[c] for c in source_columns])
+    display_df['負荷'] = display_df['負荷'].map(format_load)
+    # エクササイズ名を太文字にする
+    display_df['エクササイズ'] = display_df['エクササイズ'].map(lambda x: f"**{x}**")
+    # 数値と文字が混在する列は文字列に揃える（表示のたびに型変換させない）
+    for column in ['No.', 'セット数', 'レップ数']:
+        if column in display_df.columns:
+            display_df[column] = display_df[column].map(lambda x: '' if pd.isna(x) else str(x))
+    # インデックスを1から始まる連番に変更
+    display_df.index = range(1, len(display_df) + 1)
+    return display_df
+
+
+# 検索用に文字列を揃える（全角・半角、大文字・小文字を区別しない）
+def normalize_text(value):
+    return unicodedata.normalize("NFKC", str(value)).casefold().strip()
+
+
+def _ngrams(text):
+    if len(text) < NGRAM:
+        return {text} if text else set()
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+# 各行のエクササイズ名・ポイントから n-gram の転置索引を作る
+# documents: (プログラム名, "warmup"/"main", 行番号, エクササイズ名, ポイント) の並び
+def _build_search(documents):
+    programs, kinds, rows, texts = [], [], [], []
+    postings = {}
+    for doc_id, (program, kind, row, exercise, point) in enumerate(documents):
+        # エクササイズ名とポイントの間は改行で区切る（入力欄の検索語に改行は入らない）
+        text = "\n".join(normalize_text(value) for value in (exercise, point) if not _is_blank(value))
+        programs.append(program)
+        kinds.append(kind)
+        rows.append(row)
+        texts.append(text)
+        grams = set(text)
+        for part in text.split("\n"):
+            grams |= _ngrams(part)
+        for gram in grams:
+            postings.setdefault(gram, []).append(doc_id)
+    return SearchIndex(
+        programs=tuple(programs),
+        kinds=tuple(kinds),
+        rows=tuple(rows),
+        texts=tuple(texts),
+        postings=MappingProxyType({gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}),
+    )
+
+
+# エクササイズ名・ポイントに検索語を含む行（プログラム名 → {"warmup": 行番号の集合, "main": 行番号の集合}）
+# 検索語の n-gram をすべて含む行を索引で絞り、最後に部分一致を確かめる
+def search(index, query):
+    query = normalize_text(query)
+    if not query:
+        return {}
+    postings = index.search.postings
+    grams = _ngrams(query)
+    if any(gram not in postings for gram in grams):
+        return {}
+    candidates = None
+    for gram in sorted(grams, key=lambda g: len(postings[g])):
+        ids = postings[gram]
+        candidates = ids if candidates is None else np.intersect1d(candidates, ids, assume_unique=True)
+        if len(candidates) == 0:
+            return {}
+
+    texts = index.search.texts
+    matches = {}
+    for doc_id in candidates.tolist():
+        if query in texts[doc_id]:
+            program = matches.setdefault(index.search.programs[doc_id], {"warmup": set(), "main": set()})
+            program[index.search.kinds[doc_id]].add(index.search.rows[doc_id])
+    return matches
+
+
+# プログラムの表から索引を作る（行数に比例する1回の走査）
+def build(program_df):
+    columns = list(program_df.columns)
+    if 'Program' not in columns:
+        return ProgramIndex(names=(), programs=MappingProxyType({}), search=_build_search([]))
+    has_no = 'No' in columns
+    has_point = 'Point' in columns
+
+    rows_by_program = {}
+    for row in program_df.to_dict('records'):
+        rows_by_program.setdefault(row['Program'], []).append(row)
+
+    programs = {}
+    documents = []
+    for name, rows in rows_by_program.items():
+        if has_no:
+            warmup_rows = [row for row in rows if row.get('No') in WARMUP_TYPES]
+            main_rows = [row for row in rows if row.get('No') not in WARMUP_TYPES]
+        else:
+            warmup_rows = []
+            main_rows = rows
+        programs[name] = Program(
+            name=name,
+            warmups=tuple(_build_warmup(row, has_point) for row in warmup_rows),
+            exercises=_build_exercises(main_rows, has_point),
+            main_table=_build_main_table(main_rows, columns),
+        )
+        for kind, kind_rows in (("warmup", warmup_rows), ("main", main_rows)):
+            for i, row in enumerate(kind_rows):
+                documents.append((name, kind, i, row.get('Exercise'), row.get('Point') if has_point else None))
+    return ProgramIndex(names=tuple(rows_by_program), programs=MappingProxyType(programs), search=_build_search(documents))
+
+
+# プログラムファイルの版ごとに1回だけ作り、全セッションで共有する
+def load(program_file=storage.PROGRAM_FILE):
+    return cache.cached(("program_index", program_file), [program_file], lambda: build(storage.read_program(program_file)))
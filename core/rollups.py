@@ -0,0 +1,401 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from core import sqlite_store
+from core.loads import normalize_loads, read_one_rm_table
+
+# 集計テーブルの形式の版（変えたら既存の集計は次の参照時に作り直される）
+SCHEMA_VERSION = 5
+
+# 推定1RMを求めるのはこの回数以下のセットだけ（回数が多いと推定式の誤差が大きい）
+E1RM_MAX_REPS = 12
+
+# 選手 × プログラム × エクササイズ × 日 ごとの集計（セット数・レップ数合計・総負荷量合計・最大負荷kg）
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    player TEXT NOT NULL,
+    program TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    date TEXT NOT NULL,
+    sets INTEGER NOT NULL,
+    reps REAL NOT NULL,
+    volume REAL NOT NULL,
+    max_load REAL,
+    PRIMARY KEY (player, program, exercise, date)
+);
+CREATE INDEX IF NOT EXISTS idx_rollup_date ON daily_rollup (date);
+CREATE TABLE IF NOT EXISTS daily_load (
+    player TEXT NOT NULL,
+    date TEXT NOT NULL,
+    sets INTEGER NOT NULL,
+    volume REAL NOT NULL,
+    seq INTEGER NOT NULL,
+    PRIMARY KEY (player, date)
+);
+CREATE INDEX IF NOT EXISTS idx_load_seq ON daily_load (seq);
+CREATE TABLE IF NOT EXISTS exercise_records (
+    player TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    best_load REAL,
+    best_load_reps REAL,
+    best_load_date TEXT,
+    best_epley REAL,
+    best_epley_date TEXT,
+    best_brzycki REAL,
+    best_brzycki_date TEXT,
+    last_date TEXT NOT NULL,
+    last_sets INTEGER NOT NULL,
+    last_max_load REAL,
+    last_volume REAL NOT NULL,
+    PRIMARY KEY (player, exercise)
+);
+CREATE TABLE IF NOT EXISTS rollup_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_UPSERT = """
+INSERT INTO daily_rollup (player, program, exercise, date, sets, reps, volume, max_load)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (player, program, exercise, date) DO UPDATE SET
+    sets = sets + excluded.sets,
+    reps = reps + excluded.reps,
+    volume = volume + excluded.volume,
+    max_load = MAX(COALESCE(max_load, excluded.max_load), COALESCE(excluded.max_load, max_load))
+"""
+
+# 選手 × 日 ごとの総負荷量（seq: 最後に変わった時の変更番号。負荷モニタリングが差分だけを読むのに使う）
+_UPSERT_LOAD = """
+INSERT INTO daily_load (player, date, sets, volume, seq)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (player, date) DO UPDATE SET
+    sets = sets + excluded.sets,
+    volume = volume + excluded.volume,
+    seq = excluded.seq
+"""
+
+# 選手 × エクササイズ ごとの自己ベスト（最大負荷・推定1RM）と最後に実施した日
+# 同じ値の場合は先に達成した日を残す。最後の日と同じ日の行は足し込む
+_UPSERT_RECORD = """
+INSERT INTO exercise_records (
+    player, exercise, best_load, best_load_reps, best_load_date, best_epley, best_epley_date,
+    best_brzycki, best_brzycki_date, last_date, last_sets, last_max_load, last_volume
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (player, exercise) DO UPDATE SET
+    best_load = CASE WHEN {load} THEN excluded.best_load ELSE best_load END,
+    best_load_reps = CASE WHEN {load} THEN excluded.best_load_reps ELSE best_load_reps END,
+    best_load_date = CASE WHEN {load} THEN excluded.best_load_date ELSE best_load_date END,
+    best_epley = CASE WHEN {epley} THEN excluded.best_epley ELSE best_epley END,
+    best_epley_date = CASE WHEN {epley} THEN excluded.best_epley_date ELSE best_epley_date END,
+    best_brzycki = CASE WHEN {brzycki} THEN excluded.best_brzycki ELSE best_brzycki END,
+    best_brzycki_date = CASE WHEN {brzycki} THEN excluded.best_brzycki_date ELSE best_brzycki_date END,
+    last_sets = CASE WHEN excluded.last_date > last_date THEN excluded.last_sets
+        WHEN excluded.last_date = last_date THEN last_sets + excluded.last_sets ELSE last_sets END,
+    last_max_load = CASE WHEN excluded.last_date > last_date THEN excluded.last_max_load
+        WHEN excluded.last_date = last_date THEN MAX(COALESCE(last_max_load, excluded.last_max_load), COALESCE(excluded.last_max_load, last_max_load))
+        ELSE last_max_load END,
+    last_volume = CASE WHEN excluded.last_date > last_date THEN excluded.last_volume
+        WHEN excluded.last_date = last_date THEN last_volume + excluded.last_volume ELSE last_volume END,
+    last_date = MAX(last_date, excluded.last_date)
+""".format(
+    load="excluded.best_load IS NOT NULL AND (best_load IS NULL OR excluded.best_load > best_load"
+         " OR (excluded.best_load = best_load AND (excluded.best_load_reps > best_load_reps"
+         " OR (excluded.best_load_reps = best_load_reps AND excluded.best_load_date < best_load_date))))",
+    epley="excluded.best_epley IS NOT NULL AND (best_epley IS NULL OR excluded.best_epley > best_epley"
+          " OR (excluded.best_epley = best_epley AND excluded.best_epley_date < best_epley_date))",
+    brzycki="excluded.best_brzycki IS NOT NULL AND (best_brzycki IS NULL OR excluded.best_brzycki > best_brzycki"
+            " OR (excluded.best_brzycki = best_brzycki AND excluded.best_brzycki_date < best_brzycki_date))",
+)
+
+RECORD_COLUMNS = [
+    "player", "exercise", "best_load", "best_load_reps", "best_load_date", "best_epley", "best_epley_date",
+    "best_brzycki", "best_brzycki_date", "last_date", "last_sets", "last_max_load", "last_volume",
+]
+
+def connect(db_file):
+    return sqlite_store.thread_connection(db_file, SCHEMA)
+
+
+def _key_text(values):
+    values = pd.Series(values).reset_index(drop=True)
+    return values.where(values.notna(), "").astype(str)
+
+
+# 負荷をkg換算する（総負荷量と同じく、体重はその行の体重、%は1RM表から換算）
+def _normalized_loads(df):
+    body_weight = df["体重"] if "体重" in df.columns else None
+    return normalize_loads(
+        df["負荷"], body_weight=body_weight, players=df["名前"], exercises=df["エクササイズ名"], one_rm_table=read_one_rm_table(),
+    )
+
+
+# ログの行（DataFrame）を集計行にまとめる
+def aggregate(df):
+    if len(df) == 0:
+        return pd.DataFrame(columns=["player", "program", "exercise", "date", "sets", "reps", "volume", "max_load"])
+    df = df.reset_index(drop=True)
+    normalized = _normalized_loads(df)
+    dates = pd.to_datetime(df["日付"], errors="coerce")
+    frame = pd.DataFrame({
+        "player": _key_text(df["名前"]),
+        "program": _key_text(df["プログラム名"]),
+        "exercise": _key_text(df["エクササイズ名"]),
+        "date": dates.dt.strftime("%Y-%m-%d").fillna(""),
+        "sets": 1,
+        "reps": pd.to_numeric(df["回数"], errors="coerce").fillna(0).to_numpy(),
+        "volume": pd.to_numeric(df["総負荷量"], errors="coerce").fillna(0).to_numpy(),
+        "max_load": normalized["負荷kg"].to_numpy(),
+    })
+    return frame.groupby(["player", "program", "exercise", "date"], sort=False, as_index=False).agg(
+        sets=("sets", "sum"), reps=("reps", "sum"), volume=("volume", "sum"), max_load=("max_load", "max"),
+    )
+
+
+# 推定1RM（Epley: 負荷 × (1 + 回数/30)、Brzycki: 負荷 × 36 / (37 - 回数)）
+def estimate_one_rm(load, reps):
+    load = np.asarray(load, dtype=float)
+    reps = np.asarray(reps, dtype=float)
+    valid = (reps >= 1) & (reps <= E1RM_MAX_REPS)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        epley = np.where(valid, load * (1 + reps / 30), np.nan)
+        brzycki = np.where(valid, load * 36 / (37 - reps), np.nan)
+    return epley, brzycki
+
+
+def _best(frame, column, order):
+    # 値が大きい順（同じ値なら先の日付）で選手 × エクササイズ ごとに1行
+    best = frame.dropna(subset=[column]).sort_values(order + ["date"], ascending=[False] * len(order) + [True])
+    return best.drop_duplicates(["player", "exercise"]).set_index(["player", "exercise"])
+
+
+# ログの行を 選手 × エクササイズ の記録（自己ベストと最後に実施した日）にまとめる
+def exercise_records_of(df):
+    df = df.reset_index(drop=True)
+    normalized = _normalized_loads(df)
+    reps = pd.to_numeric(df["回数"], errors="coerce").to_numpy()
+    epley, brzycki = estimate_one_rm(normalized["負荷kg"], reps)
+    frame = pd.DataFrame({
+        "player": _key_text(df["名前"]),
+        "exercise": _key_text(df["エクササイズ名"]),
+        "date": pd.to_datetime(df["日付"], errors="coerce").dt.strftime("%Y-%m-%d").fillna(""),
+        "load": normalized["負荷kg"].to_numpy(),
+        "reps": reps,
+        "volume": pd.to_numeric(df["総負荷量"], errors="coerce").fillna(0).to_numpy(),
+        "epley": epley,
+        "brzycki": brzycki,
+    })
+    frame = frame[(frame["player"] != "") & (frame["exercise"] != "") & (frame["date"] != "")]
+    if len(frame) == 0:
+        return pd.DataFrame(columns=RECORD_COLUMNS)
+
+    last = frame[frame["date"] == frame.groupby(["player", "exercise"])["date"].transform("max")]
+    records = last.groupby(["player", "exercise"]).agg(
+        last_date=("date", "first"), last_sets=("date", "size"), last_max_load=("load", "max"), last_volume=("volume", "sum"),
+    )
+    # 最大負荷は回数の記録があるセットから選ぶ（回数のないセットは「負荷 × 回数」で表示できない）
+    best_load = _best(frame[frame["reps"].notna()], "load", ["load", "reps"])
+    records["best_load"] = best_load["load"]
+    records["best_load_reps"] = best_load["reps"]
+    records["best_load_date"] = best_load["date"]
+    for column in ["epley", "brzycki"]:
+        best = _best(frame, column, [column])
+        records[f"best_{column}"] = best[column]
+        records[f"best_{column}_date"] = best["date"]
+    return records.reset_index()[RECORD_COLUMNS]
+
+
+def _record_values(records):
+    for row in records.astype(object).where(records.notna(), None).itertuples(index=False, name=None):
+        yield row
+
+
+def _load_records(rolled, seq):
+    loads = rolled[(rolled["player"] != "") & (rolled["date"] != "")]
+    loads = loads.groupby(["player", "date"], sort=False, as_index=False).agg(sets=("sets", "sum"), volume=("volume", "sum"))
+    for player, date, sets, volume in loads.itertuples(index=False, name=None):
+        yield player, date, int(sets), float(volume), seq
+
+
+def _records(rolled):
+    for row in rolled.itertuples(index=False, name=None):
+        player, program, exercise, date, sets, reps, volume, max_load = row
+        yield (player, program, exercise, date, int(sets), float(reps), float(volume),
+               None if max_load is None or np.isnan(max_load) else float(max_load))
+
+
+# 保存した行を集計に足し込む（書き込み時に呼ぶ）
+def apply_rows(db_file, rows):
+    df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame.from_records(rows)
+    if len(df) == 0:
+        return 0
+    df = df.reindex(columns=["日付", "プログラム名", "名前", "エクササイズ名", "負荷", "回数", "総負荷量", "体重"])
+    rolled = aggregate(df)
+    conn = connect(db_file)
+    with conn:
+        conn.executemany(_UPSERT, _records(rolled))
+        conn.executemany(_UPSERT_RECORD, _record_values(exercise_records_of(df)))
+        seq = (_meta(conn, "load_seq") or 0) + 1
+        conn.executemany(_UPSERT_LOAD, _load_records(rolled, seq))
+        _set_meta(conn, "load_seq", seq)
+    return len(rolled)
+
+
+# ログ全体から集計を作り直す
+def rebuild(db_file, df, source_signature=None):
+    rolled = aggregate(df)
+    conn = connect(db_file)
+    with conn:
+        conn.execute("DELETE FROM daily_rollup")
+        conn.executemany(_UPSERT, _records(rolled))
+        conn.execute("DELETE FROM exercise_records")
+        conn.executemany(_UPSERT_RECORD, _record_values(exercise_records_of(df)))
+        _reset_loads(conn)
+        conn.executemany(_UPSERT_LOAD, _load_records(rolled, 0))
+        _set_meta(conn, "source_signature", source_signature)
+        _set_meta(conn, "built", True)
+        _set_meta(conn, "schema", SCHEMA_VERSION)
+    return len(rolled)
+
+
+def clear(db_file, source_signature=None):
+    conn = connect(db_file)
+    with conn:
+        conn.execute("DELETE FROM daily_rollup")
+        conn.execute("DELETE FROM exercise_records")
+        _reset_loads(conn)
+        _set_meta(conn, "source_signature", source_signature)
+        _set_meta(conn, "built", True)
+        _set_meta(conn, "schema", SCHEMA_VERSION)
+
+
+# 日ごとの総負荷量を空にする（generation を進めて、差分で読んでいる側に全件の読み直しを知らせる）
+def _reset_loads(conn):
+    conn.execute("DELETE FROM daily_load")
+    _set_meta(conn, "load_generation", (_meta(conn, "load_generation") or 0) + 1)
+    _set_meta(conn, "load_seq", 0)
+
+
+def _meta(conn, key):
+    row = conn.execute("SELECT value FROM rollup_meta WHERE key = ?", (key,)).fetchone()
+    return None if row is None else json.loads(row[0])
+
+
+def _set_meta(conn, key, value):
+    conn.execute(
+        "INSERT INTO rollup_meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+        (key, json.dumps(value)),
+    )
+
+
+def get_meta(db_file, key):
+    return _meta(connect(db_file), key)
+
+
+def set_meta(db_file, key, value):
+    conn = connect(db_file)
+    with conn:
+        _set_meta(conn, key, value)
+
+
+def _where(name=None, program=None, start=None, end=None):
+    where = []
+    params = []
+    if name is not None:
+        where.append("player = ?")
+        params.append(str(name))
+    if program is not None:
+        where.append("program = ?")
+        params.append(str(program))
+    if start is not None:
+        where.append("date >= ?")
+        params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+    if end is not None:
+        where.append("date <= ?")
+        params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+    return (" WHERE " + " AND ".join(where)) if where else "", params
+
+
+# 選手・プログラム・エクササイズの一覧（昇順、空欄を除く）
+def distinct(db_file, column):
+    if column not in ("player", "program", "exercise"):
+        raise ValueError(f"集計テーブルにない列です: {column}")
+    rows = connect(db_file).execute(
+        f"SELECT DISTINCT {column} FROM daily_rollup WHERE {column} != '' ORDER BY {column}"
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+# 過去ログ検索の統計情報（総セット数・総負荷量・実施種目数・実施プログラム数）
+def summary(db_file, name=None, program=None, start=None, end=None):
+    where, params = _where(name, program, start, end)
+    sets, volume, exercises, programs = connect(db_file).execute(
+        "SELECT COALESCE(SUM(sets), 0), COALESCE(SUM(volume), 0), "
+        "COUNT(DISTINCT NULLIF(exercise, '')), COUNT(DISTINCT NULLIF(program, '')) "
+        f"FROM daily_rollup{where}",
+        params,
+    ).fetchone()
+    return {"sets": sets, "volume": volume, "exercises": exercises, "programs": programs}
+
+
+# データ管理ページの統計（総ログ数・選手数・最新記録日・選手別ログ数）
+def overview(db_file):
+    conn = connect(db_file)
+    rows, players, latest = conn.execute(
+        "SELECT COALESCE(SUM(sets), 0), COUNT(DISTINCT NULLIF(player, '')), MAX(NULLIF(date, '')) FROM daily_rollup"
+    ).fetchone()
+    counts = conn.execute(
+        "SELECT player, SUM(sets) AS n FROM daily_rollup WHERE player != '' GROUP BY player ORDER BY n DESC"
+    ).fetchall()
+    return {
+        "rows": rows,
+        "players": players,
+        "latest_date": pd.Timestamp(latest) if latest else None,
+        "player_counts": pd.Series({player: n for player, n in counts}, name="count", dtype="int64"),
+    }
+
+
+# 変更番号 since より後に変わった 選手 × 日 の総負荷量（since=None は全件）
+# 返り値: (generation, 変更番号, DataFrame[player, date, volume])。generation が前回と違えば全件を読み直すこと
+def load_changes(db_file, since=None):
+    conn = connect(db_file)
+    # 読み込み中に書き込まれても、変更番号とその時点の行が一致するよう1つの読み取りトランザクションで読む
+    with conn:
+        conn.execute("BEGIN")
+        generation = _meta(conn, "load_generation") or 0
+        seq = _meta(conn, "load_seq") or 0
+        rows = conn.execute("SELECT player, date, volume FROM daily_load WHERE seq > ?", (-1 if since is None else since,)).fetchall()
+    changes = pd.DataFrame(rows, columns=["player", "date", "volume"])
+    changes["date"] = pd.to_datetime(changes["date"])
+    return generation, seq, changes
+
+
+# 選手 × エクササイズ の記録（なければ None）
+def exercise_record(db_file, player, exercise):
+    row = connect(db_file).execute(
+        f"SELECT {', '.join(RECORD_COLUMNS)} FROM exercise_records WHERE player = ? AND exercise = ?",
+        (str(player), str(exercise)),
+    ).fetchone()
+    return None if row is None else dict(zip(RECORD_COLUMNS, row))
+
+
+# 保存する行のうち、これまでの自己ベスト（最大負荷・推定1RM）を超えるもの
+# 返り値: [{"player", "exercise", "kind"("load"/"epley"/"brzycki"), "value", "previous"}]。初めて行う種目は含めない
+def new_records(db_file, rows):
+    df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame.from_records(rows)
+    if len(df) == 0:
+        return []
+    df = df.reindex(columns=["日付", "名前", "エクササイズ名", "負荷", "回数", "総負荷量", "体重"])
+    found = []
+    for candidate in exercise_records_of(df).to_dict("records"):
+        current = exercise_record(db_file, candidate["player"], candidate["exercise"])
+        if current is None:
+            continue
+        for kind in ["load", "epley", "brzycki"]:
+            value, previous = candidate[f"best_{kind}"], current[f"best_{kind}"]
+            if pd.notna(value) and previous is not None and value > previous:
+                found.append({"player": candidate["player"], "exercise": candidate["exercise"], "kind": kind, "value": value, "previous": previous})
+    return found
@@ -0,0 +1,249 @@
+import itertools
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+# SQLiteの列名とログの列名の対応
+COLUMN_MAP = {
+    "date": "日付",
+    "program": "プログラム名",
+    "player": "名前",
+    "exercise": "エクササイズ名",
+    "set_no": "set",
+    "load": "負荷",
+    "reps": "回数",
+    "volume": "総負荷量",
+    "body_weight": "体重",
+}
+DB_COLUMNS = list(COLUMN_MAP)
+LOG_COLUMNS = list(COLUMN_MAP.values())
+
+# 負荷は "60.0kg" などの文字列と数値が混在するため、型指定なしで元の型のまま保存する
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS training_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    program TEXT,
+    player TEXT,
+    exercise TEXT,
+    set_no INTEGER,
+    load,
+    reps INTEGER,
+    volume REAL,
+    body_weight REAL
+);
+CREATE INDEX IF NOT EXISTS idx_log_player_exercise_date ON training_log (player, exercise, date);
+CREATE INDEX IF NOT EXISTS idx_log_date ON training_log (date);
+"""
+
+_local = threading.local()
+
+
+# スレッドごとに接続を使い回す（Streamlitはセッションごとに別スレッドで動く）
+# 初めて接続した時に schema を実行し、setup があれば続けて呼ぶ（古いデータベースの列の追加など）
+def thread_connection(db_file, schema, setup=None):
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_file)
+    if conn is None:
+        conn = sqlite3.connect(db_file, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(schema)
+        if setup is not None:
+            setup(conn)
+        connections[db_file] = conn
+    return conn
+
+
+def connect(db_file):
+    return thread_connection(db_file, SCHEMA, _migrate)
+
+
+# 古いデータベースに後から追加した列を足す
+def _migrate(conn):
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(training_log)")}
+    if "body_weight" not in existing:
+        conn.execute("ALTER TABLE training_log ADD COLUMN body_weight REAL")
+        conn.commit()
+
+
+def close(db_file):
+    connections = getattr(_local, "connections", {})
+    conn = connections.pop(db_file, None)
+    if conn is not None:
+        conn.close()
+
+
+# WALファイルも含めた関連ファイル（キャッシュの署名用）
+def db_files(db_file):
+    return [db_file, f"{db_file}-wal"]
+
+
+def _to_date_text(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+def _to_db_value(value):
+    if value is None:
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and pd.isna(value):
+        return None
+    return value
+
+
+def _row_values(row):
+    return (
+        _to_date_text(row.get("日付")),
+        _to_db_value(row.get("プログラム名")),
+        _to_db_value(row.get("名前")),
+        _to_db_value(row.get("エクササイズ名")),
+        _to_db_value(row.get("set")),
+        _to_db_value(row.get("負荷")),
+        _to_db_value(row.get("回数")),
+        _to_db_value(row.get("総負荷量")),
+        _to_db_value(row.get("体重")),
+    )
+
+
+_INSERT = f"INSERT INTO training_log ({', '.join(DB_COLUMNS)}) VALUES ({', '.join('?' * len(DB_COLUMNS))})"
+
+
+# 行（dictのリスト）を1トランザクションで追加
+def append_rows(rows, db_file):
+    if not rows:
+        return 0
+    conn = connect(db_file)
+    with conn:
+        conn.executemany(_INSERT, [_row_values(row) for row in rows])
+    return len(rows)
+
+
+def _frame(cursor):
+    df = pd.DataFrame.from_records(cursor.fetchall(), columns=[d[0] for d in cursor.description])
+    df = df.rename(columns=COLUMN_MAP)
+    if "日付" in df.columns:
+        df["日付"] = pd.to_datetime(df["日付"])
+    return df
+
+
+def _select(db_file, where="", params=(), order="id", limit=None):
+    sql = f"SELECT {', '.join(DB_COLUMNS)} FROM training_log"
+    if where:
+        sql += f" WHERE {where}"
+    sql += f" ORDER BY {order}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params = tuple(params) + (int(limit),)
+    return _frame(connect(db_file).execute(sql, params))
+
+
+def read_log(db_file):
+    return _select(db_file)
+
+
+# 選手×エクササイズの直近の記録（インデックス (player, exercise, date) を使う）
+def exercise_history(db_file, player, exercise, limit=None):
+    return _select(
+        db_file,
+        "player = ? AND exercise = ?",
+        (player, exercise),
+        order="date DESC, id DESC",
+        limit=limit,
+    )
+
+
+# 過去ログ検索の条件で絞り込み（日付は開始日・終了日を含む）
+def query_log(db_file, name=None, program=None, start=None, end=None):
+    where = []
+    params = []
+    if name is not None:
+        where.append("player = ?")
+        params.append(name)
+    if program is not None:
+        where.append("program = ?")
+        params.append(program)
+    if start is not None:
+        where.append("date >= ?")
+        params.append(_to_date_text(start))
+    if end is not None:
+        where.append("date <= ?")
+        params.append(_to_date_text(end))
+    return _select(db_file, " AND ".join(where), params, order="date, id")
+
+
+def distinct_values(db_file, column):
+    db_column = {v: k for k, v in COLUMN_MAP.items()}[column]
+    rows = connect(db_file).execute(
+        f"SELECT DISTINCT {db_column} FROM training_log WHERE {db_column} IS NOT NULL ORDER BY {db_column}"
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+# 最後に追加した行のID（集計テーブルが最新かどうかの判定用）
+def max_id(db_file):
+    return connect(db_file).execute("SELECT COALESCE(MAX(id), 0) FROM training_log").fetchone()[0]
+
+
+# 行数と最後の行ID（追記だけの変更かどうかの確認用）
+def row_count(db_file):
+    return connect(db_file).execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM training_log").fetchone()
+
+
+# 指定したIDより後、upto_id までに追加された行
+def read_since(db_file, last_id, upto_id):
+    return _select(db_file, "id > ? AND id <= ?", (int(last_id), int(upto_id)))
+
+
+# 総負荷量を一括で更新（volumes は read_log と同じ並び）
+def update_volumes(db_file, volumes):
+    conn = connect(db_file)
+    ids = [row[0] for row in conn.execute("SELECT id FROM training_log ORDER BY id")]
+    with conn:
+        conn.executemany(
+            "UPDATE training_log SET volume = ? WHERE id = ?",
+            zip((float(v) for v in volumes), ids),
+        )
+    return len(ids)
+
+
+def clear(db_file):
+    conn = connect(db_file)
+    with conn:
+        conn.execute("DELETE FROM training_log")
+
+
+# 既存のログ（DataFrameの並び）を1つのトランザクションで取り込む
+def import_batches(batches, db_file, replace=False):
+    conn = connect(db_file)
+    count = 0
+    with conn:
+        if replace:
+            conn.execute("DELETE FROM training_log")
+        for df in batches:
+            df = df.reindex(columns=LOG_COLUMNS)
+            conn.executemany(_INSERT, (_row_values(row) for row in df.to_dict("records")))
+            count += len(df)
+    return count
+
+
+# 既存のログ（DataFrame）を一括で取り込む
+def import_frame(df, db_file, replace=False):
+    return import_batches([df], db_file, replace=replace)
+
+
+# training_log.xlsx（未反映のジャーナルを含む）からの一括取り込み。Excelは一定の行数ずつ読む
+def import_from_xlsx(xlsx_file, db_file, replace=True):
+    from core import storage, xlsx_reader
+
+    batches = []
+    if os.path.exists(xlsx_file):
+        batches = xlsx_reader.iter_batches(xlsx_file, columns=LOG_COLUMNS, typed=False)
+    return import_batches(itertools.chain(batches, [storage.read_journal(xlsx_file)]), db_file, replace=replace)
@@ -0,0 +1,824 @@
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from core import cache, columnar, loads, monitoring, rollups, sqlite_store, xlsx_reader
+from core.locking import file_lock
+
+# エクセルファイルのパス
+LOG_FILE = "training_log.xlsx"
+PROGRAM_FILE = "training_program.xlsx"
+
+LOG_COLUMNS = ["日付", "プログラム名", "名前", "エクササイズ名", "set", "負荷", "回数", "総負荷量", "体重"]
+PROGRAM_COLUMNS = ['Program', 'No', 'Exercise', 'set', 'load', 'rep', 'Point']
+
+# 保存先: "xlsx"（既定、Excel + ジャーナル）または "sqlite"
+BACKEND = os.environ.get("TRAINING_LOG_BACKEND", "xlsx").lower()
+
+# ジャーナル・集計テーブルの置き場所（Excelが共有ドライブにある場合はローカルのフォルダを指定すると、
+# 共有ドライブに書けない間も保存を受け付け、書けるようになった時にExcelへ反映する）
+LOCAL_DIR = os.environ.get("TRAINING_LOG_LOCAL_DIR")
+
+# ジャーナルがこのサイズを超えたらバックグラウンドでExcelへ反映する
+COMPACT_THRESHOLD_BYTES = 512 * 1024
+
+# Excelへの反映に失敗した時の再試行間隔（秒）。失敗するたびに倍にして FLUSH_MAX_DELAY まで延ばす
+FLUSH_RETRY_DELAY = 1.0
+FLUSH_MAX_DELAY = 300.0
+
+# 集計テーブルのキーの列名
+ROLLUP_KEYS = {"名前": "player", "プログラム名": "program", "エクササイズ名": "exercise"}
+
+_compact_lock = threading.Lock()
+# 前回読み込んだ型付きログと読み込み位置（追記だけなら新しい行だけを読んで足す）
+_tails = {}
+_tails_lock = threading.Lock()
+_flushers = {}
+_flushers_lock = threading.Lock()
+_replayed = set()
+
+
+def empty_log():
+    return pd.DataFrame(columns=LOG_COLUMNS)
+
+
+def use_sqlite():
+    return BACKEND == "sqlite"
+
+
+# SQLiteのデータベースファイル（LOG_FILEと同じ場所・同じ名前）
+def db_path(log_file=LOG_FILE):
+    root, _ = os.path.splitext(log_file)
+    return f"{root}.db"
+
+
+# ジャーナル・集計テーブルのパスの元（LOCAL_DIR があればそのフォルダ）
+def _local_root(log_file):
+    root, _ = os.path.splitext(log_file)
+    if LOCAL_DIR:
+        os.makedirs(LOCAL_DIR, exist_ok=True)
+        return os.path.join(LOCAL_DIR, os.path.basename(root))
+    return root
+
+
+# 統計用の集計テーブル（SQLite）のパス
+def rollup_path(log_file=LOG_FILE):
+    return f"{_local_root(log_file)}.rollups.db"
+
+
+# 型付きログの月ごとのパーティション（Parquet）とマニフェストを置くフォルダ
+def partition_dir(log_file=LOG_FILE):
+    root, _ = os.path.splitext(log_file)
+    return f"{root}.parts"
+
+
+# ジャーナル（追記専用、1行1セットのJSON Lines）のパス
+def journal_path(log_file=LOG_FILE):
+    return f"{_local_root(log_file)}.journal.jsonl"
+
+
+# 反映処理中のジャーナル（反映中に落ちた場合もここから読み直す）
+def compacting_path(log_file=LOG_FILE):
+    return f"{_local_root(log_file)}.compacting.jsonl"
+
+
+# 以前の保存処理がExcelに書けなかった時に作っていたCSV（ログ全体のコピー）
+def fallback_csv_path(log_file=LOG_FILE):
+    root, _ = os.path.splitext(log_file)
+    return f"{root}.csv"
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"JSONに変換できない値です: {value!r}")
+
+
+# 新しい行をジャーナルの末尾に追記する（既存データは読まない）
+# 画面からの保存は core.writer の書き込みスレッド経由で呼ばれ、同時保存はまとめて1回で書き込まれる
+def append_rows(rows, log_file=LOG_FILE):
+    if not rows:
+        return 0
+    # 集計テーブルの作り直しと同時に走らないよう、集計のロックの中で書き込む
+    with file_lock(rollup_path(log_file)):
+        source_before = _rollup_source(log_file)
+        if use_sqlite():
+            saved = sqlite_store.append_rows(rows, db_path(log_file))
+            cache.invalidate(db_path(log_file))
+            journal_size = 0
+        else:
+            saved, journal_size = _append_journal(rows, log_file)
+        _apply_rollups(rows, log_file, source_before)
+    if journal_size >= COMPACT_THRESHOLD_BYTES:
+        compact_async(log_file)
+    return saved
+
+
+# 返り値: (追記した行数, 追記後のジャーナルのサイズ)
+# サイズはロックの中で求める（ロックの外では反映処理がジャーナルを退避していることがある）
+def _append_journal(rows, log_file):
+    lines = "".join(
+        json.dumps(row, ensure_ascii=False, default=_json_default) + "\n" for row in rows
+    )
+    path = journal_path(log_file)
+    with file_lock(path):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+            size = os.fstat(f.fileno()).st_size
+    cache.invalidate(path)
+    return len(rows), size
+
+
+# 保存した行を集計テーブルに足し込む（失敗しても保存は成功扱い、次の参照時に作り直す）
+def _apply_rollups(rows, log_file, source_before):
+    db_file = rollup_path(log_file)
+    try:
+        rollups.apply_rows(db_file, rows)
+        if use_sqlite() and rollups.get_meta(db_file, "source_signature") == source_before:
+            rollups.set_meta(db_file, "source_signature", _rollup_source(log_file))
+    except Exception:
+        try:
+            rollups.set_meta(db_file, "built", False)
+        except Exception:
+            pass
+
+
+# 集計テーブルの元データの版（xlsxはファイルの署名、SQLiteは最後の行ID）
+def _rollup_source(log_file):
+    if use_sqlite():
+        return sqlite_store.max_id(db_path(log_file))
+    if not os.path.exists(log_file):
+        return None
+    return source_signature(log_file)
+
+
+# ログ全体から集計テーブルを作り直す
+def rebuild_rollups(log_file=LOG_FILE):
+    db_file = rollup_path(log_file)
+    with file_lock(db_file):
+        source = _rollup_source(log_file)
+        return rollups.rebuild(db_file, read_typed_log(log_file), source)
+
+
+# 集計テーブルが元データと一致しているか
+def rollups_fresh(log_file=LOG_FILE):
+    db_file = rollup_path(log_file)
+    return (
+        rollups.get_meta(db_file, "built") is True
+        and rollups.get_meta(db_file, "schema") == rollups.SCHEMA_VERSION
+        and rollups.get_meta(db_file, "source_signature") == _rollup_source(log_file)
+    )
+
+
+# 集計テーブルが元データと一致していなければ作り直す（Excelを直接編集された場合など）
+def _fresh_rollups(log_file):
+    if not rollups_fresh(log_file):
+        rebuild_rollups(log_file)
+    return rollup_path(log_file)
+
+
+# ジャーナルの offset バイト目以降の完全な行を読む（書き込み途中の最終行は次回に読む）
+# 返り値: (レコード, 読み終えた位置)
+def _read_journal_tail(path, offset=0):
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+    end = data.rfind(b"\n") + 1
+    records = []
+    for line in data[:end].decode("utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records, offset + end
+
+
+def _read_journal_records(path):
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # 書き込み途中で止まった最終行などは読み飛ばす
+                continue
+    return records
+
+
+def _records_to_frame(records):
+    if not records:
+        return empty_log()
+    df = pd.DataFrame.from_records(records)
+    df = df.reindex(columns=LOG_COLUMNS + [c for c in df.columns if c not in LOG_COLUMNS])
+    df["日付"] = pd.to_datetime(df["日付"])
+    return df
+
+
+# まだExcelに反映されていないジャーナルの行を読み込み
+def read_journal(log_file=LOG_FILE):
+    records = _read_journal_records(compacting_path(log_file))
+    records += _read_journal_records(journal_path(log_file))
+    return _records_to_frame(records)
+
+
+def pending_journal_rows(log_file=LOG_FILE):
+    if use_sqlite():
+        return 0
+    count = 0
+    for path in (compacting_path(log_file), journal_path(log_file)):
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                count += sum(1 for line in f if line.strip())
+    return count
+
+
+# ベースのデータにジャーナルの行を結合
+def merge_journal(base_df, log_file=LOG_FILE):
+    journal_df = read_journal(log_file)
+    if len(journal_df) == 0:
+        return base_df
+    if len(base_df) == 0:
+        return journal_df
+    return pd.concat([base_df, journal_df], ignore_index=True)
+
+
+def _log_paths(log_file):
+    if use_sqlite():
+        return sqlite_store.db_files(db_path(log_file))
+    return [log_file, journal_path(log_file), compacting_path(log_file)]
+
+
+# Excel本体とジャーナルを合わせて読み込み（キャッシュなし、SQLiteへの取り込み用）
+def read_xlsx_log(log_file=LOG_FILE):
+    if os.path.exists(log_file):
+        base_df = xlsx_reader.read_frame(log_file, typed=False)
+    else:
+        base_df = empty_log()
+    return merge_journal(base_df, log_file)
+
+
+# ログ全体を読み込み（Excelの読み込みエラーはそのまま送出）
+# ファイルが変わるまでは全セッションで同じDataFrameを共有する
+def read_log(log_file=LOG_FILE):
+    if use_sqlite():
+        return cache.cached(("log", log_file), _log_paths(log_file), lambda: sqlite_store.read_log(db_path(log_file)))
+    return cache.cached(("log", log_file), _log_paths(log_file), lambda: read_xlsx_log(log_file))
+
+
+def source_signature(log_file):
+    return list(cache.file_signature(log_file)[0][1:])
+
+
+# Excel本体の型付きログを月ごとのパーティションから読み込み（Excelが変わっていれば作り直す）
+# 行は月の順（各月の中は記録の順）
+def _read_typed_base(log_file):
+    if not os.path.exists(log_file):
+        return columnar.to_typed(empty_log())
+    directory = partition_dir(log_file)
+    signature = source_signature(log_file)
+    manifest = columnar.read_manifest(directory, signature)
+    if manifest is not None:
+        try:
+            return columnar.concat_typed([columnar.read_partition(directory, entry) for _, entry in columnar.partitions_between(manifest)])
+        except Exception:
+            pass
+    typed = columnar.to_typed(xlsx_reader.read_frame(log_file))
+    if not columnar.has_parquet():
+        return typed
+    parts = columnar.split_partitions(typed)
+    try:
+        columnar.write_partitions(parts, directory, signature)
+    except Exception:
+        # パーティションが書けなくても読み込み結果はそのまま使える
+        pass
+    return columnar.concat_typed([frame for _, frame in parts])
+
+
+# パーティションがExcel本体と一致しているか
+def partitions_fresh(log_file=LOG_FILE):
+    return columnar.read_manifest(partition_dir(log_file), source_signature(log_file)) is not None
+
+
+# 最新のパーティションのマニフェスト（Excelが変わっていれば作り直す。pyarrowがない場合は None）
+def partition_manifest(log_file):
+    if not columnar.has_parquet() or not os.path.exists(log_file):
+        return None
+    manifest = columnar.read_manifest(partition_dir(log_file), source_signature(log_file))
+    if manifest is None:
+        read_typed_log(log_file)
+        manifest = columnar.read_manifest(partition_dir(log_file), source_signature(log_file))
+    return manifest
+
+
+def _read_partition(directory, entry):
+    path = os.path.join(directory, entry["file"])
+    return cache.cached(("partition", path), [path], lambda: columnar.read_partition(directory, entry))
+
+
+# 期間を含む型付きログと、その日付・名前順の索引の組の一覧（行は記録の順）
+# ログ全体をまだ読み込んでいない場合は、期間に重なる月のパーティションと未反映のジャーナルだけを読む
+def _date_sources(log_file, start=None, end=None):
+    loaded = _get_tail(_tail_key(log_file)) is not None
+    manifest = None if loaded or (start is None and end is None) else partition_manifest(log_file)
+    if manifest is None:
+        return [_typed_log_with_index(log_file)]
+    sources = []
+    directory = partition_dir(log_file)
+    for month, entry in columnar.partitions_between(manifest, start, end):
+        frame = _read_partition(directory, entry)
+        path = os.path.join(directory, entry["file"])
+        sources.append((frame, cache.cached(("partition_index", path), [path], lambda frame=frame: columnar.date_index(frame))))
+    journal_df = _read_typed_journal(log_file)
+    sources.append((journal_df, columnar.date_index(journal_df)))
+    return sources
+
+
+# 型付きのログ全体と日付・名前順の索引（追記だけなら前回の索引に新しい行を差し込む）
+def _typed_log_with_index(log_file):
+    frame = read_typed_log(log_file)
+    tail = _get_tail(_tail_key(log_file))
+    if tail is None or tail["frame"] is not frame:
+        return frame, columnar.date_index(frame)
+    if tail.get("index") is None:
+        tail["index"] = columnar.date_index(frame)
+    return frame, tail["index"]
+
+
+# 未反映のジャーナルの行（型付き）
+def _read_typed_journal(log_file):
+    paths = [compacting_path(log_file), journal_path(log_file)]
+    return cache.cached(("typed_journal", log_file), paths, lambda: columnar.to_typed(read_journal(log_file)))
+
+
+# 型付きのログ（日付はdatetime64、名前・プログラム・エクササイズはカテゴリ型、負荷は数値+単位）
+# 参照専用のページはこちらを使う。Excel本体はParquetミラーから、未反映分はジャーナルから読む
+def read_typed_log(log_file=LOG_FILE):
+    if use_sqlite():
+        return cache.cached(("typed", log_file), _log_paths(log_file), lambda: _load_typed_sqlite(log_file))
+    return cache.cached(("typed", log_file), _log_paths(log_file), lambda: _load_typed_xlsx(log_file))
+
+
+def _tail_key(log_file):
+    return ("sqlite" if use_sqlite() else "xlsx", log_file)
+
+
+def _get_tail(key):
+    with _tails_lock:
+        return _tails.get(key)
+
+
+def _set_tail(key, tail):
+    with _tails_lock:
+        _tails[key] = tail
+    return tail["frame"]
+
+
+# 追記以外の変更（置き換え・削除・総負荷量の再計算）の後は全件を読み直す
+def _reset_tail(log_file):
+    with _tails_lock:
+        for key in [k for k in _tails if k[1] == log_file]:
+            del _tails[key]
+
+
+def _journal_identity(path):
+    try:
+        stat = os.stat(path)
+        return stat.st_ino, stat.st_dev
+    except FileNotFoundError:
+        return None
+
+
+# Excel本体と反映中のジャーナルが前回と同じなら、ジャーナルの前回の位置から後の行だけを足す
+def _load_typed_xlsx(log_file):
+    key = _tail_key(log_file)
+    journal = journal_path(log_file)
+    base_signature = cache.file_signature(log_file, compacting_path(log_file))
+    identity = _journal_identity(journal)
+    tail = _get_tail(key)
+    if tail is not None and tail["base"] == base_signature:
+        # 同じジャーナルなら前回の位置から、前回はジャーナルがなかった場合は先頭から読む
+        if tail["journal"] == identity:
+            start = tail["offset"]
+        elif tail["journal"] is None:
+            start = 0
+        else:
+            start = None
+        size = os.path.getsize(journal) if identity is not None else 0
+        if start is not None and size >= start:
+            records, offset = _read_journal_tail(journal, start)
+            frame = tail["frame"]
+            index = tail.get("index")
+            if records:
+                frame = columnar.concat_typed([frame, columnar.to_typed(_records_to_frame(records))])
+                index = columnar.extend_date_index(index, frame) if index is not None else None
+            return _set_tail(key, {"base": base_signature, "journal": identity, "offset": offset, "frame": frame, "index": index})
+
+    frames = [_read_typed_base(log_file)]
+    pending = _read_journal_records(compacting_path(log_file))
+    records, offset = _read_journal_tail(journal)
+    if pending or records:
+        frames.append(columnar.to_typed(_records_to_frame(pending + records)))
+    frame = columnar.concat_typed(frames) if len(frames) > 1 else frames[0]
+    return _set_tail(key, {"base": base_signature, "journal": identity, "offset": offset, "frame": frame})
+
+
+# 前回の最後の行IDより後の行だけを足す（行数が合わない＝削除などがあった場合は全件を読み直す）
+def _load_typed_sqlite(log_file):
+    key = _tail_key(log_file)
+    db_file = db_path(log_file)
+    count, last_id = sqlite_store.row_count(db_file)
+    tail = _get_tail(key)
+    if tail is not None and last_id >= tail["last_id"]:
+        new_rows = sqlite_store.read_since(db_file, tail["last_id"], last_id)
+        if tail["count"] + len(new_rows) == count:
+            frame = tail["frame"]
+            index = tail.get("index")
+            if len(new_rows) > 0:
+                frame = columnar.concat_typed([frame, columnar.to_typed(new_rows)])
+                index = columnar.extend_date_index(index, frame) if index is not None else None
+            return _set_tail(key, {"count": count, "last_id": last_id, "frame": frame, "index": index})
+
+    frame = columnar.to_typed(sqlite_store.read_since(db_file, 0, last_id))
+    return _set_tail(key, {"count": len(frame), "last_id": last_id, "frame": frame})
+
+
+# 選手×エクササイズの履歴（新しい順）
+def exercise_history(player, exercise, limit=None, log_file=LOG_FILE):
+    if use_sqlite():
+        return sqlite_store.exercise_history(db_path(log_file), player, exercise, limit)
+    manifest = partition_manifest(log_file)
+    if manifest is None:
+        df = read_typed_log(log_file)
+        matched = df[(df['エクササイズ名'] == exercise) & (df['名前'] == player)]
+    else:
+        # 新しい月のパーティションから順に読み、limit 件がそろったらそれより古い月は読まない
+        journal_df = _read_typed_journal(log_file)
+        frames = [journal_df[(journal_df['エクササイズ名'] == exercise) & (journal_df['名前'] == player)]]
+        directory = partition_dir(log_file)
+        for month, entry in reversed(columnar.partitions_between(manifest)):
+            if limit is not None and entry["start"] is not None:
+                found = sum(int((f['日付'] >= pd.Timestamp(entry["end"])).sum()) for f in frames)
+                if found >= limit:
+                    break
+            df = _read_partition(directory, entry)
+            frames.insert(0, df[(df['エクササイズ名'] == exercise) & (df['名前'] == player)])
+        matched = columnar.concat_typed(frames)
+    # 同じ日付なら後から記録した行を先にする
+    matched = matched.iloc[::-1].sort_values('日付', ascending=False, kind='mergesort')
+    return matched if limit is None else matched.head(limit)
+
+
+# 過去ログ検索の絞り込み（None の条件は絞り込まない、日付は開始日・終了日を含む）
+def query_log(name=None, program=None, start=None, end=None, log_file=LOG_FILE):
+    if use_sqlite():
+        return sqlite_store.query_log(db_path(log_file), name, program, start, end)
+    if name is None and program is None and start is None and end is None:
+        return read_typed_log(log_file)
+    pieces = []
+    for df, index in _date_sources(log_file, start, end):
+        # 日付の範囲を二分探索で連続した区間にしてから、その区間の行だけを名前・プログラムで絞り込む
+        positions = columnar.date_range_positions(index, start, end)
+        if name is not None:
+            positions = columnar.filter_positions(df, positions, '名前', name)
+        if program is not None:
+            positions = columnar.filter_positions(df, positions, 'プログラム名', program)
+        pieces.append(df.take(np.sort(positions)))
+    return pieces[0] if len(pieces) == 1 else columnar.concat_typed(pieces)
+
+
+# 列の値の一覧（選択肢用、昇順）
+def distinct_values(column, log_file=LOG_FILE):
+    if use_sqlite():
+        return sqlite_store.distinct_values(db_path(log_file), column)
+    # 名前・プログラム・エクササイズは集計テーブルから求める（ログ全体を読まない）
+    if column in ROLLUP_KEYS:
+        return rollups.distinct(_fresh_rollups(log_file), ROLLUP_KEYS[column])
+    df = read_typed_log(log_file)
+    if column not in df.columns:
+        return []
+    values = df[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return sorted(values.cat.remove_unused_categories().cat.categories.tolist())
+    return sorted(values.dropna().unique().tolist())
+
+
+# データ管理ページの統計（総ログ数・選手数・最新記録日・選手別ログ数）。集計テーブルから求める
+def log_stats(log_file=LOG_FILE):
+    return rollups.overview(_fresh_rollups(log_file))
+
+
+# 過去ログ検索の統計情報（総セット数・総負荷量・実施種目数・実施プログラム数）。集計テーブルから求める
+def search_summary(name=None, program=None, start=None, end=None, log_file=LOG_FILE):
+    return rollups.summary(_fresh_rollups(log_file), name, program, start, end)
+
+
+# 選手 × エクササイズ の自己ベスト（最大負荷・推定1RM）と最後に実施した日。集計テーブルから1行だけ読む
+def exercise_record(player, exercise, log_file=LOG_FILE):
+    return rollups.exercise_record(_fresh_rollups(log_file), player, exercise)
+
+
+# 保存する行で更新される自己ベスト（保存の前に呼ぶ）
+def new_records(rows, log_file=LOG_FILE):
+    return rollups.new_records(_fresh_rollups(log_file), rows)
+
+
+# 全選手の負荷モニタリング指標（ACWR・EWMA・単調性・ストレイン）。保存で変わった日だけを集計テーブルから読む
+def training_load(log_file=LOG_FILE):
+    return monitoring.update(_fresh_rollups(log_file))
+
+
+# プログラムファイルを読み込み、列名を統一する（ファイルが変わるまでキャッシュ）
+def read_program(program_file=PROGRAM_FILE):
+    def load():
+        # エクセルファイルを読み込み（ヘッダーは1行目）
+        df = pd.read_excel(program_file)
+
+        # 列名を統一（スペースなど除去）
+        df.columns = df.columns.str.strip()
+
+        # 必要な列名にリネーム
+        if len(df.columns) >= 6:
+            df.columns = PROGRAM_COLUMNS[:len(df.columns)]
+        return df
+
+    return cache.cached(("program", program_file), [program_file], load)
+
+
+# プログラムファイルを置き換える（アップロード・サンプル作成用）
+def replace_program(data, program_file=PROGRAM_FILE):
+    if isinstance(data, pd.DataFrame):
+        data.to_excel(program_file, index=False)
+    else:
+        with open(program_file, "wb") as f:
+            f.write(data)
+    cache.invalidate(program_file)
+
+
+def delete_program(program_file=PROGRAM_FILE):
+    if os.path.exists(program_file):
+        os.remove(program_file)
+    cache.invalidate(program_file)
+
+
+# ジャーナルをExcel本体へ反映（Excelで開く人向け）
+def compact_journal(log_file=LOG_FILE):
+    if use_sqlite():
+        return 0
+    with _compact_lock, file_lock(log_file):
+        pending = compacting_path(log_file)
+        journal = journal_path(log_file)
+        if not os.path.exists(pending):
+            if not os.path.exists(journal):
+                return 0
+            # 反映中の追記は新しいジャーナルに入るよう、先に退避する
+            with file_lock(journal):
+                os.replace(journal, pending)
+
+        records = _read_journal_records(pending)
+        if records:
+            source_before = _rollup_source(log_file)
+            if os.path.exists(log_file):
+                manifest = columnar.read_manifest(partition_dir(log_file), source_signature(log_file))
+                base_df = xlsx_reader.read_frame(log_file, typed=False)
+            else:
+                manifest = None
+                base_df = empty_log()
+            new_df = _records_to_frame(records)
+            updated_df = pd.concat([base_df, new_df], ignore_index=True) if len(base_df) > 0 else new_df
+
+            root, ext = os.path.splitext(log_file)
+            tmp_file = f"{root}.tmp{ext}"
+            updated_df.to_excel(tmp_file, index=False)
+            os.replace(tmp_file, log_file)
+            # 反映済みの行が二重に反映されないよう、置き換えたらすぐに消す
+            os.remove(pending)
+
+            # パーティションは反映した行のある月（通常は今月）だけを書き直す（次の読み込みでExcelを解析しない）
+            try:
+                if manifest is not None:
+                    columnar.append_partitions(columnar.to_typed(new_df), partition_dir(log_file), manifest, source_signature(log_file))
+                else:
+                    columnar.write_partitions(columnar.split_partitions(columnar.to_typed(updated_df)), partition_dir(log_file), source_signature(log_file))
+            except Exception:
+                pass
+
+            # 行の中身は変わらないので、集計テーブルは元データの版だけ付け替える
+            with file_lock(rollup_path(log_file)):
+                if rollups.get_meta(rollup_path(log_file), "source_signature") == source_before:
+                    rollups.set_meta(rollup_path(log_file), "source_signature", _rollup_source(log_file))
+        else:
+            os.remove(pending)
+        for path in _log_paths(log_file):
+            cache.invalidate(path)
+        return len(records)
+
+
+# 既存のログ全体の総負荷量を再計算して書き戻す（体重・%表記の負荷を反映）
+def backfill_volumes(log_file=LOG_FILE, one_rm_file=loads.ONE_RM_FILE):
+    one_rm_table = loads.read_one_rm_table(one_rm_file)
+    if use_sqlite():
+        db_file = db_path(log_file)
+        df = sqlite_store.read_log(db_file)
+        updated = sqlite_store.update_volumes(db_file, loads.recompute_log_volumes(df, one_rm_table))
+        cache.invalidate(db_file)
+        _reset_tail(log_file)
+        rebuild_rollups(log_file)
+        return updated
+
+    # 未反映のジャーナルを先に反映してから、Excel本体を1回で書き直す
+    compact_journal(log_file)
+    if not os.path.exists(log_file):
+        return 0
+    with _compact_lock, file_lock(log_file):
+        df = xlsx_reader.read_frame(log_file, typed=False)
+        if len(df) == 0:
+            return 0
+        df['総負荷量'] = loads.recompute_log_volumes(df, one_rm_table)
+        root, ext = os.path.splitext(log_file)
+        tmp_file = f"{root}.tmp{ext}"
+        df.to_excel(tmp_file, index=False)
+        os.replace(tmp_file, log_file)
+        try:
+            columnar.write_partitions(columnar.split_partitions(columnar.to_typed(df)), partition_dir(log_file), source_signature(log_file))
+        except Exception:
+            pass
+        for path in _log_paths(log_file):
+            cache.invalidate(path)
+    rebuild_rollups(log_file)
+    return len(df)
+
+
+# 反映に失敗した場合（Excelを開いている・共有ドライブに接続できない等）は間隔を延ばしながら再試行する
+def compact_async(log_file=LOG_FILE):
+    with _flushers_lock:
+        state = _flushers.get(log_file)
+        if state is None:
+            state = _flushers[log_file] = {
+                "thread": None, "requested": False, "attempts": 0, "last_error": None, "next_retry": None,
+            }
+        state["requested"] = True
+        if state["thread"] is not None:
+            return False
+        state["thread"] = threading.Thread(target=_flush_loop, args=(log_file, state), name="journal-flush", daemon=True)
+        state["thread"].start()
+        return True
+
+
+def _flush_loop(log_file, state):
+    delay = FLUSH_RETRY_DELAY
+    while True:
+        with _flushers_lock:
+            if not state["requested"]:
+                state["thread"] = None
+                return
+            state["requested"] = False
+        try:
+            compact_journal(log_file)
+        except Exception as e:
+            # ジャーナルに行が残っているので、待ってからもう一度反映する
+            with _flushers_lock:
+                state["requested"] = True
+                state["attempts"] += 1
+                state["last_error"] = f"{type(e).__name__}: {e}"
+                state["next_retry"] = datetime.now() + timedelta(seconds=delay)
+            time.sleep(delay)
+            delay = min(delay * 2, FLUSH_MAX_DELAY)
+            continue
+        delay = FLUSH_RETRY_DELAY
+        with _flushers_lock:
+            state["attempts"] = 0
+            state["last_error"] = None
+            state["next_retry"] = None
+
+
+# バックグラウンド反映の状態（再試行回数・最後のエラー・次の再試行時刻）
+def flush_status(log_file=LOG_FILE):
+    with _flushers_lock:
+        state = _flushers.get(log_file)
+        if state is None:
+            return {"running": False, "attempts": 0, "last_error": None, "next_retry": None}
+        return {
+            "running": state["thread"] is not None,
+            "attempts": state["attempts"],
+            "last_error": state["last_error"],
+            "next_retry": state["next_retry"],
+        }
+
+
+# 起動時に前回反映できなかったジャーナルと以前のCSVを反映する（プロセスごとに1回）
+def replay_pending(log_file=LOG_FILE):
+    with _flushers_lock:
+        if log_file in _replayed or use_sqlite():
+            return 0
+        _replayed.add(log_file)
+    recovered = reconcile_csv_fallback(log_file)
+    if pending_journal_rows(log_file) > 0:
+        compact_async(log_file)
+    return recovered
+
+
+# 同じ行かどうかの判定に使う行の内容（日付・名前・エクササイズ名・set・負荷・回数）
+# 日付は日単位、数値は 5 と 5.0 を同じ値、文字列は前後の空白を除いて比べる
+def row_keys(df):
+    keys = pd.DataFrame(index=df.index)
+    keys["日付"] = pd.to_datetime(df["日付"], errors="coerce").dt.strftime("%Y-%m-%d")
+    for column in ["名前", "エクササイズ名", "負荷"]:
+        keys[column] = df[column].astype("string").str.strip()
+    for column in ["set", "回数"]:
+        keys[column] = pd.to_numeric(df[column], errors="coerce").astype("float64")
+    return keys.astype("string").fillna("")
+
+
+def _counted_row_keys(df):
+    keys = row_keys(df)
+    # 同じ内容の行が複数ある場合も数が合うように、何回目の出現かをキーに含める
+    keys["_n"] = keys.groupby(list(keys.columns), sort=False).cumcount()
+    return keys
+
+
+# CSVにだけある行（Excelに書けなかった保存）をジャーナルに戻し、CSVは .merged に名前を変えて残す
+def reconcile_csv_fallback(log_file=LOG_FILE):
+    csv_file = fallback_csv_path(log_file)
+    if use_sqlite() or not os.path.exists(csv_file):
+        return 0
+    csv_df = pd.read_csv(csv_file, encoding="utf-8-sig").reindex(columns=LOG_COLUMNS)
+    current_keys = _counted_row_keys(read_xlsx_log(log_file).reindex(columns=LOG_COLUMNS))
+    csv_keys = _counted_row_keys(csv_df)
+    merged = csv_keys.merge(current_keys.drop_duplicates(), how="left", indicator=True)
+    missing = csv_df[(merged["_merge"] == "left_only").to_numpy()]
+    if len(missing) > 0:
+        missing = missing.assign(日付=pd.to_datetime(missing["日付"], errors="coerce"))
+        append_rows(missing.astype(object).where(missing.notna(), None).to_dict("records"), log_file)
+    os.replace(csv_file, f"{csv_file}.merged")
+    return len(missing)
+
+
+# ログファイルを置き換える（アップロード・空ファイル作成用）。未反映のジャーナルは破棄する
+def replace_log(data, log_file=LOG_FILE):
+    if use_sqlite():
+        # アップロードされたExcelは一定の行数ずつ読みながら取り込む
+        batches = [data] if isinstance(data, pd.DataFrame) else xlsx_reader.iter_batches(data, columns=LOG_COLUMNS, typed=False)
+        sqlite_store.import_batches(batches, db_path(log_file), replace=True)
+        cache.invalidate(db_path(log_file))
+        _reset_tail(log_file)
+    else:
+        with _compact_lock, file_lock(log_file), file_lock(journal_path(log_file)):
+            _remove_derived_files(log_file)
+            if isinstance(data, pd.DataFrame):
+                data.to_excel(log_file, index=False)
+            else:
+                with open(log_file, "wb") as f:
+                    f.write(data)
+            for path in _log_paths(log_file):
+                cache.invalidate(path)
+    rebuild_rollups(log_file)
+
+
+def delete_log(log_file=LOG_FILE):
+    if use_sqlite():
+        sqlite_store.clear(db_path(log_file))
+        cache.invalidate(db_path(log_file))
+        _reset_tail(log_file)
+    else:
+        with _compact_lock, file_lock(log_file), file_lock(journal_path(log_file)):
+            _remove_derived_files(log_file)
+            if os.path.exists(log_file):
+                os.remove(log_file)
+            for path in _log_paths(log_file):
+                cache.invalidate(path)
+    with file_lock(rollup_path(log_file)):
+        rollups.clear(rollup_path(log_file), _rollup_source(log_file))
+
+
+def log_exists(log_file=LOG_FILE):
+    if use_sqlite():
+        return os.path.exists(db_path(log_file))
+    return os.path.exists(log_file) or os.path.exists(journal_path(log_file)) or os.path.exists(compacting_path(log_file))
+
+
+def _remove_derived_files(log_file):
+    for path in (journal_path(log_file), compacting_path(log_file)):
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.rmtree(partition_dir(log_file), ignore_errors=True)
@@ -0,0 +1,80 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from core import storage
+
+# 保存待ちの最大件数（超えたら保存要求はタイムアウトまで待つ）
+MAX_PENDING = 1000
+# 1回の書き込みにまとめる最大行数
+MAX_BATCH_ROWS = 5000
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+# ログへの書き込みを1本のスレッドに集約し、同時に来た保存をまとめて書き込む
+class LogWriter:
+    # linger: 最初の保存要求から書き込みまでに待つ秒数（外部機器からの取り込みなど、まとめて書きたい場合）
+    def __init__(self, log_file, max_pending=MAX_PENDING, max_batch_rows=MAX_BATCH_ROWS, linger=0.0):
+        self.log_file = log_file
+        self.max_batch_rows = max_batch_rows
+        self.linger = linger
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name=f"log-writer:{log_file}", daemon=True)
+        self._thread.start()
+
+    # 行を書き込み待ちに追加し、書き込み完了（fsync後）に件数が入る Future を返す
+    def submit(self, rows, timeout=None):
+        future = Future()
+        if not rows:
+            future.set_result(0)
+            return future
+        self._queue.put((list(rows), future), timeout=timeout)
+        return future
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        row_count = len(batch[0][0])
+        # 書き込み中にたまった（linger がある場合はその間に来た）保存要求をまとめて取り出す
+        deadline = time.monotonic() + self.linger
+        while row_count < self.max_batch_rows:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            row_count += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            accepted = [(rows, future) for rows, future in batch if future.set_running_or_notify_cancel()]
+            try:
+                storage.append_rows([row for rows, _ in accepted for row in rows], self.log_file)
+            except Exception as e:
+                for _, future in accepted:
+                    future.set_exception(e)
+            else:
+                for rows, future in accepted:
+                    future.set_result(len(rows))
+
+
+def get_writer(log_file=storage.LOG_FILE):
+    with _writers_lock:
+        writer = _writers.get(log_file)
+        if writer is None:
+            writer = _writers[log_file] = LogWriter(log_file)
+        return writer
+
+
+# 保存して書き込み完了まで待つ（UIからの保存用）
+def save_rows(rows, log_file=storage.LOG_FILE, timeout=30):
+    future = get_writer(log_file).submit(rows, timeout=timeout)
+    return future.result(timeout=timeout)
@@ -0,0 +1,97 @@
+import io
+
+import pandas as pd
+
+# 1回に DataFrame にする行数（メモリ使用量はこの行数分で一定）
+BATCH_ROWS = 10_000
+
+DATE_COLUMNS = ["日付"]
+NUMERIC_COLUMNS = ["set", "回数", "総負荷量", "体重"]
+
+
+# 読み込み専用モードで開く（シート全体をメモリに展開せず、行を順に読む）
+def _open(source):
+    # openpyxl はExcelを読む時だけ読み込む
+    from openpyxl import load_workbook
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    return load_workbook(source, read_only=True, data_only=True)
+
+
+def _names(header_row):
+    return ["" if value is None else str(value) for value in header_row]
+
+
+# 先頭行（列名）だけを読む
+def header(source):
+    workbook = _open(source)
+    try:
+        first = next(workbook.active.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        return [name for name in _names(first) if name]
+    finally:
+        workbook.close()
+
+
+# ログの列の型を揃える（日付は datetime、数値の列は数値。変換できない値は NaN）
+def _typed(df):
+    for column in DATE_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], errors="coerce")
+    for column in NUMERIC_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors="coerce")
+    return df
+
+
+# シートを batch_rows 行ずつの DataFrame で返す
+# columns: 読み込む列（指定した列だけを取り出す）、max_rows: この行数を読んだら打ち切る
+# typed=False の場合はセルの値をそのまま返す（書き戻す処理用）
+def iter_batches(source, columns=None, batch_rows=BATCH_ROWS, max_rows=None, typed=True):
+    workbook = _open(source)
+    try:
+        sheet = workbook.active
+        names = _names(next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), ()))
+        if columns is None:
+            columns = [name for name in names if name]
+        positions = [names.index(column) if column in names else None for column in columns]
+        used = [p for p in positions if p is not None]
+        # 指定した列より右の列はセルを作らない
+        max_col = max(used) + 1 if used else 1
+
+        batch = []
+        read = 0
+        for row in sheet.iter_rows(min_row=2, max_col=max_col, values_only=True):
+            if max_rows is not None and read >= max_rows:
+                break
+            # 空行（書式だけ残った行など）は読み飛ばす
+            if all(value is None for value in row):
+                continue
+            batch.append(row)
+            read += 1
+            if len(batch) >= batch_rows:
+                yield _to_frame(batch, columns, positions, typed)
+                batch = []
+        if batch:
+            yield _to_frame(batch, columns, positions, typed)
+    finally:
+        workbook.close()
+
+
+def _to_frame(batch, columns, positions, typed):
+    data = {}
+    for column, position in zip(columns, positions):
+        if position is None:
+            data[column] = [None] * len(batch)
+        else:
+            data[column] = [row[position] if position < len(row) else None for row in batch]
+    df = pd.DataFrame(data, columns=columns)
+    return _typed(df) if typed else df
+
+
+# シート全体を1つの DataFrame で返す
+def read_frame(source, columns=None, max_rows=None, typed=True):
+    batches = list(iter_batches(source, columns=columns, max_rows=max_rows, typed=typed))
+    if not batches:
+        return pd.DataFrame(columns=columns if columns is not None else header(source))
+    return pd.concat(batches, ignore_index=True) if len(batches) > 1 else batches[0]
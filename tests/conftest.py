@@ -0,0 +1,35 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# リポジトリのルート（app.py と同じ場所）から core を読み込む
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import columnar  # noqa: E402
+
+
+# 同じ値・欠損を多く含む型付きのログ（同じ seed なら同じ内容）
+def make_typed_log(rows=500, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.Series(pd.Timestamp("2024-04-01") + pd.to_timedelta(rng.integers(0, 90, rows), unit="D"))
+    dates[rng.random(rows) < 0.05] = pd.NaT
+    df = pd.DataFrame({
+        "日付": dates,
+        "プログラム名": rng.choice(["①", "②", "③", None], rows),
+        "名前": rng.choice(["選手01", "選手02", "選手03"], rows),
+        "エクササイズ名": rng.choice(["Back Squat", "Bench Press", "CMJ"], rows),
+        "set": rng.integers(1, 5, rows),
+        "負荷": rng.choice(["60.0kg", "80.0%", "体重", None], rows),
+        "回数": np.where(rng.random(rows) < 0.1, np.nan, rng.integers(1, 10, rows)),
+        "総負荷量": np.where(rng.random(rows) < 0.1, np.nan, rng.integers(0, 20, rows) * 50.0),
+        "体重": 70.0,
+    })
+    return columnar.to_typed(df)
+
+
+@pytest.fixture
+def typed_log():
+    return make_typed_log
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import columnar
+
+
+def _expected(df, start, end):
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= (df["日付"] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (df["日付"] <= pd.Timestamp(end)).to_numpy()
+    return np.flatnonzero(mask).tolist()
+
+
+RANGES = [
+    (None, None),
+    ("2024-05-01", None),  # 今週・今月（終了日なし）
+    (None, "2024-05-01"),
+    ("2024-05-01", "2024-05-31"),
+    ("2024-08-01", "2024-12-31"),
+]
+
+
+@pytest.mark.parametrize("start,end", RANGES)
+def test_date_range_positions_match_mask(typed_log, start, end):
+    df = typed_log(1000, seed=1)
+    positions = columnar.date_range_positions(columnar.date_index(df), start, end)
+    if start is None and end is None:
+        assert sorted(positions.tolist()) == list(range(len(df)))
+    else:
+        assert sorted(positions.tolist()) == _expected(df, start, end)
+
+
+@pytest.mark.parametrize("start,end", RANGES[1:])
+def test_extended_index_excludes_undated_rows(typed_log, start, end):
+    base = typed_log(500, seed=2)
+    # 日付のない行を含む行が後から追加された場合
+    added = typed_log(50, seed=3)
+    added.loc[0, "日付"] = pd.NaT
+    df = columnar.concat_typed([base, added])
+    index = columnar.extend_date_index(columnar.date_index(base), df)
+    assert sorted(columnar.date_range_positions(index, start, end).tolist()) == _expected(df, start, end)
@@ -0,0 +1,60 @@
+import pandas as pd
+
+from core import cache, importer, loads, storage
+
+
+def _upload(*rows):
+    return pd.DataFrame([{
+        "日付": "2024-05-01", "プログラム名": "①", "名前": "選手01", "エクササイズ名": "Back Squat",
+        "set": 1, "負荷": "60kg", "回数": 5, "総負荷量": None, "体重": 70.0, **row,
+    } for row in rows])
+
+
+def test_missing_volumes_are_computed_like_saved_rows(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame([{"名前": "選手01", "エクササイズ名": "Back Squat", "1RM": 100.0}]).to_csv("one_rm.csv", index=False)
+    df = _upload({"負荷": "80%"}, {"負荷": "体重", "set": 2}, {"負荷": "60kg", "set": 3}, {"総負荷量": 123.0, "set": 4})
+    normalized, rejected = importer.normalize_batch(df)
+    assert rejected == 0
+    saved = loads.log_rows([dict(row, 日付=None) for row in df.to_dict("records")[:3]])
+    assert normalized["総負荷量"].tolist() == [row["総負荷量"] for row in saved] + [123.0]
+    assert normalized["総負荷量"].tolist() == [400.0, 350.0, 300.0, 123.0]
+
+
+def _csv(df):
+    return df.to_csv(index=False).encode("utf-8-sig")
+
+
+def test_import_skips_existing_and_in_file_duplicates(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "BACKEND", "xlsx")
+    monkeypatch.setattr(storage, "compact_async", lambda log_file: None)
+    log_file = str(tmp_path / "training_log.xlsx")
+    first = importer.import_log(_csv(_upload({"set": 1}, {"set": 2})), "log.csv", log_file)
+    assert first == {"rows": 2, "inserted": 2, "duplicates": 0, "rejected": 0}
+
+    upload = _upload(
+        {"set": 1},  # 既存の行と同じ
+        {"set": "2.0", "回数": 5.0, "日付": "2024/05/01 18:30"},  # 5 と 5.0、日付の時刻と書式の違いは同じ行
+        {"set": 3, "名前": " 選手01 "},
+        {"set": 3},  # ファイル内の重複
+        {"set": 4, "プログラム名": "②"},
+        {"set": 4},  # プログラム名は比べない
+        {"set": 5, "日付": None},
+        {"set": 6, "名前": None},
+        {"set": 7, "エクササイズ名": ""},
+        {"set": "a"},
+        {"set": 8, "回数": "多め"},
+        {"set": 9, "日付": "不明"},
+    )
+    counts = importer.import_log(_csv(upload), "log.csv", log_file)
+    assert counts == {"rows": 12, "inserted": 2, "duplicates": 4, "rejected": 6}
+
+    cache.invalidate()
+    saved = storage.read_log(log_file)
+    assert saved["set"].tolist() == [1, 2, 3, 4]
+    assert saved["名前"].tolist() == ["選手01"] * 4
+    assert saved["プログラム名"].tolist() == ["①", "①", "①", "②"]
+    # 2回目の取り込みでは全て重複
+    again = importer.import_log(_csv(upload), "log.csv", log_file)
+    assert again["inserted"] == 0 and again["duplicates"] == 6
+    storage._reset_tail(log_file)
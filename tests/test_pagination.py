@@ -0,0 +1,22 @@
+import pandas as pd
+import pytest
+
+from core.pagination import page_slice
+
+# 過去ログ検索の表に出す列
+DISPLAY_COLUMNS = ['日付', 'プログラム名', '名前', 'エクササイズ名', 'set', '負荷', '回数', '総負荷量']
+
+
+@pytest.mark.parametrize("ascending", [True, False])
+@pytest.mark.parametrize("sort_by", DISPLAY_COLUMNS)
+def test_page_slice_matches_stable_sort(typed_log, sort_by, ascending):
+    df = typed_log()
+    before = df.copy()
+    expected = df.sort_values(sort_by, ascending=ascending, kind="mergesort", na_position="last")
+    page_size = 25
+    for page in [1, 2, 7, 20]:
+        got = page_slice(df, page, page_size, sort_by=sort_by, ascending=ascending)
+        start = (page - 1) * page_size
+        assert got.index.tolist() == expected.index[start:start + page_size].tolist()
+    # 共有している型付きのログは書き換えない
+    pd.testing.assert_frame_equal(df, before)
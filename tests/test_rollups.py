@@ -0,0 +1,42 @@
+import pandas as pd
+
+from core import rollups
+
+
+def _rows(*sets):
+    return pd.DataFrame([{
+        "日付": day, "プログラム名": "①", "名前": "選手01", "エクササイズ名": "Back Squat",
+        "set": i + 1, "負荷": load, "回数": reps, "総負荷量": 0.0, "体重": None,
+    } for i, (day, load, reps) in enumerate(sets)])
+
+
+def test_best_load_ignores_sets_without_reps(tmp_path):
+    df = _rows(("2024-05-01", "100kg", 5), ("2024-05-02", "120kg", None))
+    record = rollups.exercise_records_of(df).iloc[0]
+    assert record["best_load"] == 100.0
+    assert record["best_load_reps"] == 5
+
+    # 保存のたびに足し込んだ場合も同じ
+    db_file = str(tmp_path / "rollups.db")
+    rollups.clear(db_file)
+    for i in range(len(df)):
+        rollups.apply_rows(db_file, df.iloc[[i]])
+    stored = rollups.exercise_record(db_file, "選手01", "Back Squat")
+    assert stored["best_load"] == 100.0
+    assert stored["best_load_reps"] == 5
+
+
+def test_percent_loads_use_the_one_rm_table(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame([{"名前": "選手01", "エクササイズ名": "Back Squat", "1RM": 150.0}]).to_csv("one_rm.csv", index=False)
+    df = _rows(("2024-05-01", "100kg", 5), ("2024-05-02", "80%", 5))
+    record = rollups.exercise_records_of(df).iloc[0]
+    assert record["best_load"] == 120.0
+    assert record["best_load_date"] == "2024-05-02"
+    assert record["best_epley"] == 120.0 * (1 + 5 / 30)
+    assert rollups.aggregate(df)["max_load"].tolist() == [100.0, 120.0]
+
+    db_file = str(tmp_path / "rollups.db")
+    rollups.rebuild(db_file, df.iloc[[0]])
+    found = rollups.new_records(db_file, df.iloc[[1]])
+    assert {(r["kind"], r["value"]) for r in found} >= {("load", 120.0)}
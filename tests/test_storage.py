@@ -0,0 +1,156 @@
+import json
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import cache, storage
+
+
+def _row(i):
+    return {
+        "日付": date(2024, 5, 1), "プログラム名": "①", "名前": "選手01", "エクササイズ名": "Back Squat",
+        "set": i, "負荷": "60.0kg", "回数": 5, "総負荷量": 300.0, "体重": None,
+    }
+
+
+def test_append_succeeds_when_journal_is_moved_after_write(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "BACKEND", "xlsx")
+    log_file = str(tmp_path / "training_log.xlsx")
+    flushed = []
+
+    # 追記の直後（ジャーナルのロックを離した後）に反映処理がジャーナルを退避した場合
+    def move_journal(rows, log_file, source_before):
+        os.replace(storage.journal_path(log_file), storage.compacting_path(log_file))
+
+    monkeypatch.setattr(storage, "_apply_rollups", move_journal)
+    monkeypatch.setattr(storage, "COMPACT_THRESHOLD_BYTES", 1)
+    monkeypatch.setattr(storage, "compact_async", flushed.append)
+    assert storage.append_rows([_row(1), _row(2)], log_file) == 2
+    assert flushed == [log_file]
+    assert storage.pending_journal_rows(log_file) == 2
+
+
+def _day_row(i, day, name):
+    return dict(_row(i), 日付=date(2024, 5, day), 名前=name)
+
+
+ROWS = [_day_row(i, day, name) for i, (day, name) in enumerate(
+    [(3, "選手02"), (1, "選手01"), (3, "選手01"), (2, "選手03"), (1, "選手02")], start=1)]
+MORE = [_day_row(i, day, name) for i, (day, name) in enumerate(
+    [(2, "選手01"), (1, "選手04"), (3, "選手02"), (4, "選手01")], start=6)]
+
+
+def _use_log(backend, tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "BACKEND", backend)
+    monkeypatch.setattr(storage, "compact_async", lambda log_file: None)
+    log_file = str(tmp_path / "training_log.xlsx")
+    yield log_file
+    storage._reset_tail(log_file)
+    cache.invalidate()
+
+
+@pytest.fixture(params=["xlsx", "sqlite"])
+def log_file(request, tmp_path, monkeypatch):
+    yield from _use_log(request.param, tmp_path, monkeypatch)
+
+
+@pytest.fixture
+def xlsx_log(tmp_path, monkeypatch):
+    yield from _use_log("xlsx", tmp_path, monkeypatch)
+
+
+def _full_load(log_file):
+    storage._reset_tail(log_file)
+    cache.invalidate()
+    return storage._typed_log_with_index(log_file)
+
+
+# 追記分だけを足した型付きログと索引が、全件を読み直した結果と一致するか
+def _assert_matches_full_load(log_file):
+    cache.invalidate()
+    frame, index = storage._typed_log_with_index(log_file)
+    fresh, fresh_index = _full_load(log_file)
+    pd.testing.assert_frame_equal(frame, fresh)
+    assert index["rows"] == fresh_index["rows"] == len(fresh)
+    np.testing.assert_array_equal(index["order"], fresh_index["order"])
+    np.testing.assert_array_equal(index["key"], fresh_index["key"])
+    return frame
+
+
+def _count_full_loads(monkeypatch):
+    calls = []
+    if storage.use_sqlite():
+        read_since = storage.sqlite_store.read_since
+        monkeypatch.setattr(storage.sqlite_store, "read_since", lambda db, after, upto: calls.append(after) or read_since(db, after, upto))
+        return lambda: calls.count(0)
+    read_base = storage._read_typed_base
+    monkeypatch.setattr(storage, "_read_typed_base", lambda log_file: calls.append(log_file) or read_base(log_file))
+    return lambda: len(calls)
+
+
+def test_appended_rows_extend_the_loaded_log(log_file, monkeypatch):
+    storage.append_rows(ROWS, log_file)
+    storage._typed_log_with_index(log_file)
+    full_loads = _count_full_loads(monkeypatch)
+    storage.append_rows(MORE[:2], log_file)
+    storage._typed_log_with_index(log_file)
+    storage.append_rows(MORE[2:], log_file)
+    frame = _assert_matches_full_load(log_file)
+    # 最後の確認の全件読み込み以外は追記分だけを読む
+    assert full_loads() == 1
+    assert len(frame) == len(ROWS) + len(MORE)
+
+
+def test_partial_last_journal_line_is_read_once_complete(xlsx_log):
+    log_file = xlsx_log
+    storage.append_rows(ROWS, log_file)
+    storage._typed_log_with_index(log_file)
+    line = json.dumps(MORE[0], ensure_ascii=False, default=storage._json_default).encode("utf-8")
+    with open(storage.journal_path(log_file), "ab") as f:
+        f.write(line[:10])
+    cache.invalidate()
+    assert len(storage._typed_log_with_index(log_file)[0]) == len(ROWS)
+    with open(storage.journal_path(log_file), "ab") as f:
+        f.write(line[10:] + b"\n")
+    assert len(_assert_matches_full_load(log_file)) == len(ROWS) + 1
+
+
+def test_compaction_reloads_and_later_appends_extend(xlsx_log):
+    log_file = xlsx_log
+    storage.append_rows(ROWS, log_file)
+    storage._typed_log_with_index(log_file)
+    storage.compact_journal(log_file)
+    assert len(_assert_matches_full_load(log_file)) == len(ROWS)
+    # 反映後の新しいジャーナルは先頭から読む
+    storage.append_rows(MORE, log_file)
+    assert len(_assert_matches_full_load(log_file)) == len(ROWS) + len(MORE)
+
+
+def test_replace_and_delete_reload_the_log(log_file):
+    storage.append_rows(ROWS, log_file)
+    storage._typed_log_with_index(log_file)
+    storage.replace_log(pd.DataFrame(MORE, columns=storage.LOG_COLUMNS), log_file)
+    frame = _assert_matches_full_load(log_file)
+    assert frame["set"].tolist() == [row["set"] for row in MORE]
+    storage.append_rows(ROWS[:2], log_file)
+    assert len(_assert_matches_full_load(log_file)) == len(MORE) + 2
+
+    storage.delete_log(log_file)
+    assert len(_assert_matches_full_load(log_file)) == 0
+    storage.append_rows(ROWS[2:], log_file)
+    assert len(_assert_matches_full_load(log_file)) == len(ROWS) - 2
+
+
+def test_csv_fallback_restores_only_rows_missing_from_the_log(xlsx_log):
+    log_file = xlsx_log
+    storage.append_rows(ROWS[:2], log_file)
+    storage.compact_journal(log_file)
+    # CSVでは回数が 5.0 に、日付が時刻付きになっている
+    csv_df = pd.DataFrame(ROWS[:3], columns=storage.LOG_COLUMNS).assign(回数=5.0, 日付=lambda df: pd.to_datetime(df["日付"]) + pd.Timedelta(hours=9))
+    csv_df.to_csv(storage.fallback_csv_path(log_file), index=False, encoding="utf-8-sig")
+    assert storage.reconcile_csv_fallback(log_file) == 1
+    assert storage.pending_journal_rows(log_file) == 1
+    assert storage.read_journal(log_file)["set"].tolist() == [ROWS[2]["set"]]
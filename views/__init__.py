@@ -0,0 +1,14 @@
+import importlib
+
+# ページ名 → ページのモジュール（選択されたページだけを読み込んで実行する）
+PAGES = {
+    "プログラム一覧": "views.program_list",
+    "Training Log 入力": "views.log_input",
+    "過去ログ検索": "views.log_search",
+    "負荷モニタリング": "views.load_monitoring",
+    "データ管理": "views.data_admin",
+}
+
+
+def render(page):
+    importlib.import_module(PAGES[page]).render()
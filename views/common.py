@@ -0,0 +1,127 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from core import loads, perf, storage, writer
+from core.storage import LOG_FILE, PROGRAM_FILE
+
+# 複数のページで使う読み込み・保存処理
+
+# プログラムファイルの読み込み
+def load_program_file():
+    try:
+        if os.path.exists(PROGRAM_FILE):
+            # 全セッション共通のキャッシュから読み込み（ファイルが変わった時だけ再読み込み）
+            with perf.stage("プログラム読み込み") as timing:
+                program_df = storage.read_program(PROGRAM_FILE)
+                timing.rows = len(program_df)
+            return program_df
+        else:
+            # サンプルファイルを作成
+            sample_df = pd.DataFrame({
+                'Program': ['①', '①', '①', '②', '②', '③'],
+                'No': ['WU', 1, 2, 'WU', 1, 1],
+                'Exercise': ['Dynamic Stretch', 'Back Squat', 'Bench Press', 'Light Jog', 'Sprint 20m', 'Vertical Jump'],
+                'set': [1, 4, 3, 1, 5, 3],
+                'load': ['-', 0.8, 0.75, '-', '-', '-'],
+                'rep': [10, 8, 10, 5, 1, 10],
+                'Point': ['全身をほぐす', '膝をつま先の方向に', 'バーパスに注意', '軽く温める', '全力疾走', '着地を意識']
+            })
+            storage.replace_program(sample_df, PROGRAM_FILE)
+            return sample_df
+    except Exception as e:
+        st.error(f"プログラムファイルの読み込みエラー: {e}")
+        return pd.DataFrame()
+
+# ログファイルの読み込み（型付きミラー + 未反映のジャーナル）
+def load_training_log():
+    if storage.log_exists(LOG_FILE):
+        try:
+            with perf.stage("ログ読み込み") as timing:
+                df = storage.read_typed_log(LOG_FILE)
+                timing.rows = len(df)
+            st.sidebar.info(f"📊 ログファイル読み込み完了: {len(df)}件")
+            return df
+        except Exception as e:
+            st.sidebar.error(f"❌ ログファイル読み込みエラー: {e}")
+            # 以前のCSVファイルがある場合は代替読み込み（通常は起動時にジャーナルへ取り込み済み）
+            csv_file = storage.fallback_csv_path(LOG_FILE)
+            if os.path.exists(csv_file):
+                try:
+                    df = pd.read_csv(csv_file, encoding='utf-8-sig')
+                    df = storage.merge_journal(df, LOG_FILE)
+                    st.sidebar.warning(f"⚠️ CSVファイルから読み込み: {len(df)}件")
+                    return df
+                except Exception as csv_error:
+                    st.sidebar.error(f"❌ CSV読み込みも失敗: {csv_error}")
+            return storage.merge_journal(storage.empty_log(), LOG_FILE)
+    else:
+        return storage.empty_log()
+
+# ログの統計（日ごとの集計テーブルから求める）
+def load_log_stats():
+    try:
+        with perf.stage("ログ統計") as timing:
+            stats = storage.log_stats(LOG_FILE)
+            timing.rows = stats["rows"]
+        return stats
+    except Exception as e:
+        st.sidebar.error(f"❌ ログファイル読み込みエラー: {e}")
+        return {"rows": 0, "players": 0, "latest_date": None, "player_counts": pd.Series(dtype="int64")}
+
+# 入力された記録をログの行にする（entries: プログラム名・エクササイズ名・set・負荷・回数・体重 の辞書）
+# 総負荷量の計算は外部機器からの取り込み（core.ingest）と共通
+def make_log_rows(player_name, entries, date=None):
+    if date is None:
+        date = datetime.today().date()
+    return loads.log_rows([dict(entry, 日付=date, 名前=player_name) for entry in entries])
+
+
+# 自己ベストの種類と表示名
+RECORD_KINDS = {"load": "最大負荷", "epley": "推定1RM (Epley)", "brzycki": "推定1RM (Brzycki)"}
+
+
+# 保存する行で更新される自己ベスト（判定に失敗しても保存は続ける）
+def find_new_records(new_rows):
+    try:
+        return storage.new_records(new_rows, LOG_FILE)
+    except Exception:
+        return []
+
+
+# ログの行を1回の書き込みで保存
+def save_log_rows(new_rows):
+    # 書き込みスレッドに渡し、ジャーナルへの追記（fsync）が終わるまで待つ
+    # 同時に押された保存はまとめて1回で書き込まれ、行が失われることはない
+    try:
+        with perf.stage("保存", rows=len(new_rows)):
+            records = find_new_records(new_rows)
+            saved = writer.save_rows(new_rows, LOG_FILE)
+        st.info(f"✅ データ保存完了: {LOG_FILE} ({saved}件追加)")
+        # 自己ベストの更新は再実行後に入力ページで表示する
+        if records:
+            st.session_state.new_records = st.session_state.get('new_records', []) + records
+        return saved
+    except Exception as e:
+        st.error(f"❌ ログ保存エラー: {e}")
+        return 0
+
+
+# 入力ページのセットの記録（set_number・load・reps）をログの記録の形にする
+def sets_to_entries(program_name, exercise_name, sets_data, body_weight=None):
+    return [{
+        'プログラム名': program_name,
+        'エクササイズ名': exercise_name,
+        'set': set_data['set_number'],
+        '負荷': set_data['load'],
+        '回数': set_data['reps'],
+        '体重': body_weight,
+    } for set_data in sets_data]
+
+
+# 新しいログ保存関数（指定形式）
+def save_training_log_formatted(player_name, program_name, exercise_name, sets_data, date=None, body_weight=None):
+    entries = sets_to_entries(program_name, exercise_name, sets_data, body_weight)
+    return save_log_rows(make_log_rows(player_name, entries, date))
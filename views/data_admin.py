@@ -0,0 +1,233 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+from core import importer, perf, storage
+from core.storage import LOG_FILE, PROGRAM_FILE
+from views.common import load_log_stats, load_program_file
+
+
+# データ管理ページ
+def render():
+    st.title("データ管理")
+    
+    st.markdown("### ファイル管理")
+    
+    # 現在のファイル状況
+    col_file1, col_file2 = st.columns(2)
+    
+    with col_file1:
+        st.markdown("#### トレーニングログ")
+        if storage.log_exists(LOG_FILE):
+            st.success(f"ファイル存在 ({load_log_stats()['rows']}件のログ)")
+            
+            # 未反映のジャーナルをExcel本体へ反映
+            pending_rows = storage.pending_journal_rows(LOG_FILE)
+            if pending_rows > 0:
+                st.caption(f"Excel未反映の記録: {pending_rows}件")
+                # Excelに書けずに再試行している場合はその状況を表示
+                flush_status = storage.flush_status(LOG_FILE)
+                if flush_status["last_error"]:
+                    next_retry = flush_status["next_retry"].strftime('%H:%M:%S') if flush_status["next_retry"] else "-"
+                    st.warning(
+                        f"Excelへの反映に失敗しています（{flush_status['attempts']}回、次の再試行 {next_retry}）: "
+                        f"{flush_status['last_error']}\n\n記録はジャーナルに保存されているため失われません。"
+                    )
+                if st.button("Excelファイルに反映", type="secondary"):
+                    try:
+                        compacted = storage.compact_journal(LOG_FILE)
+                        st.success(f"{compacted}件をExcelファイルに反映しました")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"反映エラー: {e}")
+            
+            # 体重・%表記の負荷を反映して過去の総負荷量を計算し直す
+            if st.button("総負荷量を再計算", type="secondary", help="体重は記録された体重、%は1RM表（one_rm.csv）から換算します"):
+                try:
+                    updated = storage.backfill_volumes(LOG_FILE)
+                    st.success(f"{updated}件の総負荷量を再計算しました")
+                except Exception as e:
+                    st.error(f"再計算エラー: {e}")
+            
+            # Excelを直接編集した場合などに統計の集計をログ全体から作り直す
+            if st.button("集計を再作成", type="secondary"):
+                try:
+                    rebuilt = storage.rebuild_rollups(LOG_FILE)
+                    st.success(f"{rebuilt}件の集計行を作成しました")
+                except Exception as e:
+                    st.error(f"集計エラー: {e}")
+            
+            if st.button("ログファイルを削除", type="secondary"):
+                storage.delete_log(LOG_FILE)
+                st.success("ログファイルを削除しました")
+                st.rerun()
+        else:
+            st.info("ログファイルなし")
+    
+    with col_file2:
+        st.markdown("#### プログラムファイル")
+        if os.path.exists(PROGRAM_FILE):
+            program_df = load_program_file()
+            st.success(f"ファイル存在 ({len(program_df)}件のプログラム)")
+            
+            if st.button("プログラムファイルを削除", type="secondary"):
+                storage.delete_program(PROGRAM_FILE)
+                st.success("プログラムファイルを削除しました")
+                st.rerun()
+        else:
+            st.info("プログラムファイルなし")
+    
+    st.markdown("---")
+    
+    # ファイルアップロード機能
+    st.markdown("### ファイルアップロード")
+    
+    col_upload1, col_upload2 = st.columns(2)
+    
+    with col_upload1:
+        st.markdown("#### プログラムファイルアップロード")
+        uploaded_program = st.file_uploader(
+            "プログラム用Excelファイル", 
+            type=['xlsx', 'xls'],
+            key="program_upload"
+        )
+        
+        # 同じアップロードを再実行のたびに書き込まないようにする
+        if uploaded_program and st.session_state.get("program_upload_id") != uploaded_program.file_id:
+            try:
+                # アップロードされたファイルを保存
+                storage.replace_program(uploaded_program.getbuffer(), PROGRAM_FILE)
+                st.session_state.program_upload_id = uploaded_program.file_id
+                st.success("プログラムファイルをアップロードしました")
+                st.rerun()
+            except Exception as e:
+                st.error(f"アップロードエラー: {e}")
+    
+    with col_upload2:
+        st.markdown("#### ログファイルアップロード")
+        upload_mode = st.radio(
+            "取り込み方法",
+            ["既存のログに追加（重複は除く）", "既存のログを置き換え"],
+            key="log_upload_mode",
+            help="追加では日付・名前・エクササイズ名・set・負荷・回数が同じ行を重複として取り込みません"
+        )
+        uploaded_log = st.file_uploader(
+            "ログ用Excel・CSVファイル", 
+            type=['xlsx', 'xls', 'csv'],
+            key="log_upload"
+        )
+        
+        if uploaded_log and st.session_state.get("log_upload_id") != uploaded_log.file_id:
+            try:
+                # 取り込む前に列名（先頭行）だけを読んで確認
+                missing_columns = [c for c in importer.REQUIRED_COLUMNS if c not in importer.header(uploaded_log.getbuffer(), uploaded_log.name)]
+                if missing_columns:
+                    raise ValueError(f"必要な列がありません: {', '.join(missing_columns)}")
+                if upload_mode == "既存のログを置き換え":
+                    if importer.is_csv(uploaded_log.name):
+                        raise ValueError("置き換えはExcelファイルのみ対応しています")
+                    # アップロードされたファイルで置き換え（未反映のジャーナルも破棄）
+                    storage.replace_log(uploaded_log.getbuffer(), LOG_FILE)
+                    st.session_state.log_upload_id = uploaded_log.file_id
+                    st.success("ログファイルをアップロードしました")
+                    st.rerun()
+                else:
+                    # 一定の行数ずつ読み、既存のログにない行だけを追加
+                    status = st.empty()
+                    with perf.stage("ログの取り込み") as timing:
+                        counts = importer.import_log(
+                            uploaded_log.getbuffer(),
+                            uploaded_log.name,
+                            LOG_FILE,
+                            progress=lambda c: status.caption(f"取り込み中... {c['rows']}行（追加 {c['inserted']}件）")
+                        )
+                        timing.rows = counts["rows"]
+                    status.empty()
+                    st.session_state.log_upload_id = uploaded_log.file_id
+                    st.success(
+                        f"ログを取り込みました: 追加 {counts['inserted']}件、"
+                        f"重複 {counts['duplicates']}件、不正な行 {counts['rejected']}件"
+                    )
+            except Exception as e:
+                st.error(f"アップロードエラー: {e}")
+    
+    st.markdown("---")
+    
+    # サンプルファイル作成
+    st.markdown("### サンプルファイル作成")
+    
+    col_sample1, col_sample2 = st.columns(2)
+    
+    with col_sample1:
+        if st.button("サンプルプログラムファイル作成"):
+            sample_program_df = pd.DataFrame({
+                'Program': ['①', '①', '①', '②', '②', '③'],
+                'No': ['WU', 1, 2, 'WU', 1, 1],
+                'Exercise': ['Dynamic Stretch', 'Back Squat', 'Bench Press', 'Light Jog', 'Sprint 20m', 'Vertical Jump'],
+                'set': [1, 4, 3, 1, 5, 3],
+                'load': ['-', 0.8, 0.75, '-', '-', '-'],
+                'rep': [10, 8, 10, 5, 1, 10],
+                'Point': ['全身をほぐす', '膝をつま先の方向に', 'バーパスに注意', '軽く温める', '全力疾走', '着地を意識']
+            })
+            storage.replace_program(sample_program_df, PROGRAM_FILE)
+            st.success("サンプルプログラムファイルを作成しました")
+            st.rerun()
+    
+    with col_sample2:
+        if st.button("空のログファイル作成"):
+            storage.replace_log(storage.empty_log(), LOG_FILE)
+            st.success("空のログファイルを作成しました")
+            st.rerun()
+    
+    st.markdown("---")
+    
+    # データ統計
+    st.markdown("### データ統計")
+    
+    if storage.log_exists(LOG_FILE):
+        log_stats = load_log_stats()
+        if log_stats["rows"] > 0:
+            col_stat1, col_stat2, col_stat3 = st.columns(3)
+            
+            with col_stat1:
+                st.metric("総ログ数", log_stats["rows"])
+            
+            with col_stat2:
+                st.metric("登録選手数", log_stats["players"])
+            
+            with col_stat3:
+                if log_stats["latest_date"] is not None:
+                    latest_date = log_stats["latest_date"].strftime('%Y/%m/%d')
+                    st.metric("最新記録日", latest_date)
+            
+            # 選手別統計
+            if len(log_stats["player_counts"]) > 0:
+                st.markdown("#### 選手別ログ数")
+                st.bar_chart(log_stats["player_counts"])
+    
+    st.markdown("---")
+    
+    # 処理時間（このプロセスの直近の再実行をページ・区間ごとに集計）
+    st.markdown("### 処理時間")
+    perf_runs = perf.recent_runs()
+    if perf_runs:
+        st.caption(f"直近{len(perf_runs)}回の再実行（全件は {perf.PERF_FILE} に保存）")
+        st.dataframe(perf.breakdown(perf_runs), use_container_width=True, hide_index=True)
+    else:
+        st.info(f"計測データがありません。サイドバーの「処理時間を計測」をオンにするか、環境変数 {perf.ENV_VAR}=1 で起動してください。")
+    
+    st.markdown("---")
+    
+    # システム情報
+    st.markdown("### システム情報")
+    st.info("""
+    **バスケットボール トレーニングシステム v1.0**
+    
+    - トレーニングプログラムの管理
+    - 個別ログの記録
+    - 過去データの検索・分析
+    - データのインポート・エクスポート
+    
+    **サポートファイル形式:** Excel (.xlsx, .xls), CSV
+    """)
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from core import monitoring, perf, storage
+from core.storage import LOG_FILE
+from views.common import load_log_stats
+
+# 表に出す指標と列名
+METRIC_LABELS = {
+    "load": "日負荷",
+    "acute": "急性負荷(7日平均)",
+    "chronic": "慢性負荷(28日平均)",
+    "acwr": "ACWR",
+    "ewma_acute": "EWMA急性",
+    "ewma_chronic": "EWMA慢性",
+    "ewma_ratio": "EWMA比",
+    "weekly": "週負荷",
+    "monotony": "単調性",
+    "strain": "ストレイン",
+}
+
+# 選手別の推移で表示する日数の選択肢
+HISTORY_DAYS = [28, 90, 180, 365]
+
+
+def _acwr_status(acwr):
+    if pd.isna(acwr):
+        return ""
+    if acwr > monitoring.ACWR_HIGH:
+        return "⚠️ 高い"
+    if acwr < monitoring.ACWR_LOW:
+        return "低い"
+    return "適正"
+
+
+# 負荷モニタリングページ（全選手の ACWR・EWMA・単調性・ストレイン）
+def render():
+    st.title("負荷モニタリング")
+
+    log_stats = load_log_stats()
+    if log_stats["rows"] == 0:
+        st.info("まだログデータがありません。")
+        st.stop()
+
+    # 日ごとの総負荷量から全選手分をまとめて計算（保存で変わった日だけを計算し直す）
+    try:
+        with perf.stage("負荷指標の計算") as timing:
+            state = storage.training_load(LOG_FILE)
+            timing.rows = state["raw"].size
+    except Exception as e:
+        st.error(f"負荷指標の計算エラー: {e}")
+        st.stop()
+
+    dates = state["raw"].index
+    if len(dates) == 0:
+        st.info("日付のある記録がありません。")
+        st.stop()
+
+    st.caption(
+        f"ACWR = 急性負荷({monitoring.ACUTE_DAYS}日平均) ÷ 慢性負荷({monitoring.CHRONIC_DAYS}日平均)、"
+        f"EWMA比 = EWMA({monitoring.ACUTE_DAYS}日) ÷ EWMA({monitoring.CHRONIC_DAYS}日)、"
+        f"単調性 = 週平均 ÷ 週標準偏差、ストレイン = 週負荷 × 単調性。"
+        f"ACWR {monitoring.ACWR_LOW}〜{monitoring.ACWR_HIGH} の外を注意として表示します。"
+    )
+
+    # 基準日の全選手の指標
+    st.markdown("### 選手一覧")
+    today = datetime.today().date()
+    default_day = min(today, dates[-1].date())
+    selected_day = st.date_input("基準日", value=default_day, min_value=dates[0].date(), max_value=dates[-1].date())
+
+    with perf.stage("選手一覧") as timing:
+        roster = monitoring.snapshot(state, selected_day)
+        timing.rows = len(roster)
+
+    if len(roster) == 0:
+        st.info("この日までに記録のある選手がいません。")
+    else:
+        roster = roster.sort_values("acwr", ascending=False)
+        display_df = roster.rename(columns=METRIC_LABELS).round(2)
+        display_df.insert(0, "判定", roster["acwr"].map(_acwr_status))
+        display_df.index.name = "選手名"
+
+        col_stat1, col_stat2, col_stat3 = st.columns(3)
+        with col_stat1:
+            st.metric("選手数", len(roster))
+        with col_stat2:
+            st.metric(f"ACWR {monitoring.ACWR_HIGH}超", int((roster["acwr"] > monitoring.ACWR_HIGH).sum()))
+        with col_stat3:
+            st.metric(f"ACWR {monitoring.ACWR_LOW}未満", int((roster["acwr"] < monitoring.ACWR_LOW).sum()))
+
+        st.dataframe(display_df, use_container_width=True)
+
+    # 選手別の推移
+    st.markdown("### 選手別の推移")
+    col1, col2 = st.columns(2)
+    with col1:
+        player = st.selectbox("選手名", list(state["raw"].columns), key="monitoring_player")
+    with col2:
+        days = st.selectbox("期間", HISTORY_DAYS, index=1, format_func=lambda d: f"直近{d}日", key="monitoring_days")
+
+    end = pd.Timestamp(selected_day)
+    history = monitoring.player_history(state, player, start=end - timedelta(days=days - 1), end=end)
+    if len(history) == 0:
+        st.info("この期間の記録がありません。")
+    else:
+        st.markdown("#### 日負荷")
+        st.bar_chart(history["load"].rename(METRIC_LABELS["load"]))
+        st.markdown("#### ACWR・EWMA比")
+        st.line_chart(history[["acwr", "ewma_ratio"]].rename(columns=METRIC_LABELS))
+        st.markdown("#### 単調性・ストレイン")
+        col_chart1, col_chart2 = st.columns(2)
+        with col_chart1:
+            st.line_chart(history["monotony"].rename(METRIC_LABELS["monotony"]))
+        with col_chart2:
+            st.line_chart(history["strain"].rename(METRIC_LABELS["strain"]))
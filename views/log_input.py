@@ -0,0 +1,632 @@
+import pandas as pd
+import streamlit as st
+
+from core import perf, program_index, storage
+from core.storage import LOG_FILE, PROGRAM_FILE
+from views.common import RECORD_KINDS, load_program_file, make_log_rows, save_log_rows, save_training_log_formatted, sets_to_entries
+
+# セッションの記録として表示・編集する列
+STAGED_COLUMNS = ['プログラム名', 'エクササイズ名', 'set', '負荷', '回数', '体重']
+
+
+# 完了した種目をセッションの記録に加える（同じプログラム・種目をやり直した場合は置き換える）
+def stage_exercise(entries):
+    replaced = {(entry['プログラム名'], entry['エクササイズ名']) for entry in entries}
+    kept = [entry for entry in st.session_state.staged_sets if (entry['プログラム名'], entry['エクササイズ名']) not in replaced]
+    st.session_state.staged_sets = kept + entries
+    st.session_state.staged_version += 1
+
+
+# セッションの記録を表で表示し、修正・削除を反映する
+def edit_staged_sets():
+    staged_df = pd.DataFrame(st.session_state.staged_sets, columns=STAGED_COLUMNS)
+    edited_df = st.data_editor(
+        staged_df,
+        key=f"staged_editor_{st.session_state.staged_version}",
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+    )
+    edited = edited_df.astype(object).where(edited_df.notna(), None).to_dict('records')
+    if edited != st.session_state.staged_sets:
+        # 編集後の内容を新しい元データにして、次の再実行では新しい表として表示する
+        st.session_state.staged_sets = edited
+        st.session_state.staged_version += 1
+
+
+# Training Log 入力ページ
+def render():
+    st.title("Training Log 入力")
+    
+    # プログラムファイルを読み込み
+    program_df = load_program_file()
+    
+    if len(program_df) == 0:
+        st.error("プログラムデータを読み込めませんでした。")
+        st.stop()
+    
+    # 選手名入力をスタイリッシュに
+    st.markdown("""
+    <div style="
+        background: linear-gradient(135deg, #2C3E50 0%, #34495E 100%);
+        padding: 15px 20px;
+        border-radius: 12px;
+        margin: 15px 0;
+        text-align: center;
+        box-shadow: 0 6px 20px rgba(44, 62, 80, 0.25);
+        border: 1px solid rgba(255, 255, 255, 0.1);
+    ">
+        <h2 style="
+            color: #ECF0F1; 
+            margin: 0; 
+            font-size: 24px;
+            font-weight: 600;
+            text-shadow: 0 2px 4px rgba(0,0,0,0.3);
+            letter-spacing: 0.8px;
+        ">
+            TRAINING LOG INPUT
+        </h2>
+        <p style="
+            color: #BDC3C7; 
+            margin: 8px 0 0 0; 
+            font-size: 14px;
+            font-weight: 300;
+        ">
+            トレーニング記録を入力
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    player_name = st.text_input("選手名", key="player_name", placeholder="例: 田中太郎")
+    
+    # 直前の保存で更新された自己ベスト
+    for record in st.session_state.pop('new_records', []):
+        st.success(
+            f"🏆 自己ベスト更新！ {record['player']} {record['exercise']} "
+            f"{RECORD_KINDS[record['kind']]}: {record['value']:.1f}kg（これまで {record['previous']:.1f}kg）"
+        )
+    
+    # 体重入力
+    body_weight = st.number_input("体重 (kg)", min_value=30.0, max_value=200.0, value=70.0, step=0.1, key="body_weight")
+    
+    # 完了した種目はセッションに記録し、「全プログラム完了」でまとめて1回で保存する
+    session_mode = st.checkbox(
+        "全プログラム完了でまとめて保存",
+        value=True,
+        key="session_mode",
+        help="オフにすると種目ごとの「完了」ですぐにログへ保存します"
+    )
+    if 'staged_sets' not in st.session_state:
+        st.session_state.staged_sets = []
+        st.session_state.staged_version = 0
+    
+    # 利用可能なプログラム一覧を表示
+    with perf.stage("プログラム索引"):
+        index = program_index.load(PROGRAM_FILE)
+    available_programs = index.names
+    
+    st.markdown("### プログラム選択")
+    selected_program = st.selectbox(
+        "実行するプログラム", 
+        available_programs,
+        help="エクセルで設定されたトレーニングプログラムから選択"
+    )
+    
+    if selected_program:
+        # 選択されたプログラムの種目（エクセルの順序を保持、同じエクササイズはまとめ済み）
+        program = index.programs[selected_program]
+        grouped_exercises = program.exercises
+        
+        st.markdown(f"### プログラム {selected_program}")
+        
+        # ウォーミングアップの表示（WU、ST、PLを含む）
+        if len(program.warmups) > 0:
+            st.markdown("#### ウォーミングアップ・補助種目")
+            for warmup in program.warmups:
+                if warmup.summary_ja:
+                    st.markdown(f"• {warmup.type_prefix}**{warmup.exercise}** - {warmup.summary_ja}")
+                else:
+                    st.markdown(f"• {warmup.type_prefix}**{warmup.exercise}**")
+                
+                # ポイントがあれば表示
+                if warmup.point is not None:
+                    st.markdown(f"  POINT: {warmup.point}")
+            
+            st.markdown("---")
+        
+        st.markdown("""
+        <div style="
+            margin: 20px 0 15px 0;
+            padding: 12px 0;
+            border-bottom: 2px solid #34495E;
+        ">
+            <h4 style="
+                color: #2C3E50;
+                margin: 0;
+                font-size: 18px;
+                font-weight: 600;
+                letter-spacing: 1px;
+            ">EXERCISES</h4>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # 種目選択のセッション状態を初期化
+        if 'selected_exercise_idx' not in st.session_state:
+            st.session_state.selected_exercise_idx = None
+        
+        # 種目一覧を表示（選択式）
+        st.markdown("""
+        <div style="
+            background: rgba(44, 62, 80, 0.03);
+            padding: 15px;
+            border-radius: 10px;
+            margin: 15px 0;
+            border: 1px solid rgba(44, 62, 80, 0.1);
+        ">
+            <p style="
+                color: #34495E;
+                margin: 0;
+                font-size: 14px;
+                font-weight: 500;
+                text-align: center;
+            ">実施する種目を選択してください</p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # セッションに記録済みの種目
+        staged_exercises = {
+            entry['エクササイズ名'] for entry in st.session_state.staged_sets
+            if entry['プログラム名'] == selected_program
+        }
+        
+        # 種目一覧をコンパクトなボタンで表示（1列レイアウト）
+        for idx, exercise in enumerate(grouped_exercises):
+            # %表記の処理（索引の作成時に変換済み）
+            load_display = exercise.load_display
+            
+            # 選択状態によるボタンスタイル
+            is_selected = st.session_state.selected_exercise_idx == idx
+            button_type = "primary" if is_selected else "secondary"
+            
+            # スタイリッシュなボタンテキストを構築
+            exercise_name = f"{exercise.no} {exercise.exercise}"
+            if exercise.exercise in staged_exercises:
+                exercise_name += " ✓"
+            exercise_details = f"{exercise.set}set | {load_display} | {exercise.rep}rep"
+            
+            # カスタムスタイルのボタン（改良版）
+            button_style = """
+            <style>
+            div[data-testid="column"] > div > div > div > button {
+                width: 100% !important;
+                height: auto !important;
+                min-height: 70px !important;
+                padding: 12px 16px !important;
+                border-radius: 12px !important;
+                font-weight: 600 !important;
+                line-height: 1.3 !important;
+                white-space: pre-line !important;
+                box-shadow: 0 4px 12px rgba(44, 62, 80, 0.15) !important;
+                transition: all 0.2s ease !important;
+                margin-bottom: 10px !important;
+            }
+            div[data-testid="column"] > div > div > div > button:hover {
+                transform: translateY(-1px) !important;
+                box-shadow: 0 6px 16px rgba(44, 62, 80, 0.25) !important;
+            }
+            </style>
+            """
+            st.markdown(button_style, unsafe_allow_html=True)
+            
+            # ボタンのテキストを2行に分ける
+            button_text = f"""**{exercise_name}**
+{exercise_details}"""
+            
+            if st.button(
+                button_text,
+                key=f"exercise_select_{idx}",
+                use_container_width=True,
+                type=button_type
+            ):
+                # 同じ種目をクリックした場合は閉じる、違う種目なら切り替え
+                if st.session_state.selected_exercise_idx == idx:
+                    st.session_state.selected_exercise_idx = None
+                else:
+                    st.session_state.selected_exercise_idx = idx
+                st.rerun()
+            
+            # このエクササイズが選択されている場合、直下にアコーディオン入力画面を表示
+            if st.session_state.selected_exercise_idx == idx:
+                # エクササイズタイトルとアコーディオン
+                exercise_title = f"{exercise.no} {exercise.exercise}"
+                
+                with st.expander(f"記録入力: {exercise_title}", expanded=True):
+                    # 自己ベストと最後に実施した日（集計テーブルから1行だけ読む）
+                    if storage.log_exists(LOG_FILE) and player_name:
+                        with perf.stage("自己ベストの取得"):
+                            record = storage.exercise_record(player_name, exercise.exercise, LOG_FILE)
+                        if record is not None:
+                            if record['best_load'] is None:
+                                best_load = '-'
+                            elif record['best_load_reps'] is None:
+                                best_load = f"{record['best_load']:.1f}kg"
+                            else:
+                                best_load = f"{record['best_load']:.1f}kg × {record['best_load_reps']:.0f}"
+                            best_epley = f"{record['best_epley']:.1f}kg" if record['best_epley'] is not None else '-'
+                            best_brzycki = f"{record['best_brzycki']:.1f}kg" if record['best_brzycki'] is not None else '-'
+                            st.markdown(f"""
+                            <div style="
+                                background: linear-gradient(135deg, rgba(255, 193, 7, 0.06) 0%, rgba(253, 126, 20, 0.06) 100%);
+                                border: 1px solid rgba(253, 126, 20, 0.25);
+                                border-radius: 8px;
+                                padding: 12px 15px;
+                                margin: 10px 0 15px 0;
+                            ">
+                                <h5 style="
+                                    color: #495057;
+                                    margin: 0 0 8px 0;
+                                    font-size: 14px;
+                                    font-weight: 600;
+                                ">自己ベスト</h5>
+                                <div style="
+                                    display: grid;
+                                    grid-template-columns: 1fr 1fr 1fr 1fr;
+                                    gap: 8px;
+                                    font-size: 12px;
+                                    color: #6c757d;
+                                ">
+                                    <div><strong>最大負荷:</strong><br>{best_load}</div>
+                                    <div><strong>推定1RM (Epley):</strong><br>{best_epley}</div>
+                                    <div><strong>推定1RM (Brzycki):</strong><br>{best_brzycki}</div>
+                                    <div><strong>最終実施日:</strong><br>{pd.to_datetime(record['last_date']).strftime('%Y/%m/%d')} ({record['last_sets']}セット)</div>
+                                </div>
+                            </div>
+                            """, unsafe_allow_html=True)
+                    
+                    # 前回のトレーニングログを表示
+                    if storage.log_exists(LOG_FILE):
+                        # 現在の選手の同じエクササイズの履歴を取得（直近3回分）
+                        with perf.stage("履歴の取得") as timing:
+                            player_exercise_logs = storage.exercise_history(
+                                player_name, exercise.exercise, limit=3, log_file=LOG_FILE
+                            ) if player_name else pd.DataFrame()
+                            timing.rows = len(player_exercise_logs)
+                        
+                        if len(player_exercise_logs) > 0:
+                            latest_log = player_exercise_logs.iloc[0]
+                            st.markdown(f"""
+                            <div style="
+                                background: linear-gradient(135deg, rgba(108, 117, 125, 0.05) 0%, rgba(73, 80, 87, 0.05) 100%);
+                                border: 1px solid rgba(108, 117, 125, 0.2);
+                                border-radius: 8px;
+                                padding: 12px 15px;
+                                margin: 10px 0 15px 0;
+                            ">
+                                <h5 style="
+                                    color: #495057;
+                                    margin: 0 0 8px 0;
+                                    font-size: 14px;
+                                    font-weight: 600;
+                                ">前回のトレーニング</h5>
+                                <div style="
+                                    display: grid;
+                                    grid-template-columns: 1fr 1fr 1fr 1fr;
+                                    gap: 8px;
+                                    font-size: 12px;
+                                    color: #6c757d;
+                                ">
+                                    <div><strong>日付:</strong><br>{pd.to_datetime(latest_log['日付']).strftime('%m/%d') if '日付' in latest_log else '-'}</div>
+                                    <div><strong>セット:</strong><br>{latest_log.get('set', '-')}</div>
+                                    <div><strong>負荷:</strong><br>{latest_log.get('負荷', '-')}</div>
+                                    <div><strong>回数:</strong><br>{latest_log.get('回数', '-')}</div>
+                                </div>
+                                {f'<div style="margin-top: 8px; font-size: 12px; color: #6c757d;"><strong>総負荷量:</strong> {latest_log.get("総負荷量", 0):.1f}kg</div>' if '総負荷量' in latest_log else ''}
+                            </div>
+                            """, unsafe_allow_html=True)
+                            
+                            # 過去3回の履歴サマリー
+                            if len(player_exercise_logs) > 1:
+                                recent_logs = player_exercise_logs.head(3)
+                                st.markdown("""
+                                <div style="
+                                    background: rgba(248, 249, 250, 0.7);
+                                    border-radius: 6px;
+                                    padding: 10px;
+                                    margin: 10px 0;
+                                ">
+                                    <h6 style="
+                                        color: #6c757d;
+                                        margin: 0 0 6px 0;
+                                        font-size: 12px;
+                                        font-weight: 600;
+                                    ">履歴サマリー (直近3回)</h6>
+                                </div>
+                                """, unsafe_allow_html=True)
+                                
+                                for i, (_, log) in enumerate(recent_logs.iterrows()):
+                                    if i < 3:  # 最大3件
+                                        date_str = pd.to_datetime(log['日付']).strftime('%m/%d') if '日付' in log else '-'
+                                        st.markdown(f"""
+                                        <div style="
+                                            font-size: 11px;
+                                            color: #8a9298;
+                                            padding: 2px 10px;
+                                            display: flex;
+                                            justify-content: space-between;
+                                        ">
+                                            <span>{date_str}</span>
+                                            <span>{log.get('負荷', '-')} × {log.get('回数', '-')} ({log.get('総負荷量', 0):.0f}kg)</span>
+                                        </div>
+                                        """, unsafe_allow_html=True)
+                        else:
+                            st.markdown("""
+                            <div style="
+                                background: rgba(248, 249, 250, 0.7);
+                                border: 1px dashed rgba(108, 117, 125, 0.3);
+                                border-radius: 6px;
+                                padding: 10px;
+                                margin: 10px 0 15px 0;
+                                text-align: center;
+                            ">
+                                <span style="color: #8a9298; font-size: 12px;">初回トレーニングです</span>
+                            </div>
+                            """, unsafe_allow_html=True)
+                    
+                    # Point表示（改善されたデザイン）
+                    if exercise.point is not None:
+                        st.markdown(f"""
+                        <div style="
+                            background: linear-gradient(135deg, rgba(108, 117, 125, 0.1) 0%, rgba(73, 80, 87, 0.1) 100%);
+                            border-left: 4px solid #6c757d;
+                            padding: 10px 15px;
+                            margin: 10px 0 15px 0;
+                            border-radius: 6px;
+                        ">
+                            <p style="
+                                margin: 0;
+                                color: #495057;
+                                font-weight: 600;
+                                font-size: 13px;
+                                line-height: 1.4;
+                            ">
+                                <span style="color: #6c757d; font-weight: 700;">POINT:</span> {exercise.point}
+                            </p>
+                        </div>
+                        """, unsafe_allow_html=True)
+                    
+                    # プログラム情報をコンパクトに
+                    st.markdown(f"""
+                    <div style="
+                        background: rgba(248, 249, 250, 0.8);
+                        padding: 12px;
+                        border-radius: 8px;
+                        margin: 10px 0;
+                        display: grid;
+                        grid-template-columns: 1fr 1fr 1fr;
+                        gap: 10px;
+                        text-align: center;
+                        border: 1px solid rgba(108, 117, 125, 0.2);
+                    ">
+                        <div style="
+                            background: rgba(255, 255, 255, 0.8);
+                            padding: 8px;
+                            border-radius: 6px;
+                        ">
+                            <div style="color: #6c757d; font-size: 10px; font-weight: 700; margin-bottom: 4px;">SETS</div>
+                            <div style="color: #495057; font-size: 16px; font-weight: 700;">{exercise.set}</div>
+                        </div>
+                        <div style="
+                            background: rgba(255, 255, 255, 0.8);
+                            padding: 8px;
+                            border-radius: 6px;
+                        ">
+                            <div style="color: #6c757d; font-size: 10px; font-weight: 700; margin-bottom: 4px;">LOAD</div>
+                            <div style="color: #495057; font-size: 16px; font-weight: 700;">{load_display}</div>
+                        </div>
+                        <div style="
+                            background: rgba(255, 255, 255, 0.8);
+                            padding: 8px;
+                            border-radius: 6px;
+                        ">
+                            <div style="color: #6c757d; font-size: 10px; font-weight: 700; margin-bottom: 4px;">REPS</div>
+                            <div style="color: #495057; font-size: 16px; font-weight: 700;">{exercise.rep}</div>
+                        </div>
+                    </div>
+                    """, unsafe_allow_html=True)
+                    
+                    # セット数の計算
+                    total_sets = exercise.total_sets
+                    
+                    # セット数入力（コンパクト）
+                    actual_sets = st.number_input(
+                        "実施セット数", 
+                        min_value=1, 
+                        value=total_sets, 
+                        key=f"sets_{idx}",
+                        help=f"予定: {exercise.set}"
+                    )
+                    
+                    # モバイル対応の横並び入力
+                    st.markdown("**記録入力:**")
+                    
+                    loads = []
+                    reps = []
+                    
+                    for set_num in range(actual_sets):
+                        # モバイルで使いやすい横並びレイアウト
+                        col1, col2, col3, col4 = st.columns([1, 1, 1, 0.7])
+                        
+                        with col1:
+                            unit_default = 0
+                            if f"copy_unit_{idx}" in st.session_state and set_num > 0:
+                                units = ["kg", "%", "体重", "その他"]
+                                saved_unit = st.session_state[f"copy_unit_{idx}"]
+                                if saved_unit in units:
+                                    unit_default = units.index(saved_unit)
+                            
+                            unit = st.selectbox(
+                                "単位",
+                                ["kg", "%", "体重", "その他"],
+                                index=unit_default,
+                                key=f"unit_{idx}_{set_num}",
+                                label_visibility="collapsed"
+                            )
+                        
+                        with col2:
+                            if unit == "その他":
+                                load_default = ""
+                                if f"copy_load_text_{idx}" in st.session_state and set_num > 0:
+                                    load_default = st.session_state[f"copy_load_text_{idx}"]
+                                
+                                set_load = st.text_input(
+                                    "負荷", 
+                                    value=load_default,
+                                    key=f"load_{idx}_{set_num}",
+                                    placeholder="負荷",
+                                    label_visibility="collapsed"
+                                )
+                            elif unit == "体重":
+                                set_load = "体重"
+                                st.text_input("負荷", value="体重", disabled=True, key=f"load_disabled_{idx}_{set_num}", label_visibility="collapsed")
+                            else:
+                                load_default = 0.0
+                                if f"copy_load_val_{idx}" in st.session_state and set_num > 0:
+                                    load_default = st.session_state[f"copy_load_val_{idx}"]
+                                
+                                load_value = st.number_input(
+                                    "値",
+                                    min_value=0.0,
+                                    value=load_default,
+                                    step=0.1 if unit == "%" else 0.5,
+                                    key=f"load_val_{idx}_{set_num}",
+                                    label_visibility="collapsed"
+                                )
+                                set_load = f"{load_value}{unit}"
+                            
+                            loads.append(set_load)
+                        
+                        with col3:
+                            rep_default = 1
+                            if f"copy_rep_{idx}" in st.session_state and set_num > 0:
+                                rep_default = st.session_state[f"copy_rep_{idx}"]
+                            
+                            set_rep = st.number_input(
+                                "レップ数", 
+                                min_value=0, 
+                                value=rep_default, 
+                                key=f"rep_{idx}_{set_num}",
+                                label_visibility="collapsed"
+                            )
+                            reps.append(set_rep)
+                        
+                        with col4:
+                            if set_num == 0 and actual_sets > 1:
+                                if st.button("全適用", key=f"copy_all_{idx}", help="この設定を全セットに適用"):
+                                    st.session_state[f"copy_unit_{idx}"] = unit
+                                    st.session_state[f"copy_rep_{idx}"] = set_rep
+                                    
+                                    if unit == "その他":
+                                        st.session_state[f"copy_load_text_{idx}"] = set_load
+                                    elif unit != "体重":
+                                        st.session_state[f"copy_load_val_{idx}"] = load_value
+                                    
+                                    st.rerun()
+                            else:
+                                st.write("")
+                    
+                    # コメント入力（コンパクト）
+                    exercise_comment = st.text_input(
+                        "コメント", 
+                        key=f"comment_{idx}",
+                        placeholder="調子、フォームなど"
+                    )
+                    
+                    # ボタン群（横並び）
+                    col_btn1, col_btn2 = st.columns(2)
+                    
+                    with col_btn1:
+                        # 完了ボタン（モバイル対応）
+                        if st.button(f"{exercise.exercise} 完了", key=f"complete_{idx}", type="primary", use_container_width=True):
+                            if not player_name:
+                                st.error("選手名を入力してください")
+                            else:
+                                # セットデータを準備
+                                sets_data = []
+                                for set_num in range(actual_sets):
+                                    sets_data.append({
+                                        'set_number': set_num + 1,
+                                        'load': loads[set_num],
+                                        'reps': reps[set_num]
+                                    })
+                                
+                                # セッションモードでは記録だけして、保存は「全プログラム完了」の時に行う
+                                if session_mode:
+                                    stage_exercise(sets_to_entries(selected_program, exercise.exercise, sets_data, body_weight))
+                                    st.session_state.selected_exercise_idx = None
+                                    st.rerun()
+                                
+                                # 新しい形式で保存
+                                saved_sets = save_training_log_formatted(
+                                    player_name=player_name,
+                                    program_name=selected_program,
+                                    exercise_name=exercise.exercise,
+                                    sets_data=sets_data,
+                                    body_weight=body_weight
+                                )
+                                
+                                if saved_sets > 0:
+                                    st.success(f"✅ {exercise.exercise} 完了！{saved_sets}セットのデータを保存しました。")
+                                    st.balloons()
+                                    
+                                    # 種目選択をリセット
+                                    st.session_state.selected_exercise_idx = None
+                                    st.rerun()
+                                else:
+                                    st.error("❌ データの保存に失敗しました。管理者に連絡してください。")
+                    
+                    with col_btn2:
+                        # 戻るボタン
+                        if st.button("種目選択に戻る", key=f"back_{idx}", use_container_width=True):
+                            st.session_state.selected_exercise_idx = None
+                            st.rerun()
+        
+        # 全種目完了ボタン（全ての種目を完了した場合に表示）
+        if st.session_state.selected_exercise_idx is None:
+            st.markdown("---")
+            
+            # セッション状態に完了メッセージフラグを追加
+            if 'program_completed' not in st.session_state:
+                st.session_state.program_completed = False
+            
+            # セッションの記録（保存前に修正・削除できる）
+            # 途中でまとめて保存をオフにしても、記録済みの分は「全プログラム完了」で保存する
+            if st.session_state.staged_sets:
+                st.markdown("### セッションの記録")
+                st.caption("「全プログラム完了」を押すとまとめてログに保存されます。保存前に修正・行の削除ができます。")
+                edit_staged_sets()
+            
+            if st.button("全プログラム完了", type="primary", use_container_width=True):
+                staged = [entry for entry in st.session_state.staged_sets if entry.get('エクササイズ名')]
+                if staged and not player_name:
+                    st.error("選手名を入力してください")
+                elif staged and save_log_rows(make_log_rows(player_name, staged)) == 0:
+                    st.error("❌ データの保存に失敗しました。セッションの記録は残っているので、もう一度保存してください。")
+                else:
+                    st.session_state.staged_sets = []
+                    st.session_state.staged_version += 1
+                    st.session_state.program_completed = True
+                    st.balloons()
+                    # セッション状態をクリア
+                    for key in list(st.session_state.keys()):
+                        if key.startswith(('copy_', 'sets_', 'unit_', 'load_', 'rep_', 'comment_')):
+                            del st.session_state[key]
+                    st.rerun()
+            
+            # 完了メッセージを一番下に表示
+            if st.session_state.program_completed:
+                st.markdown("---")
+                st.success("🎉 お疲れ様でした！全プログラムが完了しました！")
+                # メッセージ表示後にフラグをリセット
+                if st.button("新しいトレーニングを開始", type="secondary", use_container_width=True):
+                    st.session_state.program_completed = False
+                    st.rerun()
@@ -0,0 +1,181 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from core import export, perf, storage
+from core.pagination import PAGE_SIZES, page_count, page_slice
+from core.storage import LOG_FILE
+from views.common import load_log_stats
+
+# これより多い件数のエクスポートは進捗を表示しながら作成する
+LARGE_EXPORT_ROWS = 200_000
+
+
+# 過去ログ検索ページ
+def render():
+    st.title("過去ログ検索")
+    
+    # ログの件数を確認（全件の読み込みはしない）
+    log_stats = load_log_stats()
+    
+    if log_stats["rows"] == 0:
+        st.info("まだログデータがありません。")
+        st.stop()
+    
+    # 検索条件入力
+    st.markdown("### 検索条件")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        # 選手名選択
+        with perf.stage("選択肢の取得"):
+            names = storage.distinct_values('名前', LOG_FILE)
+        if names:
+            available_names = ["すべて"] + names
+            selected_name = st.selectbox("選手名", available_names)
+        else:
+            selected_name = "すべて"
+            st.selectbox("選手名", ["すべて"], disabled=True)
+    
+    with col2:
+        # プログラム選択
+        with perf.stage("選択肢の取得"):
+            programs = storage.distinct_values('プログラム名', LOG_FILE)
+        if programs:
+            available_programs = ["すべて"] + programs
+            selected_program = st.selectbox("プログラム", available_programs)
+        else:
+            selected_program = "すべて"
+            st.selectbox("プログラム", ["すべて"], disabled=True)
+    
+    with col3:
+        # 日付範囲選択
+        date_option = st.selectbox("期間", ["すべて", "今日", "今週", "今月", "カスタム"])
+    
+    # カスタム日付範囲
+    if date_option == "カスタム":
+        col_date1, col_date2 = st.columns(2)
+        with col_date1:
+            start_date = st.date_input("開始日", value=datetime.today() - timedelta(days=7))
+        with col_date2:
+            end_date = st.date_input("終了日", value=datetime.today())
+    
+    # 日付範囲（開始日・終了日を含む）
+    today = datetime.today().date()
+    range_start = range_end = None
+    if date_option == "今日":
+        range_start = range_end = today
+    elif date_option == "今週":
+        range_start = today - timedelta(days=today.weekday())
+    elif date_option == "今月":
+        range_start = today.replace(day=1)
+    elif date_option == "カスタム":
+        range_start, range_end = start_date, end_date
+    
+    # フィルタリング処理（SQLite使用時はインデックスで絞り込み）
+    search_filters = {
+        "name": None if selected_name == "すべて" else selected_name,
+        "program": None if selected_program == "すべて" else selected_program,
+        "start": range_start,
+        "end": range_end,
+    }
+    with perf.stage("絞り込み") as timing:
+        filtered_df = storage.query_log(log_file=LOG_FILE, **search_filters)
+        timing.rows = len(filtered_df)
+    
+    # 検索結果表示
+    st.markdown(f"### 検索結果: {len(filtered_df)}件")
+    
+    if len(filtered_df) > 0:
+        # データテーブルで表示
+        display_columns = ['日付', 'プログラム名', '名前', 'エクササイズ名', 'set', '負荷', '回数', '総負荷量']
+        available_columns = [col for col in display_columns if col in filtered_df.columns]
+        
+        # ページ送り・並べ替え（表示するページの行だけを整形して送る）
+        col_page1, col_page2, col_page3, col_page4 = st.columns(4)
+        with col_page1:
+            sort_label = st.selectbox("並べ替え", ["記録順"] + available_columns, key="search_sort")
+        with col_page2:
+            sort_order = st.selectbox("順序", ["昇順", "降順"], index=1, key="search_order")
+        with col_page3:
+            page_size = st.selectbox("表示件数", PAGE_SIZES, index=1, key="search_page_size")
+        total_pages = page_count(len(filtered_df), page_size)
+        with col_page4:
+            current_page = st.number_input("ページ", min_value=1, max_value=total_pages, value=1, step=1, key="search_page")
+        
+        sort_by = None if sort_label == "記録順" else sort_label
+        with perf.stage("ページ切り出し") as timing:
+            page_df = page_slice(filtered_df, current_page, page_size, sort_by=sort_by, ascending=sort_order == "昇順")
+            display_df = page_df[available_columns].copy()
+            
+            # 日付フォーマットを調整
+            if '日付' in display_df.columns:
+                display_df['日付'] = pd.to_datetime(display_df['日付']).dt.strftime('%Y/%m/%d')
+            timing.rows = len(display_df)
+        
+        first_row = (min(current_page, total_pages) - 1) * page_size + 1
+        st.caption(f"{len(filtered_df)}件中 {first_row}〜{first_row + len(display_df) - 1}件目（{min(current_page, total_pages)} / {total_pages}ページ）")
+        st.dataframe(display_df, use_container_width=True, hide_index=True)
+        
+        # 統計情報（日ごとの集計テーブルから求める）
+        if len(filtered_df) > 0:
+            st.markdown("### 統計情報")
+            with perf.stage("統計情報"):
+                summary = storage.search_summary(log_file=LOG_FILE, **search_filters)
+            col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
+            
+            with col_stat1:
+                st.metric("総セット数", summary["sets"])
+            
+            with col_stat2:
+                st.metric("総負荷量", f"{summary['volume']:.1f}kg")
+            
+            with col_stat3:
+                st.metric("実施種目数", summary["exercises"])
+            
+            with col_stat4:
+                st.metric("実施プログラム数", summary["programs"])
+        
+        # データのエクスポート機能（チャンクごとに一時ファイルへ書き出す）
+        st.markdown("### データエクスポート")
+        export_format = st.radio("形式", list(export.FORMATS), horizontal=True, key="export_format")
+        extension, mime = export.FORMATS[export_format]
+        export_file_name = f"training_log_{datetime.today().strftime('%Y%m%d')}.{extension}"
+        
+        if len(filtered_df) <= LARGE_EXPORT_ROWS:
+            # クリックした時にファイルを作成（1回のクリックでダウンロード）
+            st.download_button(
+                label=f"{export_format}ファイルをダウンロード",
+                data=lambda df=filtered_df, fmt=export_format: export.export_to_tempfile(df, fmt),
+                file_name=export_file_name,
+                mime=mime,
+                on_click="ignore"
+            )
+        else:
+            # 大量データは進捗を表示しながら作成（クリック時に作る方法では進捗を表示できないため、作成とダウンロードは別のボタン）
+            # ダウンロードボタンはファイル全体をメモリに読み込むので、数百万行はコマンドラインから直接ファイルに書き出す
+            st.caption(
+                f"{LARGE_EXPORT_ROWS:,}件を超えるため、ファイルを作成してからダウンロードします（2回のクリック）。"
+                "ダウンロードの際はファイル全体がサーバーのメモリに読み込まれます。"
+                "数百万件の書き出しは `python cli.py export 出力ファイル.csv` を使うと、作成したファイルをメモリに読み込まずに直接書き出せます。"
+            )
+            if st.button(f"{export_format}ファイルを作成（{len(filtered_df)}件）"):
+                progress_bar = st.progress(0.0, text="エクスポート中...")
+                with perf.stage("エクスポート", rows=len(filtered_df)):
+                    export_file = export.export_to_tempfile(
+                        filtered_df,
+                        export_format,
+                        progress=lambda ratio: progress_bar.progress(ratio, text=f"エクスポート中... {ratio:.0%}")
+                    )
+                progress_bar.progress(1.0, text="エクスポート完了")
+                st.download_button(
+                    label=f"{export_format}ファイルをダウンロード",
+                    data=export_file,
+                    file_name=export_file_name,
+                    mime=mime,
+                    on_click="ignore"
+                )
+    else:
+        st.info("条件に一致するデータが見つかりませんでした。")
@@ -0,0 +1,138 @@
+import streamlit as st
+
+from core import perf, program_index
+from core.storage import PROGRAM_FILE
+from views.common import load_program_file
+
+# 検索語に一致したメイン種目の行の色
+MATCH_STYLE = "background-color: rgba(255, 193, 7, 0.25)"
+
+
+# プログラム一覧ページ
+def render():
+    st.title("プログラム一覧")
+    
+    # プログラムファイルを読み込み
+    program_df = load_program_file()
+    
+    if len(program_df) == 0:
+        st.error("プログラムデータを読み込めませんでした。")
+        st.stop()
+    
+    # プログラム検索機能
+    with perf.stage("プログラム索引"):
+        index = program_index.load(PROGRAM_FILE)
+    available_programs = index.names
+    
+    # 検索バー
+    st.markdown("### プログラム検索")
+    
+    # プログラム選択式
+    col_search1, col_search2 = st.columns(2)
+    
+    with col_search1:
+        selected_programs = st.multiselect(
+            "プログラムを選択", 
+            ["すべて"] + list(available_programs),
+            default=["すべて"],
+            help="複数選択可能"
+        )
+    
+    with col_search2:
+        # エクササイズ名での検索も可能
+        exercise_search = st.text_input("エクササイズ名・ポイントで検索", placeholder="例: Squat, Bench")
+    
+    # 検索結果のフィルタリング
+    if "すべて" not in selected_programs and selected_programs:
+        filtered_programs = selected_programs
+    else:
+        filtered_programs = list(available_programs)
+    
+    # エクササイズ名・ポイントでの追加フィルタリング（n-gram の索引で一致する行を求める）
+    matches = {}
+    if exercise_search:
+        with perf.stage("エクササイズ検索") as timing:
+            matches = program_index.search(index, exercise_search)
+            timing.rows = len(index.search.texts)
+        filtered_programs = [prog for prog in filtered_programs if prog in matches]
+    
+    # 検索結果の表示
+    if len(selected_programs) > 1 or (len(selected_programs) == 1 and "すべて" not in selected_programs) or exercise_search:
+        st.markdown(f"**検索結果: {len(filtered_programs)}件**")
+    
+    # 検索結果に基づいてプログラムを表示
+    for program_name in filtered_programs:
+        with st.expander(f"{program_name}", expanded=len(filtered_programs) <= 3):
+            program = index.programs[program_name]
+            # 検索語に一致した行（なければ空）
+            matched = matches.get(program_name, {"warmup": set(), "main": set()})
+            
+            # ウォーミングアップ・補助種目の表示（WU、ST、PLを含む）
+            if len(program.warmups) > 0:
+                st.markdown("""
+                <div style="
+                    background: rgba(108, 117, 125, 0.08);
+                    border-left: 3px solid #6c757d;
+                    padding: 8px 12px;
+                    margin: 10px 0;
+                    border-radius: 6px;
+                ">
+                    <h4 style="
+                        color: #495057;
+                        margin: 0;
+                        font-size: 14px;
+                        font-weight: 600;
+                        letter-spacing: 0.5px;
+                    ">WARM UP & AUXILIARY</h4>
+                </div>
+                """, unsafe_allow_html=True)
+                
+                for i, warmup in enumerate(program.warmups):
+                    marker = "🔍 " if i in matched["warmup"] else ""
+                    if warmup.summary_en:
+                        st.markdown(f"• {marker}{warmup.type_prefix}**{warmup.exercise}** ({warmup.type_name}) - {warmup.summary_en}")
+                    else:
+                        st.markdown(f"• {marker}{warmup.type_prefix}**{warmup.exercise}** ({warmup.type_name})")
+                    
+                    # ポイントがあれば表示
+                    if warmup.point is not None:
+                        st.markdown(f"  POINT: {warmup.point}")
+                
+                st.markdown("---")
+            
+            # メイン種目の表示（番号のみ）
+            if program.main_table is not None:
+                st.markdown("""
+                <div style="
+                    background: rgba(73, 80, 87, 0.08);
+                    border-left: 3px solid #495057;
+                    padding: 8px 12px;
+                    margin: 10px 0;
+                    border-radius: 6px;
+                ">
+                    <h4 style="
+                        color: #495057;
+                        margin: 0;
+                        font-size: 14px;
+                        font-weight: 600;
+                        letter-spacing: 0.5px;
+                    ">MAIN EXERCISES</h4>
+                </div>
+                """, unsafe_allow_html=True)
+                
+                # エクササイズ一覧を表形式で表示
+                st.write("**エクササイズ詳細:**")
+                
+                # 表示用の表は索引の作成時に整形済み（検索語に一致した行は色を付ける）
+                if matched["main"]:
+                    rows = {i + 1 for i in matched["main"]}
+                    st.dataframe(
+                        program.main_table.style.apply(
+                            lambda row: [MATCH_STYLE if row.name in rows else ""] * len(row), axis=1
+                        ),
+                        use_container_width=True,
+                    )
+                else:
+                    st.dataframe(program.main_table, use_container_width=True)
+            else:
+                st.info("このプログラムにはメイン種目が設定されていません。")